@@ -37,7 +37,7 @@ interface TelemetryFile {
   filename: string
   owner_team: string
   classification: string
-  content: string
+  content: string | null
   created_at: string
 }
 
@@ -222,8 +222,18 @@ export default function TelemetryPage() {
 
       // Find the file in telemetryData to get the raw Base64 content
       const file = telemetryData.find(f => f.id === fileId)
-      if (file) {
+      if (file && file.content !== null) {
         setViewRawContent(file.content) // Store the Base64 encrypted content
+      } else if (file) {
+        // Ciphertext lives in the blob store, so the listing omits it
+        const f1_team = localStorage.getItem('f1_team') || ''
+        const rawResponse = await fetch(`http://localhost:5000/api/telemetry/${fileId}/ciphertext?format=base64`, {
+          headers: {
+            'X-User-Team': f1_team,
+            'X-User-Name': f1_user,
+          },
+        })
+        setViewRawContent(rawResponse.ok ? await rawResponse.text() : '')
       }
 
       const response = await fetch('http://localhost:5000/api/telemetry/decrypt', {
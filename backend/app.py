@@ -1,4 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_request_context, Response, stream_with_context
+import atexit
+import hashlib
+import hmac
+import json
+import random
+import socket
+import threading
+import time
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 import pyotp
@@ -9,21 +17,237 @@ from datetime import datetime, timedelta
 import jwt
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from crypto_utils import (
+    generate_rsa_keypair, encrypt_aes_gcm, decrypt_aes_gcm, sign_data, verify_signature,
+    unwrap_key, rewrap_key, KeyUnwrapError, ContentDecryptError,
+    generate_wrapped_key, encrypt_with_key, decrypt_many, verify_many
+)
+from crypto_executor import CryptoExecutor, CryptoBusy, operations_from_env
+from telemetry_analytics import (
+    LRUCache, load_channels, aggregate_channels, query_key, GROUP_CHANNELS,
+    build_pyramid, downsample_series, channel_series, DOWNSAMPLE_METHODS,
+    compare_laps, ALIGN_BASES
+)
+from singleflight import SingleFlight
+from db_config import database_uri, engine_options, configure_engine
+from metrics import Registry, SIZE_BUCKETS, COUNT_BUCKETS
+from log_config import configure_logging
+from profiling import StackSampler, ProfileStore
+from http_encoding import FastJSONProvider, CompressionMiddleware, json_backend
+from event_broker import EventBroker, BrokerFull, format_event
+from live_ingest import LiveIngestor, LiveSession, IngestBackpressure, SegmentConflict, join_frame_arrays
+from audit_chain import (
+    GENESIS_HASH, entry_leaf, hash_leaf, merkle_root, inclusion_proof, root_from_proof,
+    chain_hash, checkpoint_message
+)
+from audit_archive import write_segment, open_segment, month_bounds
+from search_index import install_search_index, apply_filename_search
+from blob_store import make_blob_store, decrypt_blob, BlobNotFound
+import vault_export
+from vault_export import ExportWriter, ExportFormatError, read_export, view_chunks, ndjson, manifest_message
+from integrity_scrub import IntegrityScrubber, check_files, OK as SCRUB_OK
+from version_delta import seal_version, reconstruct_version, DeltaError
 
 app = Flask(__name__)
 CORS(app)
 
+logger = configure_logging()
+
                
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['RESET_DB_ON_START'] = os.environ.get('RESET_DB_ON_START', '1') == '1'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'your-secret-key-change-this'                        
+app.config['ANALYTICS_CACHE_SIZE'] = int(os.environ.get('ANALYTICS_CACHE_SIZE', 256))
+app.config['CHANNEL_CACHE_SIZE'] = int(os.environ.get('CHANNEL_CACHE_SIZE', 32))
+app.config['PYRAMID_CACHE_SIZE'] = int(os.environ.get('PYRAMID_CACHE_SIZE', 64))
+app.config['DOWNSAMPLE_MAX_POINTS'] = int(os.environ.get('DOWNSAMPLE_MAX_POINTS', 20000))
+app.config['CRYPTO_EXECUTOR'] = os.environ.get('CRYPTO_EXECUTOR')  # process | thread | inline
+app.config['CRYPTO_WORKERS'] = int(os.environ.get('CRYPTO_WORKERS', 0)) or None
+app.config['CRYPTO_RETRY_AFTER'] = int(os.environ.get('CRYPTO_RETRY_AFTER', 1))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+app.config['PROFILE_INTERVAL_MS'] = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')
+app.config['PROFILE_BUFFER_SIZE'] = int(os.environ.get('PROFILE_BUFFER_SIZE', 50))
+app.config['SSE_BUFFER_SIZE'] = int(os.environ.get('SSE_BUFFER_SIZE', 256))
+app.config['SSE_MAX_SUBSCRIBERS'] = int(os.environ.get('SSE_MAX_SUBSCRIBERS', 500))
+app.config['SSE_HEARTBEAT_SECONDS'] = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+app.config['SSE_REPLAY_LIMIT'] = int(os.environ.get('SSE_REPLAY_LIMIT', 500))
+app.config['AUDIT_BATCH_SIZE'] = int(os.environ.get('AUDIT_BATCH_SIZE', 256))
+app.config['AUDIT_BATCH_INTERVAL_SECONDS'] = float(os.environ.get('AUDIT_BATCH_INTERVAL_SECONDS', 5))
+app.config['AUDIT_BATCH_GRACE_SECONDS'] = float(os.environ.get('AUDIT_BATCH_GRACE_SECONDS', 1))
+app.config['AUDIT_SIGN_INTERVAL_SECONDS'] = float(os.environ.get('AUDIT_SIGN_INTERVAL_SECONDS', 60))
+app.config['AUDIT_HOT_DAYS'] = int(os.environ.get('AUDIT_HOT_DAYS', 30))
+app.config['AUDIT_RETENTION_DAYS'] = int(os.environ.get('AUDIT_RETENTION_DAYS', 0))
+app.config['AUDIT_ARCHIVE_DIR'] = os.environ.get(
+    'AUDIT_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audit_archive')
+)
+app.config['AUDIT_ARCHIVE_INTERVAL_SECONDS'] = float(os.environ.get('AUDIT_ARCHIVE_INTERVAL_SECONDS', 3600))
+app.config['AUDIT_SEGMENT_MAX_ROWS'] = int(os.environ.get('AUDIT_SEGMENT_MAX_ROWS', 250000))
+app.config['LIVE_SEGMENT_MAX_FRAMES'] = int(os.environ.get('LIVE_SEGMENT_MAX_FRAMES', 1000))
+app.config['LIVE_SEGMENT_MAX_BYTES'] = int(os.environ.get('LIVE_SEGMENT_MAX_BYTES', 256 * 1024))
+app.config['LIVE_SEGMENT_MAX_AGE_MS'] = float(os.environ.get('LIVE_SEGMENT_MAX_AGE_MS', 1000))
+app.config['LIVE_MAX_BUFFERED_FRAMES'] = int(os.environ.get('LIVE_MAX_BUFFERED_FRAMES', 20000))
+app.config['BLOB_STORE'] = os.environ.get('BLOB_STORE', 'local')  # local | s3 | inline
+app.config['BLOB_STORE_DIR'] = os.environ.get(
+    'BLOB_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blobs')
+)
+app.config['BLOB_S3_BUCKET'] = os.environ.get('BLOB_S3_BUCKET')
+app.config['BLOB_S3_ENDPOINT'] = os.environ.get('BLOB_S3_ENDPOINT')
+app.config['BLOB_S3_PREFIX'] = os.environ.get('BLOB_S3_PREFIX', '')
+app.config['BLOB_S3_REGION'] = os.environ.get('BLOB_S3_REGION')
+app.config['VAULT_EXPORT_BATCH_SIZE'] = int(os.environ.get('VAULT_EXPORT_BATCH_SIZE', 500))
+app.config['VAULT_IMPORT_MAX_FILE_BYTES'] = int(os.environ.get('VAULT_IMPORT_MAX_FILE_BYTES', 256 * 1024 * 1024))
+app.config['SCRUB_CPU_BUDGET'] = float(os.environ.get('SCRUB_CPU_BUDGET', 0.1))  # 0 disables the scrubber
+app.config['SCRUB_WORKERS'] = int(os.environ.get('SCRUB_WORKERS', 1))
+app.config['SCRUB_BATCH_SIZE'] = int(os.environ.get('SCRUB_BATCH_SIZE', 50))
+app.config['SCRUB_PASS_INTERVAL_SECONDS'] = int(os.environ.get('SCRUB_PASS_INTERVAL_SECONDS', 86400))
+app.config['SCRUB_NICE'] = int(os.environ.get('SCRUB_NICE', 10))
+# Every Nth version of a file is stored whole, so a read replays at most N-1 deltas
+app.config['VERSION_SNAPSHOT_INTERVAL'] = int(os.environ.get('VERSION_SNAPSHOT_INTERVAL', 16))
+app.config['VERSION_CACHE_SIZE'] = int(os.environ.get('VERSION_CACHE_SIZE', 64))
+app.config['LIVE_KEY_CACHE_SIZE'] = int(os.environ.get('LIVE_KEY_CACHE_SIZE', 256))
+app.config['JSON_ENCODER'] = json_backend(os.environ.get('JSON_ENCODER'))  # orjson (if installed) | stdlib
+app.config['COMPRESSION'] = os.environ.get('COMPRESSION', '1') == '1'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_GZIP_LEVEL'] = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 1))
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+if app.config['JSON_ENCODER'] == 'orjson':
+    app.json = FastJSONProvider(app)
+
+# Negotiated gzip/brotli for large /api/* responses, compressed as they stream out
+if app.config['COMPRESSION']:
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config['COMPRESSION_MIN_SIZE'],
+        gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+        brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY']
+    )
 
 db = SQLAlchemy(app)
 
+metrics = Registry()
+REQUEST_LATENCY = metrics.histogram(
+    'http_request_duration_seconds', 'Request latency by route and status', ('method', 'route', 'status'))
+REQUEST_SIZE = metrics.histogram(
+    'http_request_size_bytes', 'Request body size', ('route',), buckets=SIZE_BUCKETS)
+RESPONSE_SIZE = metrics.histogram(
+    'http_response_size_bytes', 'Response body size', ('route',), buckets=SIZE_BUCKETS)
+DB_QUERIES = metrics.histogram(
+    'db_queries_per_request', 'Database queries issued per request', ('route',), buckets=COUNT_BUCKETS)
+DB_TIME = metrics.histogram(
+    'db_query_seconds_per_request', 'Time spent in database queries per request', ('route',))
+DB_QUERIES_TOTAL = metrics.counter('db_queries_total', 'Database queries executed')
+CRYPTO_PRIMITIVE = metrics.histogram(
+    'crypto_primitive_duration_seconds', 'Time spent in each crypto primitive', ('primitive',))
+CRYPTO_OPERATION = metrics.histogram(
+    'crypto_operation_duration_seconds', 'Crypto executor call latency including queueing', ('op',))
+AUDIT_WRITE = metrics.histogram('audit_write_duration_seconds', 'Audit log insert + commit latency')
+
+
+def observe_crypto(op, seconds, timings):
+    """Crypto executor observer: record call latency and per-primitive timings"""
+    CRYPTO_OPERATION.observe(op, value=seconds)
+    for primitive, elapsed in timings:
+        CRYPTO_PRIMITIVE.observe(primitive, value=elapsed)
+    # A profiled request also keeps its own split (the sampler only sees the wait)
+    sampler = g.get('profiler') if has_request_context() else None
+    if sampler is not None:
+        sampler.record_crypto(op, seconds, timings, CryptoExecutor.run.__code__)
+
+# Decrypted channel arrays keyed by (file_id, nonce) and derived results keyed
+# by (file_id, nonce, query). The nonce changes whenever a row is re-encrypted,
+# so a reused id never serves stale data.
+channel_cache = LRUCache(app.config['CHANNEL_CACHE_SIZE'])
+analytics_cache = LRUCache(app.config['ANALYTICS_CACHE_SIZE'])
+pyramid_cache = LRUCache(app.config['PYRAMID_CACHE_SIZE'])
+# Reconstructed plaintext of file versions keyed by (file_id, version);
+# versions are immutable and ids are never reused
+version_cache = LRUCache(app.config['VERSION_CACHE_SIZE'])
+# Unwrapped AES keys of open live sessions: file_id -> {(user id, wrapped
+# key): key}, so followers tailing a session do not pay an RSA unwrap per poll
+live_key_cache = LRUCache(app.config['LIVE_KEY_CACHE_SIZE'])
+
+# Concurrent decrypts of the same file by the same key holder share one
+# fetch/unwrap/decrypt; channel parsing is shared per file version
+decrypt_flight = SingleFlight('decrypt')
+channel_flight = SingleFlight('channels')
+
+# All RSA and AES-GCM work runs here instead of on request threads
+crypto = CryptoExecutor(
+    mode=app.config['CRYPTO_EXECUTOR'],
+    workers=app.config['CRYPTO_WORKERS'],
+    operations=operations_from_env(),
+    retry_after=app.config['CRYPTO_RETRY_AFTER'],
+    observer=observe_crypto
+)
+crypto.warm_up()
+atexit.register(crypto.shutdown)
+
+# Request profiling is opt-in: by admin header (needs PROFILE_TOKEN) or by
+# sampling rate. With neither configured the hooks return immediately.
+profiling_enabled = app.config['PROFILE_SAMPLE_RATE'] > 0 or bool(app.config['PROFILE_TOKEN'])
+profile_store = ProfileStore(app.config['PROFILE_BUFFER_SIZE'], app.config['PROFILE_DIR'])
+
+# Audit entries and dashboard counter deltas are pushed to /api/events
+# subscribers as they are written, instead of every dashboard polling
+events = EventBroker(app.config['SSE_BUFFER_SIZE'], app.config['SSE_MAX_SUBSCRIBERS'])
+
+# Rows with a blob_ref are always read through this store; BLOB_STORE=inline
+# only keeps new uploads in the database
+blob_store = make_blob_store(
+    app.config['BLOB_STORE'], app.config['BLOB_STORE_DIR'],
+    bucket=app.config['BLOB_S3_BUCKET'], endpoint_url=app.config['BLOB_S3_ENDPOINT'],
+    prefix=app.config['BLOB_S3_PREFIX'], region=app.config['BLOB_S3_REGION']
+)
+
+metrics.gauge(
+    'crypto_executor_calls', 'Crypto executor counters per operation', ('op', 'state'),
+    collect=lambda: [
+        ((op, state), value)
+        for op, op_stats in crypto.stats()['operations'].items()
+        for state, value in op_stats.items() if state in ('submitted', 'rejected', 'timeouts', 'errors', 'in_flight')
+    ]
+)
+metrics.gauge(
+    'singleflight_calls', 'Request coalescing counters', ('flight', 'state'),
+    collect=lambda: [
+        ((flight.name, state), value)
+        for flight in (decrypt_flight, channel_flight)
+        for state, value in flight.stats().items()
+    ]
+)
+metrics.gauge(
+    'event_stream', 'Server-sent event broker counters', ('state',),
+    collect=lambda: [((state,), value) for state, value in events.stats().items()]
+)
+metrics.gauge(
+    'live_ingest', 'Live ingestion counters', ('state',),
+    collect=lambda: [((state,), value) for state, value in live.stats().items()]
+)
+metrics.gauge(
+    'integrity_scrub', 'Integrity scrubber counters', ('state',),
+    collect=lambda: [
+        ((state,), value) for state, value in scrubber.stats().items() if not isinstance(value, bool)
+    ]
+)
+metrics.gauge(
+    'cache_lookups', 'Analytics cache hits and misses', ('cache', 'result'),
+    collect=lambda: [
+        ((name, result), getattr(cache, result))
+        for name, cache in (
+            ('channels', channel_cache), ('analytics', analytics_cache), ('pyramid', pyramid_cache),
+            ('versions', version_cache)
+        )
+        for result in ('hits', 'misses')
+    ]
+)
+
    #component 1         
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -46,37 +270,36 @@ class User(db.Model):
         self.team = team
         self.totp_secret = pyotp.random_base32()
         
-                                          
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
-        )
-        public_key = private_key.public_key()
-        
-                                      
-        self.private_key = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        ).decode('utf-8')
-        
-        self.public_key = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ).decode('utf-8')
+        self.private_key, self.public_key = crypto.run('rsa_keygen', generate_rsa_keypair)
 
                      
 class TelemetryData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(200), nullable=False)
-    owner_team = db.Column(db.String(50), nullable=False)
+    owner_team = db.Column(db.String(50), nullable=False, index=True)
     classification = db.Column(db.String(20), nullable=False)                              
     content = db.Column(db.Text, nullable=True)                              
     nonce = db.Column(db.Text, nullable=True)                      
     encrypted_aes_key = db.Column(db.Text, nullable=True)                                                          
     digital_signature = db.Column(db.Text, nullable=True)                                              
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Ciphertext moved to the blob store: content is NULL and blob_ref is
+    # 'sha256:<hex>' of the raw ciphertext + tag
+    blob_ref = db.Column(db.String(80), nullable=True)
+    blob_size = db.Column(db.BigInteger, nullable=True)
+    # Live sessions ('open' / 'closed') keep their data in TelemetrySegment
+    # rows: content and digital_signature stay NULL and nonce tracks the
+    # newest segment, so caches keyed by (id, nonce) roll over on every seal
+    live_state = db.Column(db.String(10), nullable=True)
+    segment_count = db.Column(db.Integer, nullable=False, default=0)
+    # Head version. Once a file has a second version every version lives in
+    # TelemetryVersion: content/blob_ref stay NULL here, while nonce and
+    # digital_signature are the head's, so (id, nonce) caches roll over
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    # Never reuse ids (SQLite otherwise hands out max(id) + 1 again after a
+    # delete), so (count, max(id)) identifies a version of any set of files
+    __table_args__ = {'sqlite_autoincrement': True}
 
     def to_dict(self):
         return {
@@ -85,9 +308,76 @@ class TelemetryData(db.Model):
             'owner_team': self.owner_team,
             'classification': self.classification,
             'content': self.content,
+            'blob_size': self.blob_size,
+            'live_state': self.live_state,
+            'version': self.version,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def to_metadata(self):
+        """to_dict() without the ciphertext"""
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'owner_team': self.owner_team,
+            'classification': self.classification,
+            'live_state': self.live_state,
+            'version': self.version,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class TelemetryVersion(db.Model):
+    """
+    One stored version of a versioned file
+    
+    kind 'full' holds the encrypted content, 'delta' the encrypted
+    difference from the version before it (see version_delta). The
+    signature always covers the version's full plaintext.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('telemetry_data.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    content = db.Column(db.Text, nullable=True)
+    blob_ref = db.Column(db.String(80), nullable=True)
+    blob_size = db.Column(db.BigInteger, nullable=True)
+    nonce = db.Column(db.Text, nullable=False)
+    digital_signature = db.Column(db.Text, nullable=False)
+    # Plaintext bytes of the version, and of what was encrypted for it
+    size = db.Column(db.BigInteger, nullable=False)
+    stored_size = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('file_id', 'version', name='unique_file_version'),
+    )
+
+    def to_metadata(self):
+        return {
+            'version': self.version,
+            'kind': self.kind,
+            'size': self.size,
+            'stored_size': self.stored_size,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+class TelemetrySegment(db.Model):
+    """One sealed, append-only chunk of a live session's frames"""
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('telemetry_data.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    frame_count = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    nonce = db.Column(db.Text, nullable=False)
+    digital_signature = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('file_id', 'seq', name='unique_segment_seq'),
+    )
+
                     
 class SharedAccess(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -108,9 +398,14 @@ class SharedAccess(db.Model):
                 
 class AuditLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     user = db.Column(db.String(50), nullable=False)
     action = db.Column(db.String(200), nullable=False)
+
+    # Never reuse ids after retention or archival deletes the newest rows:
+    # batching resumes after AuditBatch.last_entry_id, and Last-Event-ID and
+    # proofs look entries up by id
+    __table_args__ = {'sqlite_autoincrement': True}
     
     def to_dict(self):
         return {
@@ -120,10 +415,140 @@ class AuditLog(db.Model):
             'action': self.action
         }
 
+
+def audit_row_dict(row):
+    """AuditLog.to_dict() shape for an (id, timestamp, user, action) row from either tier"""
+    entry_id, timestamp, user, action = row
+    return {
+        'id': entry_id,
+        'timestamp': timestamp.isoformat() if timestamp else None,
+        'user': user,
+        'action': action
+    }
+
+
+class AuditArchive(db.Model):
+    """A sealed, read-only archive segment holding one month of audit entries"""
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False, index=True)
+    path = db.Column(db.String(500), nullable=False, unique=True)
+    row_count = db.Column(db.Integer, nullable=False)
+    min_entry_id = db.Column(db.Integer, nullable=False)
+    max_entry_id = db.Column(db.Integer, nullable=False)
+    min_timestamp = db.Column(db.DateTime, nullable=False)
+    max_timestamp = db.Column(db.DateTime, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AuditBatch(db.Model):
+    """Merkle commitment to a contiguous id range of audit entries"""
+    id = db.Column(db.Integer, primary_key=True)
+    # seq is unique so two workers cannot both extend the chain from one head
+    seq = db.Column(db.Integer, nullable=False, unique=True)
+    first_entry_id = db.Column(db.Integer, nullable=False, index=True)
+    last_entry_id = db.Column(db.Integer, nullable=False, index=True)
+    entry_count = db.Column(db.Integer, nullable=False)
+    min_timestamp = db.Column(db.DateTime, nullable=True)
+    max_timestamp = db.Column(db.DateTime, nullable=True)
+    merkle_root = db.Column(db.String(64), nullable=False)
+    prev_hash = db.Column(db.String(64), nullable=False)
+    chain_hash = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'first_entry_id': self.first_entry_id,
+            'last_entry_id': self.last_entry_id,
+            'entry_count': self.entry_count,
+            'merkle_root': self.merkle_root,
+            'prev_hash': self.prev_hash,
+            'chain_hash': self.chain_hash,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class AuditCheckpoint(db.Model):
+    """System-key signature over the audit chain head and the tree of all batches"""
+    id = db.Column(db.Integer, primary_key=True)
+    batch_seq = db.Column(db.Integer, nullable=False, unique=True)
+    tree_root = db.Column(db.String(64), nullable=False)
+    head_hash = db.Column(db.String(64), nullable=False)
+    signature = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'batch_seq': self.batch_seq,
+            'tree_root': self.tree_root,
+            'head_hash': self.head_hash,
+            'signature': self.signature,
+            'message': checkpoint_message(self.batch_seq, self.tree_root, self.head_hash),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class SystemKey(db.Model):
+    """Server-owned RSA key pairs (e.g. 'audit' for checkpoint signatures)"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+    public_key = db.Column(db.Text, nullable=False)
+    private_key = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IntegrityResult(db.Model):
+    """Latest scrubber verdict for one file"""
+    file_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, index=True)
+    detail = db.Column(db.Text, nullable=True)
+    scrub_pass = db.Column(db.Integer, nullable=False)
+    checked_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class ScrubCheckpoint(db.Model):
+    """
+    Progress of the integrity scrubber (a single row)
+    
+    The lease lets one process at a time scrub when several workers share
+    the database.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    scrub_pass = db.Column(db.Integer, nullable=False, default=1)
+    last_file_id = db.Column(db.Integer, nullable=False, default=0)
+    files_checked = db.Column(db.Integer, nullable=False, default=0)
+    failures = db.Column(db.Integer, nullable=False, default=0)
+    pass_started_at = db.Column(db.DateTime, nullable=True)
+    last_completed_at = db.Column(db.DateTime, nullable=True)
+    lease_owner = db.Column(db.String(100), nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True)
+
                
+def install_query_metrics(engine):
+    """Count queries and time spent in the database, per request and overall"""
+    
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        DB_QUERIES_TOTAL.inc()
+        if has_request_context() and 'db_queries' in g:
+            g.db_queries += 1
+            g.db_time += elapsed
+
+
 with app.app_context():
-                                                          
-    db.drop_all()
+    configure_engine(db.engine)
+    install_query_metrics(db.engine)
+    
+    # Demo mode wipes the vault on every start; set RESET_DB_ON_START=0 to keep data
+    if app.config['RESET_DB_ON_START']:
+        db.drop_all()
     db.create_all()
     
                                                      
@@ -136,6 +561,8 @@ with app.app_context():
     ]
     
     for user_data in default_users:
+        if User.query.filter_by(username=user_data['username'], team=user_data['team']).first():
+            continue
         new_user = User(
             username=user_data['username'],
             password=generate_password_hash(user_data['password']),                     
@@ -143,7 +570,17 @@ with app.app_context():
         )
         db.session.add(new_user)
     
+    if not SystemKey.query.filter_by(name='audit').first():
+        private_pem, public_pem = crypto.run('rsa_keygen', generate_rsa_keypair)
+        db.session.add(SystemKey(name='audit', public_key=public_pem, private_key=private_pem))
+    
+    if not db.session.get(ScrubCheckpoint, 1):
+        db.session.add(ScrubCheckpoint(id=1))
+    
     db.session.commit()
+    
+    # FTS5 trigram index on SQLite, pg_trgm on PostgreSQL, LIKE otherwise
+    search_backend = install_search_index(db.engine)
 #component 1.2
 def generate_qr_code_base64(secret, username, issuer='F1 Telemetry'):
     """Generate a QR code for TOTP setup"""
@@ -174,190 +611,1434 @@ def generate_qr_code_base64(secret, username, issuer='F1 Telemetry'):
     
     return f"data:image/png;base64,{img_str}"
 
-def encrypt_aes_gcm(plaintext, rsa_public_key_pem):
+def log_audit_event(user, action, delta=None):
     """
-    Encrypt plaintext using AES-GCM and wrap the AES key with RSA public key
+    Log an audit event to the database and publish it to event subscribers
     
     Args:
-        plaintext (str): The content to encrypt
-        rsa_public_key_pem (str): RSA public key in PEM format
+        user (str): Acting user
+        action (str): Description of the action
+        delta (dict): Dashboard counter changes caused by the action, e.g. {'files': 1}
+    """
+    started = time.perf_counter()
+    try:
+        log_entry = AuditLog(user=user, action=action)
+        db.session.add(log_entry)
+        db.session.commit()
+        AUDIT_WRITE.observe(value=time.perf_counter() - started)
+        logger.debug("Audit log: %s - %s", user, action)
+        events.publish('audit', dict(log_entry.to_dict(), delta=delta or {}), event_id=log_entry.id)
+    except Exception as e:
+        logger.error("Failed to log audit event: %s", e)
+        db.session.rollback()
+        return
+    schedule_audit_chain()
+    schedule_audit_archival()
+
+
+# Per-process trigger for batching; the chain itself lives in the database,
+# so any worker can extend it and the unique seq settles races
+audit_chain_state = {'pending': 0, 'checked': time.monotonic(), 'chaining': False, 'archived': None}
+audit_chain_lock = threading.Lock()
+
+
+def schedule_audit_chain():
+    """
+    Count an audit write and start a background chain pass when one is due
+    
+    A pass is due once AUDIT_BATCH_SIZE entries are pending in this process
+    or AUDIT_BATCH_INTERVAL_SECONDS have passed. It runs on its own thread,
+    so batching and checkpoint signing never add to a request's latency,
+    and at most one pass runs per process at a time.
+    """
+    now = time.monotonic()
+    with audit_chain_lock:
+        audit_chain_state['pending'] += 1
+        due = (audit_chain_state['pending'] >= app.config['AUDIT_BATCH_SIZE']
+               or now - audit_chain_state['checked'] >= app.config['AUDIT_BATCH_INTERVAL_SECONDS'])
+        if not due or audit_chain_state['chaining']:
+            return
+        audit_chain_state['pending'] = 0
+        audit_chain_state['checked'] = now
+        audit_chain_state['chaining'] = True
+    threading.Thread(target=run_audit_chain, name='audit-chain', daemon=True).start()
+
+
+def run_audit_chain():
+    """One chain pass in its own app context"""
+    with app.app_context():
+        try:
+            maintain_audit_chain()
+        finally:
+            with audit_chain_lock:
+                audit_chain_state['chaining'] = False
+
+
+def maintain_audit_chain():
+    """
+    Commit settled audit entries to Merkle batches and sign a checkpoint when due
+    
+    Called from the background pass, and directly by range verification so
+    it sees every settled entry. Failures are logged and retried on the
+    next pass.
+    """
+    try:
+        commit_audit_batches()
+        latest = AuditCheckpoint.query.order_by(AuditCheckpoint.batch_seq.desc()).first()
+        sign_due = latest is None or (
+            datetime.utcnow() - latest.created_at
+        ).total_seconds() >= app.config['AUDIT_SIGN_INTERVAL_SECONDS']
+        if sign_due:
+            sign_audit_checkpoint()
+    except CryptoBusy:
+        logger.warning("Audit checkpoint deferred: crypto executor busy")
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Failed to extend audit chain: %s", e)
+
+
+def audit_entry_rows(first_id, last_id):
+    """(id, timestamp, user, action) of the entries in an id range, in id order, including archived ones"""
+    rows = [tuple(row) for row in db.session.query(
+        AuditLog.id, AuditLog.timestamp, AuditLog.user, AuditLog.action
+    ).filter(AuditLog.id >= first_id, AuditLog.id <= last_id).order_by(AuditLog.id)]
+    archives = overlapping_archives(first_id=first_id, last_id=last_id)
+    if archives:
+        for archive in archives:
+            rows.extend(open_segment(archive.path).read(first_id=first_id, last_id=last_id))
+        rows.sort()
+    return rows
+
+
+def commit_audit_batches():
+    """
+    Append every settled, unbatched audit entry to the chain
+    
+    Entries younger than AUDIT_BATCH_GRACE_SECONDS are left for the next
+    batch, so a transaction that took a lower id but commits late is never
+    skipped. Each batch stops at the first unsettled entry to keep its id
+    range contiguous.
     
     Returns:
-        dict: {
-            'ciphertext': Base64-encoded encrypted content,
-            'encrypted_key': Base64-encoded RSA-encrypted AES key,
-            'nonce': Base64-encoded GCM nonce
-        }
+        int: Number of batches created
     """
-                                                       
-    aes_key = os.urandom(32)
-    nonce = os.urandom(12)
-    
-                                     
-    cipher = Cipher(
-        algorithms.AES(aes_key),
-        modes.GCM(nonce),
-        backend=default_backend()
-    )
-    encryptor = cipher.encryptor()
-    ciphertext = encryptor.update(plaintext.encode('utf-8')) + encryptor.finalize()
+    batch_size = app.config['AUDIT_BATCH_SIZE']
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config['AUDIT_BATCH_GRACE_SECONDS'])
+    created = 0
+    while True:
+        head = AuditBatch.query.order_by(AuditBatch.seq.desc()).first()
+        rows = db.session.query(
+            AuditLog.id, AuditLog.timestamp, AuditLog.user, AuditLog.action
+        ).filter(AuditLog.id > (head.last_entry_id if head else 0)).order_by(AuditLog.id).limit(batch_size).all()
+        settled = []
+        for row in rows:
+            if row.timestamp is None or row.timestamp > cutoff:
+                break
+            settled.append(row)
+        if not settled:
+            return created
+        
+        root = merkle_root([entry_leaf(*row) for row in settled]).hex()
+        prev_hash = head.chain_hash if head else GENESIS_HASH
+        first_id, last_id = settled[0].id, settled[-1].id
+        timestamps = [row.timestamp for row in settled]
+        db.session.add(AuditBatch(
+            seq=head.seq + 1 if head else 1,
+            first_entry_id=first_id,
+            last_entry_id=last_id,
+            entry_count=len(settled),
+            min_timestamp=min(timestamps),
+            max_timestamp=max(timestamps),
+            merkle_root=root,
+            prev_hash=prev_hash,
+            chain_hash=chain_hash(prev_hash, root, first_id, last_id)
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker extended the chain from the same head
+            db.session.rollback()
+            return created
+        created += 1
+        if len(settled) < batch_size:
+            return created
+
+
+def batch_chain_hashes(upto_seq):
+    """Chain hashes of batches 1..upto_seq, as leaves of the tree of batches"""
+    return [
+        hash_leaf(value) for (value,) in db.session.query(AuditBatch.chain_hash)
+        .filter(AuditBatch.seq <= upto_seq).order_by(AuditBatch.seq)
+    ]
+
+
+def sign_audit_checkpoint():
+    """
+    Sign the current chain head with the system audit key
     
-                                
-    tag = encryptor.tag
+    The signed message covers the head's chain hash (and through it every
+    earlier batch) and the Merkle root over all batch chain hashes, which
+    is what lets an inclusion proof stay O(log n).
     
-                                
-    ciphertext_with_tag = ciphertext + tag
+    Returns:
+        AuditCheckpoint: The new checkpoint, the existing one if the head is
+        already signed, or None if there are no batches
+    """
+    head = AuditBatch.query.order_by(AuditBatch.seq.desc()).first()
+    if head is None:
+        return None
+    existing = AuditCheckpoint.query.filter_by(batch_seq=head.seq).first()
+    if existing:
+        return existing
     
-                         
-    public_key = serialization.load_pem_public_key(
-        rsa_public_key_pem.encode('utf-8'),
-        backend=default_backend()
+    tree_root = merkle_root(batch_chain_hashes(head.seq)).hex()
+    key = SystemKey.query.filter_by(name='audit').first()
+    signature = crypto.run(
+        'rsa_sign', sign_data, key.private_key,
+        checkpoint_message(head.seq, tree_root, head.chain_hash)
     )
+    checkpoint = AuditCheckpoint(batch_seq=head.seq, tree_root=tree_root, head_hash=head.chain_hash, signature=signature)
+    db.session.add(checkpoint)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return AuditCheckpoint.query.filter_by(batch_seq=head.seq).first()
+    logger.info("Signed audit checkpoint at batch %s", head.seq)
+    return checkpoint
+
+
+def schedule_audit_archival():
+    """Start a background archival pass if AUDIT_ARCHIVE_INTERVAL_SECONDS have passed"""
+    interval = app.config['AUDIT_ARCHIVE_INTERVAL_SECONDS']
+    if interval <= 0:
+        return
+    now = time.monotonic()
+    with audit_chain_lock:
+        last = audit_chain_state.get('archived')
+        if last is not None and now - last < interval:
+            return
+        audit_chain_state['archived'] = now
+    threading.Thread(target=run_audit_archival, name='audit-archiver', daemon=True).start()
+
+
+def run_audit_archival():
+    """One archival + retention pass in its own app context"""
+    with app.app_context():
+        try:
+            sealed = archive_audit_months()
+            expired = apply_audit_retention()
+            if sealed or expired:
+                logger.info("Audit archival: sealed %d segment(s), expired %d", len(sealed), expired)
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Audit archival failed: %s", e)
+
+
+def archive_audit_months(now=None):
+    """
+    Move every complete month older than AUDIT_HOT_DAYS out of the hot table
     
-                                                     
-    encrypted_aes_key = public_key.encrypt(
-        aes_key,
-        padding.PKCS1v15()
-    )
+    Only entries already committed to an audit batch are archived, so the
+    Merkle chain is never cut by a seal. A month larger than
+    AUDIT_SEGMENT_MAX_ROWS is sealed as several segments.
     
-                                  
-    return {
-        'ciphertext': base64.b64encode(ciphertext_with_tag).decode('utf-8'),
-        'encrypted_key': base64.b64encode(encrypted_aes_key).decode('utf-8'),
-        'nonce': base64.b64encode(nonce).decode('utf-8')
-    }
+    Returns:
+        list: AuditArchive rows created
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=app.config['AUDIT_HOT_DAYS'])
+    head = AuditBatch.query.order_by(AuditBatch.seq.desc()).first()
+    if head is None:
+        return []
+    
+    sealed = []
+    while True:
+        oldest = db.session.query(db.func.min(AuditLog.timestamp)).filter(
+            AuditLog.id <= head.last_entry_id
+        ).scalar()
+        if oldest is None:
+            return sealed
+        month_start, month_end = month_bounds(oldest)
+        if month_end > cutoff:
+            return sealed
+        archive = seal_audit_month(month_start, month_end, head.last_entry_id)
+        if archive is None:
+            return sealed
+        sealed.append(archive)
 
 
-def sign_data(private_key_pem, data):
+def seal_audit_month(month_start, month_end, max_entry_id):
     """
-    Sign data using RSA-SHA256 digital signature
+    Write up to AUDIT_SEGMENT_MAX_ROWS of a month's hot entries to a segment and delete them
     
-    Args:
-        private_key_pem (str): RSA private key in PEM format
-        data (str): The plaintext data to sign
+    Capping the rows per segment bounds the memory a seal needs (and that
+    a reader needs to decode a segment), however large the month is. The
+    registry insert and the hot-table delete commit together; the file is
+    already durable by then, so a crash leaves at worst an unreferenced
+    file that the next pass overwrites.
     
     Returns:
-        str: Base64-encoded signature
+        AuditArchive: The new segment, or None if another worker sealed it first
     """
-                      
-    private_key = serialization.load_pem_private_key(
-        private_key_pem.encode('utf-8'),
-        password=None,
-        backend=default_backend()
+    in_month = (
+        AuditLog.timestamp >= month_start,
+        AuditLog.timestamp < month_end,
+        AuditLog.id <= max_entry_id
     )
+    ids, timestamps, users, actions = [], [], [], []
+    for row in db.session.execute(
+        db.select(AuditLog.id, AuditLog.timestamp, AuditLog.user, AuditLog.action)
+        .filter(*in_month).order_by(AuditLog.id)
+        .limit(app.config['AUDIT_SEGMENT_MAX_ROWS'])
+        .execution_options(yield_per=10000)
+    ):
+        ids.append(row.id)
+        timestamps.append(row.timestamp)
+        users.append(row.user)
+        actions.append(row.action)
+    if not ids:
+        return None
     
-                                                     
-    signature = private_key.sign(
-        data.encode('utf-8'),
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.MAX_LENGTH
-        ),
-        hashes.SHA256()
+    month = month_start.strftime('%Y-%m')
+    os.makedirs(app.config['AUDIT_ARCHIVE_DIR'], exist_ok=True)
+    path = os.path.join(app.config['AUDIT_ARCHIVE_DIR'], f'audit-{month}-{ids[0]}-{ids[-1]}.pva')
+    info = write_segment(path, ids, timestamps, users, actions)
+    
+    archive = AuditArchive(
+        month=month,
+        path=path,
+        row_count=info['rows'],
+        min_entry_id=info['min_id'],
+        max_entry_id=info['max_id'],
+        min_timestamp=info['min_timestamp'],
+        max_timestamp=info['max_timestamp'],
+        size_bytes=info['size_bytes'],
+        sha256=info['sha256']
     )
+    db.session.add(archive)
+    AuditLog.query.filter(*in_month, AuditLog.id >= ids[0], AuditLog.id <= ids[-1]).delete(synchronize_session=False)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    logger.info("Sealed audit archive %s (%d entries, %d bytes)", month, info['rows'], info['size_bytes'])
+    return archive
+
+
+def audit_retention_cutoff(now=None):
+    """Entries older than this may be discarded, or None when retention is unlimited"""
+    days = app.config['AUDIT_RETENTION_DAYS']
+    if days <= 0:
+        return None
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+
+def apply_audit_retention(now=None):
+    """
+    Drop archive segments and hot entries older than AUDIT_RETENTION_DAYS
     
-                                     
-    return base64.b64encode(signature).decode('utf-8')
+    Returns:
+        int: Segments plus hot entries removed
+    """
+    cutoff = audit_retention_cutoff(now)
+    if cutoff is None:
+        return 0
+    removed = 0
+    for archive in AuditArchive.query.filter(AuditArchive.max_timestamp < cutoff).all():
+        db.session.delete(archive)
+        db.session.commit()
+        try:
+            os.chmod(archive.path, 0o644)
+            os.remove(archive.path)
+        except FileNotFoundError:
+            pass
+        removed += 1
+    removed += AuditLog.query.filter(AuditLog.timestamp < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
 
+def overlapping_archives(start=None, end=None, first_id=None, last_id=None):
+    """Archive segments that may hold entries in a timestamp and/or id range, newest first"""
+    query = AuditArchive.query
+    if start is not None:
+        query = query.filter(AuditArchive.max_timestamp >= start)
+    if end is not None:
+        query = query.filter(AuditArchive.min_timestamp <= end)
+    if first_id is not None:
+        query = query.filter(AuditArchive.max_entry_id >= first_id)
+    if last_id is not None:
+        query = query.filter(AuditArchive.min_entry_id <= last_id)
+    return query.order_by(AuditArchive.max_timestamp.desc()).all()
 
-def verify_signature(public_key_pem, data, signature_b64):
+
+def find_audit_entry(entry_id):
+    """An audit entry as a dict, from the hot table or its archive segment"""
+    entry = db.session.get(AuditLog, entry_id)
+    if entry:
+        return entry.to_dict()
+    for archive in overlapping_archives(first_id=entry_id, last_id=entry_id):
+        rows = open_segment(archive.path).read(first_id=entry_id, last_id=entry_id)
+        if rows:
+            return audit_row_dict(rows[0])
+    return None
+
+
+def query_audit_logs(start=None, end=None, limit=100):
     """
-    Verify RSA-SHA256 digital signature
+    Newest audit entries in a time range, across the hot table and archives
     
-    Args:
-        public_key_pem (str): RSA public key in PEM format
-        data (str): The plaintext data that was signed
-        signature_b64 (str): Base64-encoded signature
+    Archives are only opened when the hot table returns fewer than
+    ``limit`` rows, and the scan stops at the first segment that is entirely
+    older than the rows already collected.
     
     Returns:
-        bool: True if signature is valid, False otherwise
+        list: Entry dicts, newest first
     """
-    try:
-                         
-        public_key = serialization.load_pem_public_key(
-            public_key_pem.encode('utf-8'),
-            backend=default_backend()
-        )
-        
-                          
-        signature = base64.b64decode(signature_b64)
-        
-                                                            
-        public_key.verify(
-            signature,
-            data.encode('utf-8'),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-        
-        return True
-    except Exception as e:
-        print(f"Signature verification failed: {str(e)}")
-        return False
+    query = AuditLog.query
+    if start is not None:
+        query = query.filter(AuditLog.timestamp >= start)
+    if end is not None:
+        query = query.filter(AuditLog.timestamp <= end)
+    results = [log.to_dict() for log in query.order_by(AuditLog.timestamp.desc()).limit(limit)]
+    if len(results) >= limit:
+        return results
+    
+    rows = []
+    for archive in overlapping_archives(start, end):
+        if len(rows) >= limit - len(results) and archive.max_timestamp < rows[limit - len(results) - 1][1]:
+            break
+        rows.extend(open_segment(archive.path).read(start, end))
+        rows.sort(key=lambda row: (row[1], row[0]), reverse=True)
+    return results + [audit_row_dict(row) for row in rows[:limit - len(results)]]
 
-def log_audit_event(user, action):
-    """Log an audit event to the database"""
-    try:
-        log_entry = AuditLog(user=user, action=action)
-        db.session.add(log_entry)
-        db.session.commit()
-        print(f"✓ Audit log: {user} - {action}")
-    except Exception as e:
-        print(f"Failed to log audit event: {str(e)}")
-        db.session.rollback()
+class TelemetryAccessError(Exception):
+    """Raised when a telemetry file cannot be accessed or decrypted"""
 
-def generate_token(user_id, username):
-    """Generate JWT token"""
-    payload = {
-        'user_id': user_id,
-        'username': username,
-        'exp': datetime.utcnow() + timedelta(hours=24)
-    }
-    return jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
 
-        
 
-@app.route('/api/register', methods=['POST'])
-def register():
-    """Register a new user and return QR code"""
-    data = request.get_json()
-    
-    team = data.get('team')
-    password = data.get('password')
+def resolve_file_access(file_id, username):
+    """
+    Load a telemetry file and check that the user may decrypt it
     
-    if not all([team, password]):
-        return jsonify({'error': 'Missing required fields'}), 400
+    Args:
+        file_id (int): TelemetryData id
+        username (str): Requesting user's username
     
-                               
-    username = team
+    Returns:
+        tuple: (telemetry_file, user, shared_access) - shared_access is None for owners
     
-                                  
-    existing_user = User.query.filter_by(username=username, team=team).first()
-    if existing_user:
-        return jsonify({'error': 'Team already registered'}), 409
+    Raises:
+        TelemetryAccessError: If the file/user is missing or access is denied
+    """
+    # The ciphertext is deferred so the ACL check stays cheap; it is loaded
+    # only by the request that actually performs the decrypt
+    telemetry_file = db.session.get(
+        TelemetryData, file_id,
+        options=[db.defer(TelemetryData.content)]
+    )
+    if not telemetry_file:
+        raise TelemetryAccessError('File not found', 404)
     
-                                      
-    new_user = User(username=username, password=generate_password_hash(password), team=team)
-    db.session.add(new_user)
-    db.session.commit()
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise TelemetryAccessError('User not found', 404)
     
-                      
-    qr_code = generate_qr_code_base64(new_user.totp_secret, username, f'F1 Telemetry - {team.upper()}')
+    shared_access = None
+    if telemetry_file.owner_team != user.team:
+        shared_access = SharedAccess.query.filter_by(
+            file_id=file_id,
+            shared_with_user_id=user.id
+        ).first()
+        
+        if not shared_access:
+            raise TelemetryAccessError('Unauthorized: You do not have access to this file', 403)
     
-    return jsonify({
-        'success': True,
-        'message': 'Team registered successfully',
-        'qr_code': qr_code,
-        'secret': new_user.totp_secret                                            
-    }), 201
+    return telemetry_file, user, shared_access
 
-@app.route('/api/login', methods=['POST'])
-def login():
-    """Verify username/password and indicate if MFA is required"""
-    data = request.get_json()
+
+def requested_version(telemetry_file, version):
+    """
+    Validate an optional version number against a file's history
+    
+    Returns:
+        int: The version, or the head if none was requested
+    
+    Raises:
+        TelemetryAccessError: If the version is not a number or does not exist
+    """
+    if version is None or version == '':
+        return telemetry_file.version
+    try:
+        number = int(version)
+    except (TypeError, ValueError):
+        raise TelemetryAccessError('version must be an integer', 400)
+    if not 1 <= number <= telemetry_file.version:
+        raise TelemetryAccessError(f'Version {number} not found', 404)
+    return number
+
+
+def decrypt_file_content(telemetry_file, user, shared_access, version=None):
+    """
+    Decrypt a file for an already-authorized user, coalescing concurrent calls
+    
+    Callers must run resolve_file_access first; concurrent requests for the
+    same (file, version, key holder) then share a single fetch/unwrap/decrypt.
+    
+    Returns:
+        str: Decrypted plaintext of ``version`` (default: the head)
+    """
+    number = version or telemetry_file.version
+    plaintext, _ = decrypt_flight.do(
+        (telemetry_file.id, number, user.id),
+        lambda: _decrypt_file_content(telemetry_file, user, shared_access, number)
+    )
+    return plaintext
+
+
+def _decrypt_file_content(telemetry_file, user, shared_access, version=None):
+    """
+    Unwrap the file's AES key with the user's RSA key and decrypt the content
+    
+    Args:
+        telemetry_file (TelemetryData): File to decrypt
+        user (User): Authorized user
+        shared_access (SharedAccess): Share entry, or None if user owns the file
+        version (int): Version to decrypt (default: the head)
+    
+    Returns:
+        str: Decrypted plaintext
+    
+    Raises:
+        TelemetryAccessError: If the key or content cannot be decrypted
+    """
+    aes_key = unwrap_file_key(telemetry_file, user, shared_access)
+    return decrypt_with_file_key(telemetry_file, aes_key, version)
+
+
+def decrypt_with_file_key(telemetry_file, aes_key, version=None):
+    """
+    Decrypt a file (or one version of it) with its already unwrapped AES key
+    
+    Raises:
+        TelemetryAccessError: If the content is missing or cannot be decrypted
+    """
+    try:
+        if telemetry_file.version > 1:
+            return version_plaintext(telemetry_file, aes_key, version or telemetry_file.version)
+        if telemetry_file.live_state:
+            # A live session reads as one JSON array of all its frames so far
+            segments = live_segments(telemetry_file.id)
+            return join_frame_arrays(decrypt_segments(aes_key, segments))
+        if telemetry_file.blob_ref:
+            # The worker maps the blob itself; only the reference is sent over
+            return crypto.run('gcm_decrypt', decrypt_blob, blob_store, telemetry_file.blob_ref, aes_key, telemetry_file.nonce)
+        return crypto.run('gcm_decrypt', decrypt_aes_gcm, aes_key, telemetry_file.nonce, telemetry_file.content)
+    except BlobNotFound as e:
+        logger.error("Blob %s missing for file %s", e, telemetry_file.id)
+        raise TelemetryAccessError('Encrypted content is missing from the blob store')
+    except ContentDecryptError as e:
+        logger.warning("AES-GCM decryption failed: %s", e)
+        raise TelemetryAccessError('Failed to decrypt content: Invalid key or corrupted data')
+    except DeltaError as e:
+        logger.error("Version history of file %s is corrupt: %s", telemetry_file.id, e)
+        raise TelemetryAccessError('Failed to rebuild version: corrupted version history')
+
+
+def version_plaintext(telemetry_file, aes_key, number):
+    """
+    Rebuild one version of a versioned file
+    
+    Replays deltas forward from the nearest full snapshot at or below
+    ``number``, or from a nearer version still in version_cache, so a read
+    decrypts at most VERSION_SNAPSHOT_INTERVAL - 1 deltas and never the
+    whole history. The replay runs in one executor call.
+    
+    Args:
+        telemetry_file (TelemetryData): File with version > 1
+        aes_key (bytes): The file's AES key
+        number (int): Version to rebuild
+    
+    Returns:
+        str: Plaintext of the version
+    
+    Raises:
+        TelemetryAccessError: If the version or its snapshot is missing
+    """
+    cache_key = (telemetry_file.id, number)
+    plaintext = version_cache.get(cache_key)
+    if plaintext is not None:
+        return plaintext
+    
+    snapshot = db.session.scalar(
+        db.select(db.func.max(TelemetryVersion.version)).where(
+            TelemetryVersion.file_id == telemetry_file.id,
+            TelemetryVersion.kind == 'full',
+            TelemetryVersion.version <= number
+        )
+    )
+    if snapshot is None:
+        raise TelemetryAccessError(f'Version {number} has no full snapshot to rebuild from')
+    base, start = None, snapshot
+    for cached in range(number - 1, snapshot - 1, -1):
+        base = version_cache.get((telemetry_file.id, cached))
+        if base is not None:
+            start = cached + 1
+            break
+    
+    parts = [tuple(row) for row in db.session.execute(
+        db.select(TelemetryVersion.kind, TelemetryVersion.nonce, TelemetryVersion.content, TelemetryVersion.blob_ref)
+        .where(
+            TelemetryVersion.file_id == telemetry_file.id,
+            TelemetryVersion.version.between(start, number)
+        )
+        .order_by(TelemetryVersion.version)
+    )]
+    if len(parts) != number - start + 1:
+        raise TelemetryAccessError(f'Version history of {telemetry_file.filename} is incomplete')
+    plaintext = crypto.run('gcm_decrypt', reconstruct_version, blob_store, aes_key, base, parts)
+    version_cache.set(cache_key, plaintext)
+    return plaintext
+
+
+class VersionConflict(Exception):
+    """Another upload added the same version first"""
+
+
+def add_file_version(telemetry_file, user, content, classification):
+    """
+    Store ``content`` as the next version of an existing file
+    
+    The owner's key unwraps the file key, the head is rebuilt (usually from
+    version_cache) and only the difference is encrypted and stored, unless
+    a periodic snapshot is due. The first update moves version 1 out of the
+    file row into TelemetryVersion. The caller commits.
+    
+    Args:
+        telemetry_file (TelemetryData): Current head of the file
+        user (User): Uploading owner-team user
+        content (str): Full plaintext of the new version
+        classification (str): Classification of the new version
+    
+    Returns:
+        TelemetryVersion: The new version row
+    
+    Raises:
+        TelemetryAccessError: If the head cannot be decrypted
+        VersionConflict: If the head moved while this upload was prepared
+    """
+    head = telemetry_file.version
+    number = head + 1
+    aes_key = unwrap_file_key(telemetry_file, user, None)
+    previous = decrypt_with_file_key(telemetry_file, aes_key)
+    
+    if head == 1:
+        size = len(previous.encode('utf-8'))
+        db.session.add(TelemetryVersion(
+            file_id=telemetry_file.id,
+            version=1,
+            kind='full',
+            content=telemetry_file.content,
+            blob_ref=telemetry_file.blob_ref,
+            blob_size=telemetry_file.blob_size,
+            nonce=telemetry_file.nonce,
+            digital_signature=telemetry_file.digital_signature,
+            size=size,
+            stored_size=size,
+            created_at=telemetry_file.created_at
+        ))
+    
+    snapshot = (number - 1) % max(1, app.config['VERSION_SNAPSHOT_INTERVAL']) == 0
+    signature = crypto.run('rsa_sign', sign_data, user.private_key, content)
+    sealed = crypto.run('gcm_encrypt', seal_version, aes_key, previous, content, snapshot)
+    new_version = TelemetryVersion(
+        file_id=telemetry_file.id,
+        version=number,
+        kind=sealed['kind'],
+        nonce=sealed['nonce'],
+        digital_signature=signature,
+        size=len(content.encode('utf-8')),
+        stored_size=sealed['stored_size'],
+        **ciphertext_columns(sealed['ciphertext'])
+    )
+    db.session.add(new_version)
+    
+    # Compare-and-set on the head, so concurrent uploads cannot both win
+    moved = db.session.execute(
+        db.update(TelemetryData)
+        .where(TelemetryData.id == telemetry_file.id, TelemetryData.version == head)
+        .values(
+            version=number, nonce=sealed['nonce'], digital_signature=signature,
+            classification=classification, content=None, blob_ref=None, blob_size=None
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if moved != 1:
+        raise VersionConflict(f'{telemetry_file.filename} is no longer at version {head}')
+    return new_version
+
+
+def ciphertext_columns(ciphertext):
+    """
+    Column values for newly encrypted content
+    
+    Args:
+        ciphertext (bytes): Raw ciphertext + GCM tag
+    
+    Returns:
+        dict: content for BLOB_STORE=inline, otherwise blob_ref/blob_size
+    """
+    if app.config['BLOB_STORE'] == 'inline':
+        return {'content': base64.b64encode(ciphertext).decode('ascii')}
+    blob_ref, blob_size = blob_store.put(ciphertext)
+    return {'content': None, 'blob_ref': blob_ref, 'blob_size': blob_size}
+
+
+def key_fingerprint(public_key_pem):
+    return hashlib.sha256(public_key_pem.encode('utf-8')).hexdigest()
+
+
+class VaultImportError(Exception):
+    """Raised when an export stream cannot be imported"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def export_vault(owner):
+    """
+    Stream a team's vault as a tar of already-encrypted content
+    
+    Files are read in keyset batches of plain rows (no ORM identity map),
+    and blob content is passed through from the store in chunks, so memory
+    stays flat however large the vault is. Nothing is decrypted. The
+    manifest written last is signed with the owner's key.
+    
+    Args:
+        owner (User): Team user the vault is exported for
+    
+    Yields:
+        bytes: Tar stream
+    """
+    writer = ExportWriter()
+    yield from writer.member('vault.json', json.dumps({
+        'format': vault_export.FORMAT,
+        'version': vault_export.VERSION,
+        'team': owner.team,
+        'owner': owner.username,
+        'public_key': owner.public_key,
+        'exported_at': datetime.utcnow().isoformat()
+    }).encode('utf-8'))
+    
+    batch_size = app.config['VAULT_EXPORT_BATCH_SIZE']
+    files = shares = blob_bytes = batch = last_id = 0
+    while True:
+        # Live sessions keep their segments in the database and are not exported
+        rows = db.session.execute(
+            db.select(
+                TelemetryData.id, TelemetryData.filename, TelemetryData.classification,
+                TelemetryData.created_at, TelemetryData.nonce, TelemetryData.encrypted_aes_key,
+                TelemetryData.digital_signature, TelemetryData.content, TelemetryData.blob_ref,
+                TelemetryData.version
+            )
+            .where(TelemetryData.owner_team == owner.team, TelemetryData.live_state.is_(None), TelemetryData.id > last_id)
+            .order_by(TelemetryData.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        
+        file_shares = {}
+        for share in db.session.execute(
+            db.select(SharedAccess.file_id, SharedAccess.encrypted_key, SharedAccess.created_at,
+                      User.username, User.team, User.public_key)
+            .join(User, User.id == SharedAccess.shared_with_user_id)
+            .where(SharedAccess.file_id.in_([row.id for row in rows]))
+        ):
+            file_shares.setdefault(share.file_id, []).append({
+                'username': share.username,
+                'team': share.team,
+                'key_fingerprint': key_fingerprint(share.public_key),
+                'encrypted_key': share.encrypted_key,
+                'created_at': share.created_at.isoformat() if share.created_at else None
+            })
+        
+        file_versions = {}
+        versioned_ids = [row.id for row in rows if row.version > 1]
+        if versioned_ids:
+            for ver in db.session.execute(
+                db.select(
+                    TelemetryVersion.file_id, TelemetryVersion.version, TelemetryVersion.kind,
+                    TelemetryVersion.nonce, TelemetryVersion.digital_signature, TelemetryVersion.size,
+                    TelemetryVersion.stored_size, TelemetryVersion.created_at, TelemetryVersion.content,
+                    TelemetryVersion.blob_ref
+                )
+                .where(TelemetryVersion.file_id.in_(versioned_ids))
+                .order_by(TelemetryVersion.file_id, TelemetryVersion.version)
+            ):
+                file_versions.setdefault(ver.file_id, []).append(ver)
+        
+        def payload_digest(stored):
+            if stored.blob_ref:
+                return stored.blob_ref[len('sha256:'):]
+            return hashlib.sha256(base64.b64decode(stored.content or '')).hexdigest()
+        
+        records = []
+        for row in rows:
+            digest = None if row.version > 1 else payload_digest(row)
+            records.append({
+                'id': row.id,
+                'filename': row.filename,
+                'classification': row.classification,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'nonce': row.nonce,
+                'encrypted_aes_key': row.encrypted_aes_key,
+                'digital_signature': row.digital_signature,
+                'sha256': digest,
+                'shares': file_shares.get(row.id, [])
+            })
+            if row.version > 1:
+                records[-1]['version'] = row.version
+                records[-1]['versions'] = [
+                    {
+                        'version': ver.version,
+                        'kind': ver.kind,
+                        'nonce': ver.nonce,
+                        'digital_signature': ver.digital_signature,
+                        'size': ver.size,
+                        'stored_size': ver.stored_size,
+                        'created_at': ver.created_at.isoformat() if ver.created_at else None,
+                        'sha256': payload_digest(ver)
+                    }
+                    for ver in file_versions.get(row.id, [])
+                ]
+            shares += len(file_shares.get(row.id, []))
+        
+        batch += 1
+        yield from writer.member(f'files/{batch:06d}.ndjson', ndjson(records))
+        for row in rows:
+            # A versioned file exports every stored payload, deltas included
+            if row.version > 1:
+                payloads = [(f'blobs/{row.id}.{ver.version}', ver) for ver in file_versions.get(row.id, [])]
+            else:
+                payloads = [(f'blobs/{row.id}', row)]
+            for name, stored in payloads:
+                if stored.blob_ref:
+                    with blob_store.open(stored.blob_ref) as view:
+                        blob_bytes += len(view)
+                        yield from writer.stream_member(name, len(view), view_chunks(view))
+                else:
+                    data = base64.b64decode(stored.content or '')
+                    blob_bytes += len(data)
+                    yield from writer.member(name, data)
+        files += len(rows)
+    
+    manifest = {
+        'format': vault_export.FORMAT,
+        'version': vault_export.VERSION,
+        'team': owner.team,
+        'files': files,
+        'shares': shares,
+        'blob_bytes': blob_bytes,
+        'members': writer.digest.members,
+        'digest': writer.digest.hexdigest()
+    }
+    manifest['signature'] = crypto.run('rsa_sign', sign_data, owner.private_key, manifest_message(manifest))
+    yield from writer.member('manifest.json', json.dumps(manifest).encode('utf-8'))
+    yield from writer.end()
+    
+    logger.info("Exported vault of %s: %d files, %d bytes", owner.team, files, writer.bytes_written)
+    log_audit_event(owner.username, f'Exported vault ({files} files)')
+
+
+def import_vault(stream, user):
+    """
+    Load an export stream into the user's team
+    
+    Reads the tar strictly forward, one batch of records and one file's
+    ciphertext at a time, and inserts each batch with executemany. All
+    rows go into a single transaction that is committed only after the
+    manifest digest and the owner signature check out, so a truncated or
+    tampered stream leaves the vault untouched. Files already present
+    (same owner and signature) are skipped, which makes re-running an
+    interrupted import safe.
+    
+    Args:
+        stream: Readable binary file object
+        user (User): Importing team user
+    
+    Returns:
+        dict: files, skipped_files, shares, skipped_shares
+    
+    Raises:
+        VaultImportError: The stream is malformed, for another team or key,
+            or fails verification
+    """
+    stats = {'files': 0, 'skipped_files': 0, 'shares': 0, 'skipped_shares': 0}
+    recipients = {}
+    max_bytes = app.config['VAULT_IMPORT_MAX_FILE_BYTES']
+    
+    def recipient_id(share):
+        key = (share['username'], share['team'])
+        if key not in recipients:
+            recipient = User.query.filter_by(username=share['username'], team=share['team']).first()
+            recipients[key] = recipient and (recipient.id, key_fingerprint(recipient.public_key))
+        found = recipients[key]
+        # A share is only usable if it was wrapped for the recipient's current key
+        return found[0] if found and found[1] == share['key_fingerprint'] else None
+    
+    def insert_batch(records):
+        if not records:
+            return
+        missing = [
+            r['id'] for r in records.values()
+            if 'columns' not in r and not (r.get('versions') and all('columns' in v for v in r['versions']))
+        ]
+        if missing:
+            raise VaultImportError(f'Export is missing content for files {missing[:10]}')
+        existing = set(db.session.scalars(
+            db.select(TelemetryData.digital_signature).where(
+                TelemetryData.owner_team == user.team,
+                TelemetryData.digital_signature.in_([r['digital_signature'] for r in records.values()])
+            )
+        ))
+        new = [r for r in records.values() if r['digital_signature'] not in existing]
+        stats['skipped_files'] += len(records) - len(new)
+        if not new:
+            return
+        ids = db.session.scalars(
+            db.insert(TelemetryData).returning(TelemetryData.id, sort_by_parameter_order=True),
+            [
+                dict(
+                    r.get('columns', {}),
+                    filename=r['filename'],
+                    owner_team=user.team,
+                    classification=r['classification'],
+                    created_at=datetime.fromisoformat(r['created_at']) if r['created_at'] else datetime.utcnow(),
+                    nonce=r['nonce'],
+                    encrypted_aes_key=r['encrypted_aes_key'],
+                    digital_signature=r['digital_signature'],
+                    segment_count=0,
+                    version=r.get('version', 1)
+                )
+                for r in new
+            ]
+        ).all()
+        version_rows = [
+            dict(
+                v['columns'],
+                file_id=file_id,
+                version=v['version'],
+                kind=v['kind'],
+                nonce=v['nonce'],
+                digital_signature=v['digital_signature'],
+                size=v['size'],
+                stored_size=v['stored_size'],
+                created_at=datetime.fromisoformat(v['created_at']) if v['created_at'] else datetime.utcnow()
+            )
+            for file_id, r in zip(ids, new) for v in r.get('versions', [])
+        ]
+        if version_rows:
+            db.session.execute(db.insert(TelemetryVersion), version_rows)
+        share_rows = []
+        for file_id, r in zip(ids, new):
+            for share in r['shares']:
+                shared_with = recipient_id(share)
+                if shared_with is None:
+                    stats['skipped_shares'] += 1
+                    continue
+                share_rows.append({
+                    'file_id': file_id,
+                    'shared_with_user_id': shared_with,
+                    'encrypted_key': share['encrypted_key'],
+                    'created_at': datetime.fromisoformat(share['created_at']) if share['created_at'] else datetime.utcnow()
+                })
+        if share_rows:
+            db.session.execute(db.insert(SharedAccess), share_rows)
+        stats['files'] += len(new)
+        stats['shares'] += len(share_rows)
+    
+    try:
+        members = read_export(stream)
+        name, reader, digest = next(members, (None, None, None))
+        if name != 'vault.json':
+            raise VaultImportError('Not a vault export: vault.json must come first')
+        header = json.loads(reader(1024 * 1024))
+        if header.get('format') != vault_export.FORMAT or header.get('version') not in vault_export.READABLE_VERSIONS:
+            raise VaultImportError('Unsupported export format')
+        if header.get('team') != user.team:
+            raise VaultImportError(f"Export belongs to team {header.get('team')}", 403)
+        if header.get('public_key') != user.public_key:
+            raise VaultImportError('Export was made under a different key pair for this team', 409)
+        
+        records, manifest = {}, None
+        for name, reader, digest in members:
+            if name.startswith('files/'):
+                insert_batch(records)
+                records = {r['id']: r for r in map(json.loads, reader(max_bytes).splitlines()) if r}
+            elif name.startswith('blobs/'):
+                file_id, _, version = name[len('blobs/'):].partition('.')
+                record = records.get(int(file_id))
+                if record is not None and version:
+                    record = next((v for v in record.get('versions', []) if v['version'] == int(version)), None)
+                if record is None:
+                    raise VaultImportError(f'{name} has no file record')
+                data = reader(max_bytes)
+                if hashlib.sha256(data).hexdigest() != record['sha256']:
+                    raise VaultImportError(f'{name} does not match its recorded digest')
+                record['columns'] = ciphertext_columns(data)
+            elif name == 'manifest.json':
+                insert_batch(records)
+                manifest = json.loads(reader(1024 * 1024))
+                break
+            else:
+                raise VaultImportError(f'Unexpected member {name}')
+        
+        if manifest is None:
+            raise VaultImportError('Export is truncated: no manifest')
+        if manifest.get('digest') != digest.hexdigest() or manifest.get('members') != digest.members:
+            raise VaultImportError('Export content does not match its manifest')
+        if manifest.get('files') != stats['files'] + stats['skipped_files']:
+            raise VaultImportError('Export file count does not match its manifest')
+        if not crypto.run('rsa_verify', verify_signature, user.public_key,
+                          manifest_message(manifest), manifest.get('signature', '')):
+            raise VaultImportError('Manifest signature is invalid', 422)
+    except (ExportFormatError, ValueError, KeyError, TypeError) as e:
+        db.session.rollback()
+        raise VaultImportError(f'Malformed export: {e}')
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    db.session.commit()
+    return stats
+
+
+def unwrap_file_key(telemetry_file, user, shared_access):
+    """
+    Unwrap the file's AES key with the user's RSA key
+    
+    Raises:
+        TelemetryAccessError: If there is no wrapped key or it cannot be unwrapped
+    """
+    if shared_access is None:
+        encrypted_aes_key_b64 = telemetry_file.encrypted_aes_key
+    else:
+        encrypted_aes_key_b64 = shared_access.encrypted_key
+    
+    if not encrypted_aes_key_b64:
+        raise TelemetryAccessError('Encrypted key not found')
+    
+    try:
+        return crypto.run('rsa_unwrap', unwrap_key, user.private_key, encrypted_aes_key_b64)
+    except KeyUnwrapError as e:
+        logger.warning("RSA decryption failed: %s", e)
+        raise TelemetryAccessError('Failed to decrypt AES key: Invalid RSA key')
+
+
+def live_file_key(telemetry_file, user, shared_access):
+    """
+    unwrap_file_key() for readers of a live session, cached while the session is open
+    
+    The cache entry includes the wrapped key, so a re-shared key is never
+    served from a stale entry; access itself is checked by the caller on
+    every request.
+    """
+    if telemetry_file.live_state != 'open':
+        return unwrap_file_key(telemetry_file, user, shared_access)
+    wrapped = telemetry_file.encrypted_aes_key if shared_access is None else shared_access.encrypted_key
+    keys = live_key_cache.get(telemetry_file.id)
+    if keys is None:
+        keys = {}
+        live_key_cache.set(telemetry_file.id, keys)
+    aes_key = keys.get((user.id, wrapped))
+    if aes_key is None:
+        aes_key = keys[(user.id, wrapped)] = unwrap_file_key(telemetry_file, user, shared_access)
+    return aes_key
+
+
+def live_segments(file_id, after_seq=-1, limit=None):
+    """Sealed segments of a live session with seq > after_seq, oldest first"""
+    query = TelemetrySegment.query.filter(
+        TelemetrySegment.file_id == file_id,
+        TelemetrySegment.seq > after_seq
+    ).order_by(TelemetrySegment.seq)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def decrypt_segments(aes_key, segments):
+    """Decrypt a run of segments in one executor call"""
+    if not segments:
+        return []
+    return crypto.run('gcm_decrypt', decrypt_many, aes_key, [(seg.nonce, seg.content) for seg in segments])
+
+
+def seal_live_segment(session, seq, frames):
+    """
+    LiveIngestor callback: encrypt, sign and store one segment
+    
+    Runs on the sealer thread (or the closing request's thread) in its own
+    app context. The session row's nonce and segment_count move forward in
+    the same transaction as the segment insert.
+    
+    Raises:
+        SegmentConflict: If ``seq`` is already stored, with the newest stored
+            seq to rebase on (None once the session is no longer open)
+    """
+    plaintext = app.json.dumps(frames)
+    signature = crypto.run('rsa_sign', sign_data, session.private_key, plaintext)
+    sealed = crypto.run('gcm_encrypt', encrypt_with_key, session.aes_key, plaintext)
+    with app.app_context():
+        try:
+            db.session.add(TelemetrySegment(
+                file_id=session.file_id,
+                seq=seq,
+                frame_count=len(frames),
+                content=sealed['ciphertext'],
+                nonce=sealed['nonce'],
+                digital_signature=signature
+            ))
+            TelemetryData.query.filter_by(id=session.file_id).update({
+                'nonce': sealed['nonce'],
+                'segment_count': seq + 1
+            })
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # Another worker holding the same session sealed this seq first
+            live_state = db.session.scalar(db.select(TelemetryData.live_state).where(TelemetryData.id == session.file_id))
+            last_seq = db.session.scalar(
+                db.select(db.func.max(TelemetrySegment.seq)).where(TelemetrySegment.file_id == session.file_id)
+            )
+            raise SegmentConflict(session.file_id, seq, last_seq if live_state == 'open' else None)
+        except Exception:
+            db.session.rollback()
+            raise
+    logger.debug("Sealed segment %s of session %s (%d frames)", seq, session.file_id, len(frames))
+
+
+def get_file_channels(telemetry_file, user, shared_access):
+    """Decrypt a file once and cache its parsed NumPy channels"""
+    cache_key = (telemetry_file.id, telemetry_file.nonce)
+    channels = channel_cache.get(cache_key)
+    if channels is None:
+        def load():
+            loaded = load_channels(decrypt_file_content(telemetry_file, user, shared_access))
+            channel_cache.set(cache_key, loaded)
+            return loaded
+        channels, _ = channel_flight.do(cache_key, load)
+    return channels
+
+
+# Live frames are buffered per session and sealed in the background, so the
+# ingest rate is independent of per-segment RSA signing and GCM work
+live = LiveIngestor(
+    seal_live_segment,
+    max_frames=app.config['LIVE_SEGMENT_MAX_FRAMES'],
+    max_bytes=app.config['LIVE_SEGMENT_MAX_BYTES'],
+    max_age=app.config['LIVE_SEGMENT_MAX_AGE_MS'] / 1000.0,
+    max_buffered=app.config['LIVE_MAX_BUFFERED_FRAMES']
+)
+atexit.register(live.shutdown)
+
+
+SCRUB_LEASE_OWNER = f'{socket.gethostname()}:{os.getpid()}'
+# Renewed on every batch; a process that dies hands over after this long
+SCRUB_LEASE_SECONDS = 300
+
+
+def claim_scrub_lease(now):
+    """
+    Take or renew the scrubber lease
+    
+    Returns:
+        bool: True if this process may scrub until the lease runs out
+    """
+    lease = timedelta(seconds=SCRUB_LEASE_SECONDS)
+    claimed = db.session.execute(
+        db.update(ScrubCheckpoint)
+        .where(
+            ScrubCheckpoint.id == 1,
+            db.or_(
+                ScrubCheckpoint.lease_until.is_(None),
+                ScrubCheckpoint.lease_until < now,
+                ScrubCheckpoint.lease_owner == SCRUB_LEASE_OWNER
+            )
+        )
+        .values(lease_owner=SCRUB_LEASE_OWNER, lease_until=now + lease)
+    ).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def scrub_items(rows):
+    """Check inputs for check_files; live sessions and versioned files carry their parts"""
+    live_ids = [row.id for row in rows if row.live_state]
+    versioned_ids = [row.id for row in rows if row.version > 1]
+    segments, versions = {}, {}
+    if live_ids:
+        for seg in db.session.execute(
+            db.select(TelemetrySegment.file_id, TelemetrySegment.nonce, TelemetrySegment.content,
+                      TelemetrySegment.digital_signature)
+            .where(TelemetrySegment.file_id.in_(live_ids))
+            .order_by(TelemetrySegment.file_id, TelemetrySegment.seq)
+        ):
+            segments.setdefault(seg.file_id, []).append((seg.nonce, seg.content, seg.digital_signature))
+    if versioned_ids:
+        for ver in db.session.execute(
+            db.select(TelemetryVersion.file_id, TelemetryVersion.kind, TelemetryVersion.nonce,
+                      TelemetryVersion.content, TelemetryVersion.blob_ref, TelemetryVersion.digital_signature)
+            .where(TelemetryVersion.file_id.in_(versioned_ids))
+            .order_by(TelemetryVersion.file_id, TelemetryVersion.version)
+        ):
+            versions.setdefault(ver.file_id, []).append(tuple(ver)[1:])
+    return [
+        {
+            'id': row.id,
+            'owner_team': row.owner_team,
+            'encrypted_aes_key': row.encrypted_aes_key,
+            'nonce': row.nonce,
+            'content': row.content,
+            'blob_ref': row.blob_ref,
+            'digital_signature': row.digital_signature,
+            'segments': segments.get(row.id, []) if row.live_state else None,
+            'versions': versions.get(row.id, []) if row.version > 1 else None
+        }
+        for row in rows
+    ]
+
+
+def scrub_next_batch():
+    """
+    Check the next SCRUB_BATCH_SIZE files after the checkpoint
+    
+    Results and the advanced checkpoint are committed together, so a
+    restart resumes from the last finished batch. A failed check is audited
+    once, when a file first stops passing.
+    
+    Returns:
+        int: Files checked (0 when idle, not leased, or between passes)
+    """
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            if not claim_scrub_lease(now):
+                return 0
+            checkpoint = db.session.get(ScrubCheckpoint, 1)
+            if checkpoint.pass_started_at is None:
+                if checkpoint.last_completed_at and (
+                    now - checkpoint.last_completed_at
+                ).total_seconds() < app.config['SCRUB_PASS_INTERVAL_SECONDS']:
+                    return 0
+                checkpoint.pass_started_at = now
+                checkpoint.files_checked = checkpoint.failures = 0
+            
+            rows = db.session.execute(
+                db.select(
+                    TelemetryData.id, TelemetryData.filename, TelemetryData.owner_team,
+                    TelemetryData.encrypted_aes_key, TelemetryData.nonce, TelemetryData.content,
+                    TelemetryData.blob_ref, TelemetryData.digital_signature, TelemetryData.live_state,
+                    TelemetryData.version
+                )
+                .where(TelemetryData.id > checkpoint.last_file_id)
+                .order_by(TelemetryData.id)
+                .limit(app.config['SCRUB_BATCH_SIZE'])
+            ).all()
+            if not rows:
+                logger.info("Integrity scrub pass %d finished: %d files, %d failures",
+                            checkpoint.scrub_pass, checkpoint.files_checked, checkpoint.failures)
+                checkpoint.scrub_pass += 1
+                checkpoint.last_file_id = 0
+                checkpoint.pass_started_at = None
+                checkpoint.last_completed_at = now
+                db.session.commit()
+                return 0
+            
+            # The first user of a team holds the key its files are wrapped for
+            keys = {}
+            for user in User.query.filter(User.team.in_({row.owner_team for row in rows})).order_by(User.id):
+                keys.setdefault(user.team, (user.private_key, user.public_key))
+            results = scrub_pool.run(
+                'scrub', check_files, blob_store, keys, scrub_items(rows),
+                app.config['SCRUB_NICE'] if scrub_pool.mode == 'process' else 0
+            )
+            
+            ids = [row.id for row in rows]
+            previous = dict(db.session.execute(
+                db.select(IntegrityResult.file_id, IntegrityResult.status).where(IntegrityResult.file_id.in_(ids))
+            ).all())
+            db.session.execute(db.delete(IntegrityResult).where(IntegrityResult.file_id.in_(ids)))
+            db.session.execute(db.insert(IntegrityResult), [
+                {'file_id': file_id, 'status': status, 'detail': detail,
+                 'scrub_pass': checkpoint.scrub_pass, 'checked_at': now}
+                for file_id, status, detail in results
+            ])
+            failed = [(row, status, detail) for row, (_, status, detail) in zip(rows, results) if status != SCRUB_OK]
+            checkpoint.last_file_id = ids[-1]
+            checkpoint.files_checked += len(rows)
+            checkpoint.failures += len(failed)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        for row, status, detail in failed:
+            logger.error("Integrity check failed for file %s (%s): %s - %s", row.id, row.filename, status, detail)
+            if previous.get(row.id) != status:
+                log_audit_event('System', f'Integrity check failed for {row.filename}: {status}')
+        return len(rows)
+
+
+def foreground_crypto_busy():
+    """True while request threads have RSA/GCM work queued or running"""
+    return any(op['in_flight'] for op in crypto.stats()['operations'].values())
+
+
+# A separate pool, so scrub batches never take admission slots from requests
+scrub_pool = CryptoExecutor(
+    mode=app.config['CRYPTO_EXECUTOR'],
+    workers=app.config['SCRUB_WORKERS'],
+    operations={'scrub': {'queue': 1, 'timeout': 600.0}}
+)
+scrubber = IntegrityScrubber(
+    scrub_next_batch,
+    cpu_budget=app.config['SCRUB_CPU_BUDGET'],
+    workers=app.config['SCRUB_WORKERS'],
+    idle_interval=min(60.0, max(1.0, app.config['SCRUB_PASS_INTERVAL_SECONDS'] / 10)),
+    busy=foreground_crypto_busy
+)
+if app.config['SCRUB_CPU_BUDGET'] > 0:
+    scrub_pool.warm_up()
+    scrubber.start()
+    atexit.register(scrubber.shutdown)
+    atexit.register(scrub_pool.shutdown)
+
+
+def generate_token(user_id, username):
+    """Generate JWT token"""
+    payload = {
+        'user_id': user_id,
+        'username': username,
+        'exp': datetime.utcnow() + timedelta(hours=24)
+    }
+    return jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
+
+
+def visible_telemetry_query(user_team, current_user):
+    """
+    TelemetryData query restricted to the files a team may list
+    
+    FIA sees every file; other teams see their own files, Public files and
+    files shared with the requesting user.
+    
+    Args:
+        user_team (str): Requesting team (lower-case)
+        current_user (User): Requesting user, or None if unknown
+    
+    Returns:
+        Query: Filtered TelemetryData query
+    """
+    if user_team == 'fia':
+        return TelemetryData.query
+    
+    conditions = [
+        TelemetryData.owner_team == user_team,
+        TelemetryData.classification == 'Public'
+    ]
+    if current_user:
+        conditions.append(TelemetryData.id.in_(
+            db.session.query(SharedAccess.file_id).filter(SharedAccess.shared_with_user_id == current_user.id)
+        ))
+    return TelemetryData.query.filter(db.or_(*conditions))
+
+
+def parse_iso_arg(name):
+    """
+    Optional ISO 8601 timestamp query argument
+    
+    Raises:
+        ValueError: If the argument is present but not a timestamp
+    """
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+
+def version_etag(*parts):
+    """
+    ETag for a response built from data at the given version
+    
+    Callers pass cheap version markers (row counts, max ids) plus anything
+    else the body depends on, such as the requesting team.
+    """
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+
+def is_not_modified(etag):
+    """True if the request's If-None-Match already covers ``etag``"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def tag_response(response, etag, status=200):
+    """Attach a weak ETag and make clients revalidate before reusing the body"""
+    response.status_code = status
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+        
+
+@app.route('/api/register', methods=['POST'])
+def register():
+    """Register a new user and return QR code"""
+    data = request.get_json()
+    
+    team = data.get('team')
+    password = data.get('password')
+    
+    if not all([team, password]):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+                               
+    username = team
+    
+                                  
+    existing_user = User.query.filter_by(username=username, team=team).first()
+    if existing_user:
+        return jsonify({'error': 'Team already registered'}), 409
+    
+                                      
+    started = time.perf_counter()
+    password_hash = generate_password_hash(password)
+    CRYPTO_PRIMITIVE.observe('password_hash', value=time.perf_counter() - started)
+    new_user = User(username=username, password=password_hash, team=team)
+    db.session.add(new_user)
+    db.session.commit()
+    events.publish('counters', {'delta': {'nodes': 1}})
+    
+                      
+    qr_code = generate_qr_code_base64(new_user.totp_secret, username, f'F1 Telemetry - {team.upper()}')
+    
+    return jsonify({
+        'success': True,
+        'message': 'Team registered successfully',
+        'qr_code': qr_code,
+        'secret': new_user.totp_secret                                            
+    }), 201
+
+@app.route('/api/login', methods=['POST'])
+def login():
+    """Verify username/password and indicate if MFA is required"""
+    data = request.get_json()
     
     username = data.get('username')
     password = data.get('password')
@@ -368,7 +2049,13 @@ def login():
                                            
     user = User.query.filter_by(username=username, team=username).first()
     #component 1
-    if not user or not check_password_hash(user.password, password):
+    password_ok = False
+    if user:
+        started = time.perf_counter()
+        password_ok = check_password_hash(user.password, password)
+        CRYPTO_PRIMITIVE.observe('password_verify', value=time.perf_counter() - started)
+    
+    if not password_ok:
         log_audit_event(username, 'Failed Login Attempt')
         return jsonify({'error': 'Invalid credentials'}), 401
     
@@ -394,7 +2081,7 @@ def verify_2fa():
     team = data.get('team')
     code = data.get('code')
     
-    print(f"Verification request - user_id: {user_id}, code: {code}")             
+    logger.debug("Verification request - user_id: %s", user_id)
     
     if not all([user_id, code]):
         return jsonify({'error': 'Missing verification data'}), 400
@@ -403,20 +2090,18 @@ def verify_2fa():
     user = User.query.get(user_id)
     
     if not user:
-        print(f"User not found with id: {user_id}")             
+        logger.info("User not found with id: %s", user_id)
         return jsonify({'error': 'User not found'}), 404
     
-    print(f"User found - username: {user.username}, team: {user.team}, secret: {user.totp_secret}")             
+    logger.debug("User found - username: %s, team: %s", user.username, user.team)
     
                       
     totp = pyotp.TOTP(user.totp_secret)
-    current_code = totp.now()
-    print(f"Expected code: {current_code}, Received code: {code}")             
     
     is_valid = totp.verify(code, valid_window=1)                                  
     
     if not is_valid:
-        print(f"Code verification failed")             
+        logger.info("Code verification failed for user_id: %s", user_id)
         return jsonify({'error': 'Invalid verification code'}), 401
     
                         
@@ -462,7 +2147,10 @@ def seed_telemetry():
     """Seed the database with exactly 3 test telemetry objects (encrypted)"""
     try:
                                           
-        TelemetryData.query.delete()
+        TelemetrySegment.query.delete()
+        TelemetryVersion.query.delete()
+        IntegrityResult.query.delete()
+        deleted = TelemetryData.query.delete()
         
                                                  
         test_data = [
@@ -494,27 +2182,27 @@ def seed_telemetry():
                 raise Exception(f"Owner user not found for team: {data['owner_team']}")
             
                                                           
-            signature = sign_data(owner_user.private_key, data['plaintext'])
+            signature = crypto.run('rsa_sign', sign_data, owner_user.private_key, data['plaintext'])
             
                                            
-            encrypted_data = encrypt_aes_gcm(data['plaintext'], owner_user.public_key)
+            encrypted_data = crypto.run('gcm_encrypt', encrypt_aes_gcm, data['plaintext'], owner_user.public_key)
             
                                                                        
             telemetry_obj = TelemetryData(
                 filename=data['filename'],
                 owner_team=data['owner_team'],
                 classification=data['classification'],
-                content=encrypted_data['ciphertext'],
                 nonce=encrypted_data['nonce'],
                 encrypted_aes_key=encrypted_data['encrypted_key'],
-                digital_signature=signature
+                digital_signature=signature,
+                **ciphertext_columns(base64.b64decode(encrypted_data['ciphertext']))
             )
             db.session.add(telemetry_obj)
         
         db.session.commit()
         
                               
-        log_audit_event('System', 'Database Seeded')
+        log_audit_event('System', 'Database Seeded', delta={'files': len(test_data) - deleted})
         
         return jsonify({
             'success': True,
@@ -522,6 +2210,9 @@ def seed_telemetry():
             'count': len(test_data)
         }), 201
         
+    except CryptoBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -540,42 +2231,32 @@ def get_telemetry():
         if not user_team:
             return jsonify({'error': 'Missing user team header'}), 400
         
-        print(f"Telemetry access request - User: {user_name}, Team: {user_team}")             
+        logger.debug("Telemetry access request - User: %s, Team: %s", user_name, user_team)
         
                           
         current_user = User.query.filter_by(username=user_name, team=user_team).first()
         
-                           
-        if user_team == 'fia':
-                                         
-            telemetry_files = TelemetryData.query.all()
-            print(f"FIA access granted - returning {len(telemetry_files)} files")
-        else:
-                                                                                     
-            if current_user:
-                                                                   
-                shared_file_ids = db.session.query(SharedAccess.file_id).filter(
-                    SharedAccess.shared_with_user_id == current_user.id
-                ).all()
-                shared_file_ids = [fid[0] for fid in shared_file_ids]
-                
-                #component 2.1                                                         
-                telemetry_files = TelemetryData.query.filter(
-                    db.or_(
-                        TelemetryData.owner_team == user_team,                    
-                        TelemetryData.classification == 'Public',                
-                        TelemetryData.id.in_(shared_file_ids) if shared_file_ids else False                
-                    )
-                ).all()
-            else:
-                                            
-                telemetry_files = TelemetryData.query.filter(
-                    db.or_(
-                        TelemetryData.owner_team == user_team,
-                        TelemetryData.classification == 'Public'
-                    )
-                ).all()
-            print(f"Team {user_team} access - returning {len(telemetry_files)} files")
+        #component 2.1
+        visible = visible_telemetry_query(user_team, current_user)
+        
+        # The visible set's (count, max id) changes on every insert or delete,
+        # the sum of head versions on every new version, and the open/segment
+        # counts on every live seal or close, so an unchanged poll is
+        # answered without loading any file rows
+        file_count, max_id, versions, open_sessions, segments = visible.with_entities(
+            db.func.count(TelemetryData.id), db.func.max(TelemetryData.id), db.func.sum(TelemetryData.version),
+            # Live sessions change state on close and grow on every seal
+            db.func.count(TelemetryData.id).filter(TelemetryData.live_state == 'open'),
+            db.func.sum(TelemetryData.segment_count)
+        ).one()
+        etag = version_etag('telemetry', user_team, user_name, file_count, max_id, versions, open_sessions, segments)
+        if is_not_modified(etag):
+            response = tag_response(Response(), etag, 304)
+            response.headers['Vary'] = 'X-User-Team, X-User-Name'
+            return response
+        
+        telemetry_files = visible.all()
+        logger.debug("Team %s access - returning %d files", user_team, len(telemetry_files))
         
                               
         log_audit_event(user_name if user_name else user_team, 'Accessed Telemetry Repository')
@@ -583,16 +2264,90 @@ def get_telemetry():
                                 
         result = [file.to_dict() for file in telemetry_files]
         
-        return jsonify(result), 200
+        response = tag_response(jsonify(result), etag)
+        response.headers['Vary'] = 'X-User-Team, X-User-Name'
+        return response
         
     except Exception as e:
-        print(f"Error in get_telemetry: {str(e)}")
+        logger.error("Error in get_telemetry: %s", e)
         return jsonify({
             'error': 'Failed to retrieve telemetry data',
             'details': str(e)
         }), 500
 
 
+@app.route('/api/telemetry/search', methods=['GET'])
+def search_telemetry():
+    """
+    Search file metadata visible to the requesting team
+    
+    Query args: ``q`` (filename text), ``mode`` ('substring' or 'prefix'),
+    ``owner_team``, ``classification``, ``created_after``/``created_before``
+    (ISO timestamps), ``limit`` (max 200) and ``cursor`` (the previous
+    page's ``next_cursor``). Results are newest first and never include
+    ciphertext.
+    """
+    try:
+        user_team = request.headers.get('X-User-Team', '').lower()
+        user_name = request.headers.get('X-User-Name', '')
+        
+        if not user_team:
+            return jsonify({'error': 'Missing user team header'}), 400
+        
+        q = request.args.get('q', '').strip()
+        mode = request.args.get('mode', 'substring')
+        if mode not in ('substring', 'prefix'):
+            return jsonify({'error': "mode must be 'substring' or 'prefix'"}), 400
+        try:
+            created_after = parse_iso_arg('created_after')
+            created_before = parse_iso_arg('created_before')
+        except ValueError:
+            return jsonify({'error': 'created_after and created_before must be ISO 8601 timestamps'}), 400
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        cursor = request.args.get('cursor', type=int)
+        
+        current_user = User.query.filter_by(username=user_name, team=user_team).first()
+        query = visible_telemetry_query(user_team, current_user).options(
+            db.load_only(
+                TelemetryData.filename, TelemetryData.owner_team, TelemetryData.classification,
+                TelemetryData.live_state, TelemetryData.created_at
+            )
+        )
+        key = TelemetryData.id
+        if q:
+            query, key = apply_filename_search(query, search_backend, TelemetryData, q, mode)
+        if request.args.get('owner_team'):
+            query = query.filter(TelemetryData.owner_team == request.args['owner_team'].lower())
+        if request.args.get('classification'):
+            query = query.filter(TelemetryData.classification == request.args['classification'])
+        if created_after:
+            query = query.filter(TelemetryData.created_at >= created_after)
+        if created_before:
+            query = query.filter(TelemetryData.created_at <= created_before)
+        if cursor:
+            query = query.filter(key < cursor)
+        
+        # Keyset pagination on id: every page is an index range, however deep
+        files = query.order_by(key.desc()).limit(limit + 1).all()
+        has_more = len(files) > limit
+        files = files[:limit]
+        
+        if cursor is None:
+            log_audit_event(user_name if user_name else user_team, 'Searched Telemetry Repository')
+        
+        return jsonify({
+            'results': [f.to_metadata() for f in files],
+            'next_cursor': files[-1].id if has_more else None
+        }), 200
+    
+    except Exception as e:
+        logger.error("Error in search_telemetry: %s", e)
+        return jsonify({
+            'error': 'Failed to search telemetry data',
+            'details': str(e)
+        }), 500
+
+
 @app.route('/api/telemetry/upload', methods=['POST'])
 def upload_telemetry():
     """Upload, sign, and encrypt a new telemetry file"""
@@ -611,70 +2366,74 @@ def upload_telemetry():
         if not all([filename, content, classification, username, team]):
             return jsonify({'error': 'Missing required fields'}), 400
             
-        print(f"Upload request - File: {filename}, User: {username}, Team: {team}")
+        logger.debug("Upload request - File: %s, User: %s, Team: %s", filename, username, team)
         
                                            
         user = User.query.filter_by(username=username).first()
         if not user:
             return jsonify({'error': 'User not found'}), 404
             
+        # Uploading a filename the team already holds adds a version to it
+        existing = TelemetryData.query.filter(
+            TelemetryData.filename == filename,
+            TelemetryData.owner_team == team,
+            TelemetryData.live_state.is_(None)
+        ).order_by(TelemetryData.id.desc()).first()
+        
+        new_version = None
+        if existing:
+            try:
+                new_version = add_file_version(existing, user, content, classification)
+            except TelemetryAccessError as e:
+                db.session.rollback()
+                return jsonify({'error': e.message}), e.status
+            new_file, wrapped_key = existing, existing.encrypted_aes_key
+        else:
                                          
                                                                     
-        signature = sign_data(user.private_key, content)
+            signature = crypto.run('rsa_sign', sign_data, user.private_key, content)
         
                                                   
                                                                                     
-        encrypted_data = encrypt_aes_gcm(content, user.public_key)
+            encrypted_data = crypto.run('gcm_encrypt', encrypt_aes_gcm, content, user.public_key)
         
                              
-        new_file = TelemetryData(
-            filename=filename,
-            owner_team=team,
-            classification=classification,
-            content=encrypted_data['ciphertext'],
-            nonce=encrypted_data['nonce'],
-            encrypted_aes_key=encrypted_data['encrypted_key'],
-            digital_signature=signature
-        )
+            new_file = TelemetryData(
+                filename=filename,
+                owner_team=team,
+                classification=classification,
+                nonce=encrypted_data['nonce'],
+                encrypted_aes_key=encrypted_data['encrypted_key'],
+                digital_signature=signature,
+                **ciphertext_columns(base64.b64decode(encrypted_data['ciphertext']))
+            )
         
-        db.session.add(new_file)
-        db.session.flush()                                
+            db.session.add(new_file)
+            db.session.flush()                                
+        
+            wrapped_key = encrypted_data['encrypted_key']
         
                                                         
         shared_msg = ""
         if target_team:
             recipient_user = User.query.filter_by(team=target_team).first()
-            if recipient_user:
+            if recipient_user and new_version is not None and SharedAccess.query.filter_by(
+                file_id=new_file.id, shared_with_user_id=recipient_user.id
+            ).first():
+                logger.debug("File %s is already shared with %s", new_file.id, target_team)
+            elif recipient_user:
                                                                                
                                                                                         
-                private_key = serialization.load_pem_private_key(
-                    user.private_key.encode('utf-8'),
-                    password=None,
-                    backend=default_backend()
-                )
-                
-                                                                
-                aes_key = private_key.decrypt(
-                    base64.b64decode(encrypted_data['encrypted_key']),
-                    padding.PKCS1v15()
-                )
-                
-                                                            
-                recipient_public_key = serialization.load_pem_public_key(
-                    recipient_user.public_key.encode('utf-8'),
-                    backend=default_backend()
-                )
-                
-                shared_encrypted_key = recipient_public_key.encrypt(
-                    aes_key,
-                    padding.PKCS1v15()
+                shared_encrypted_key = crypto.run(
+                    'rsa_rewrap', rewrap_key,
+                    user.private_key, wrapped_key, recipient_user.public_key
                 )
                 
                                             
                 share = SharedAccess(
                     file_id=new_file.id,
                     shared_with_user_id=recipient_user.id,
-                    encrypted_key=base64.b64encode(shared_encrypted_key).decode('utf-8')
+                    encrypted_key=shared_encrypted_key
                 )
                 db.session.add(share)
                 shared_msg = f" and shared with {target_team}"
@@ -682,25 +2441,266 @@ def upload_telemetry():
                                  
                 log_audit_event(username, f'Shared {filename} with {target_team}')
             else:
-                print(f"Warning: Target team {target_team} not found for sharing")
+                logger.warning("Target team %s not found for sharing", target_team)
 
         db.session.commit()
         
+        if new_version is not None:
+            version_cache.set((new_file.id, new_version.version), content)
+            log_audit_event(username, f'Uploaded version {new_version.version} of {filename}{shared_msg}')
+            return jsonify({
+                'success': True,
+                'file_id': new_file.id,
+                'version': new_version.version,
+                'kind': new_version.kind,
+                'stored_size': new_version.stored_size,
+                'message': f'Version {new_version.version} encrypted and uploaded successfully{shared_msg}'
+            }), 201
+        
                       
-        log_audit_event(username, f'Uploaded file: {filename}{shared_msg}')
+        log_audit_event(username, f'Uploaded file: {filename}{shared_msg}', delta={'files': 1})
         
         return jsonify({
             'success': True,
             'file_id': new_file.id,
+            'version': 1,
             'message': f'File encrypted and uploaded successfully{shared_msg}'
         }), 201
 
+    except (VersionConflict, IntegrityError) as e:
+        db.session.rollback()
+        logger.warning("Version conflict in upload_telemetry: %s", e)
+        return jsonify({'error': 'Another version of this file was uploaded at the same time; retry'}), 409
+    except CryptoBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
-        print(f"Error in upload_telemetry: {str(e)}")
+        logger.error("Error in upload_telemetry: %s", e)
         return jsonify({'error': 'Failed to upload file'}), 500
 
 
+def live_busy_response(e):
+    """503 + Retry-After for a live session whose unsealed buffer is full"""
+    logger.warning("Live ingest backpressure: %s", e)
+    response = jsonify({'error': 'Live session buffer full, please retry', 'details': str(e)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(app.config['CRYPTO_RETRY_AFTER'])
+    return response
+
+
+def load_live_session(telemetry_file, owner):
+    """
+    Rebuild a live session's in-memory state from the database
+    
+    Used after a restart, or when a frame batch lands on a worker that did
+    not start the session. Sealing resumes after the newest stored segment.
+    """
+    aes_key = crypto.run('rsa_unwrap', unwrap_key, owner.private_key, telemetry_file.encrypted_aes_key)
+    last_seq = db.session.query(db.func.max(TelemetrySegment.seq)).filter_by(file_id=telemetry_file.id).scalar()
+    return LiveSession(
+        telemetry_file.id, telemetry_file.owner_team, aes_key, owner.private_key,
+        next_seq=0 if last_seq is None else last_seq + 1
+    )
+
+
+@app.route('/api/telemetry/live', methods=['POST'])
+def start_live_session():
+    """Open a live telemetry session that grows as frames are streamed in"""
+    try:
+        data = request.get_json() or {}
+        
+        filename = data.get('filename')
+        classification = data.get('classification')
+        username = request.headers.get('X-User-Name')
+        team = request.headers.get('X-User-Team', '').lower()
+        
+        if not all([filename, classification, username, team]):
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        user = User.query.filter_by(username=username, team=team).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # One AES key for the whole session; each segment gets its own nonce
+        aes_key, encrypted_key = crypto.run('gcm_encrypt', generate_wrapped_key, user.public_key)
+        
+        new_file = TelemetryData(
+            filename=filename,
+            owner_team=team,
+            classification=classification,
+            encrypted_aes_key=encrypted_key,
+            live_state='open',
+            segment_count=0
+        )
+        db.session.add(new_file)
+        db.session.commit()
+        
+        live.register(LiveSession(new_file.id, team, aes_key, user.private_key))
+        log_audit_event(username, f'Started live session: {filename}', delta={'files': 1})
+        
+        return jsonify({
+            'success': True,
+            'file_id': new_file.id,
+            'state': 'open'
+        }), 201
+    
+    except CryptoBusy:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error in start_live_session: %s", e)
+        return jsonify({'error': 'Failed to start live session', 'details': str(e)}), 500
+
+
+@app.route('/api/telemetry/live/<int:file_id>/frames', methods=['POST'])
+def append_live_frames(file_id):
+    """Buffer a batch of frames; they are sealed into the next segment in the background"""
+    try:
+        data = request.get_json() or {}
+        frames = data.get('frames')
+        team = request.headers.get('X-User-Team', '').lower()
+        
+        if not isinstance(frames, list) or not team:
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        session = live.get(file_id)
+        if session is None:
+            telemetry_file = db.session.get(TelemetryData, file_id, options=[db.defer(TelemetryData.content)])
+            if not telemetry_file or telemetry_file.live_state is None:
+                return jsonify({'error': 'Live session not found'}), 404
+            if telemetry_file.live_state != 'open':
+                return jsonify({'error': 'Live session is closed'}), 409
+            if telemetry_file.owner_team != team:
+                return jsonify({'error': 'Unauthorized: only the owner team can stream frames'}), 403
+            owner = User.query.filter_by(team=telemetry_file.owner_team).first()
+            session = live.get_or_open(file_id, lambda: load_live_session(telemetry_file, owner))
+        
+        if session.owner_team != team:
+            return jsonify({'error': 'Unauthorized: only the owner team can stream frames'}), 403
+        
+        buffered = live.append(session, frames, request.content_length or 0)
+        return jsonify({
+            'accepted': len(frames),
+            'buffered': buffered,
+            'last_seq': session.last_seq
+        }), 202
+    
+    except IngestBackpressure as e:
+        return live_busy_response(e)
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        logger.error("Error in append_live_frames: %s", e)
+        return jsonify({'error': 'Failed to append frames', 'details': str(e)}), 500
+
+
+@app.route('/api/telemetry/live/<int:file_id>/close', methods=['POST'])
+def close_live_session(file_id):
+    """Seal any buffered frames and mark the session closed"""
+    try:
+        username = request.headers.get('X-User-Name')
+        team = request.headers.get('X-User-Team', '').lower()
+        
+        telemetry_file = db.session.get(TelemetryData, file_id, options=[db.defer(TelemetryData.content)])
+        if not telemetry_file or telemetry_file.live_state is None:
+            return jsonify({'error': 'Live session not found'}), 404
+        if telemetry_file.owner_team != team:
+            return jsonify({'error': 'Unauthorized: only the owner team can close a session'}), 403
+        
+        session = live.get(file_id)
+        if session is not None:
+            live.close(session)
+        
+        telemetry_file = db.session.get(TelemetryData, file_id, populate_existing=True)
+        telemetry_file.live_state = 'closed'
+        db.session.commit()
+        live_key_cache.pop(file_id)
+        
+        log_audit_event(username or team, f'Closed live session: {telemetry_file.filename}')
+        
+        return jsonify({
+            'success': True,
+            'state': 'closed',
+            'segments': telemetry_file.segment_count
+        }), 200
+    
+    except CryptoBusy:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error in close_live_session: %s", e)
+        return jsonify({'error': 'Failed to close live session', 'details': str(e)}), 500
+
+
+@app.route('/api/telemetry/live/<int:file_id>/segments', methods=['GET'])
+def tail_live_segments(file_id):
+    """
+    Decrypted segments newer than ``after``
+    
+    With ``wait`` (seconds, capped at 30) the request long-polls until a new
+    segment is sealed, so a reader tailing a session sees frames within one
+    seal interval without polling.
+    """
+    try:
+        username = request.headers.get('X-User-Name', '')
+        after = request.args.get('after', type=int)
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        wait = min(request.args.get('wait', 0, type=float), 30.0)
+        
+        try:
+            telemetry_file, user, shared_access = resolve_file_access(file_id, username)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        if telemetry_file.live_state is None:
+            return jsonify({'error': 'Not a live session'}), 404
+        
+        after_seq = -1 if after is None else after
+        session = live.get(file_id)
+        if wait > 0 and session is not None and session.last_seq <= after_seq:
+            # Release the connection while blocked, then read fresh state
+            db.session.commit()
+            live.wait_for(session, after_seq, wait)
+            db.session.expire_all()
+            telemetry_file = db.session.get(TelemetryData, file_id, options=[db.defer(TelemetryData.content)])
+        
+        segments = live_segments(file_id, after_seq, limit)
+        try:
+            plaintexts = decrypt_segments(live_file_key(telemetry_file, user, shared_access), segments)
+        except ContentDecryptError as e:
+            logger.warning("AES-GCM decryption failed: %s", e)
+            return jsonify({'error': 'Failed to decrypt content: Invalid key or corrupted data'}), 500
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        
+        # Only the initial read is audited, not every tail poll
+        if after is None:
+            log_audit_event(username, f'Opened live session: {telemetry_file.filename}')
+        
+        return jsonify({
+            'file_id': file_id,
+            'state': telemetry_file.live_state,
+            'last_seq': segments[-1].seq if segments else after_seq,
+            'segments': [
+                {
+                    'seq': seg.seq,
+                    'frame_count': seg.frame_count,
+                    'created_at': seg.created_at.isoformat() if seg.created_at else None,
+                    'frames': app.json.loads(plaintext)
+                }
+                for seg, plaintext in zip(segments, plaintexts)
+            ]
+        }), 200
+    
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        logger.error("Error in tail_live_segments: %s", e)
+        return jsonify({'error': 'Failed to read live segments', 'details': str(e)}), 500
+
+
 @app.route('/api/telemetry/share', methods=['POST'])
 def share_telemetry():
     """Share a telemetry file with another team using RSA key exchange"""
@@ -714,7 +2714,7 @@ def share_telemetry():
         if not all([file_id, recipient_team, sender_username]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        print(f"Share request - File: {file_id}, From: {sender_username}, To: {recipient_team}")
+        logger.debug("Share request - File: %s, From: %s, To: %s", file_id, sender_username, recipient_team)
         
                                                        
         telemetry_file = TelemetryData.query.get(file_id)
@@ -742,46 +2742,17 @@ def share_telemetry():
             return jsonify({'error': 'File already shared with this team'}), 409
         
         # 4. RSA Encryption: Secure handshake
-        # Step A: Unwrap (Decrypt) the original AES key using Sender's Private Key
+        # Unwrap the file's AES key with the sender's private key and wrap it
+        # for the recipient in one executor call; the raw key never reaches
+        # the request thread.
         try:
-            sender_private_key = serialization.load_pem_private_key(
-                sender_user.private_key.encode('utf-8'),
-                password=None,
-                backend=default_backend()
-            )
-            
-            # The file's key is encrypted with the Owner's Public Key.
-            # Since we verified sender is owner/authorized, we use their private key.
-            # (Note: If sender is NOT owner but has shared access, we'd need to use the SharedAccess key.
-            # But earlier check ensures owner_team == sender_team, so sender has access to owner's key or is owner.)
-            # Wait, if multiple users are in a team, they share the team's key pair? 
-            # The User model has individual keys, but the 'team' concept implies shared access?
-            # Looking at User model: "username" seems to be user/team name alias in this simplified app.
-            
-            original_encrypted_key = base64.b64decode(telemetry_file.encrypted_aes_key)
-            
-            raw_aes_key = sender_private_key.decrypt(
-                original_encrypted_key,
-                padding.PKCS1v15()
+            encrypted_key_b64 = crypto.run(
+                'rsa_rewrap', rewrap_key,
+                sender_user.private_key, telemetry_file.encrypted_aes_key, recipient_user.public_key
             )
-            
-        except Exception as e:
-            print(f"Key Unwrap Failed: {str(e)}")
+        except KeyUnwrapError as e:
+            logger.warning("Key Unwrap Failed: %s", e)
             return jsonify({'error': 'Failed to decrypt source file key. Sender key mismatch?'}), 500
-
-        # Step B: Wrap (Encrypt) the AES key for the Recipient
-        recipient_public_key = serialization.load_pem_public_key(
-            recipient_user.public_key.encode('utf-8'),
-            backend=default_backend()
-        )
-        #component 2.2 
-        encrypted_key = recipient_public_key.encrypt(
-            raw_aes_key,
-            padding.PKCS1v15()
-        )
-        
-        # Base64 encode for storage
-        encrypted_key_b64 = base64.b64encode(encrypted_key).decode('utf-8')
         
                                        
         new_share = SharedAccess(
@@ -792,7 +2763,7 @@ def share_telemetry():
         db.session.add(new_share)
         db.session.commit()
         
-        print(f"✓ File {file_id} shared with {recipient_team} (User ID: {recipient_user.id})")
+        logger.info("File %s shared with %s (User ID: %s)", file_id, recipient_team, recipient_user.id)
         
                             
         log_audit_event(sender_username, f'Shared {telemetry_file.filename} with {recipient_team}')
@@ -803,9 +2774,12 @@ def share_telemetry():
             'encrypted_key_length': len(encrypted_key_b64)
         }), 201
         
+    except CryptoBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
-        print(f"Error in share_telemetry: {str(e)}")
+        logger.error("Error in share_telemetry: %s", e)
         return jsonify({
             'error': 'Failed to share file',
             'details': str(e)
@@ -823,226 +2797,523 @@ def decrypt_telemetry():
         if not all([file_id, username]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        print(f"Decrypt request - File: {file_id}, User: {username}")
+        logger.debug("Decrypt request - File: %s, User: %s", file_id, username)
         
-                                   
-        telemetry_file = TelemetryData.query.get(file_id)
+        try:
+            telemetry_file, user, shared_access = resolve_file_access(file_id, username)
+            logger.debug("%s access - file %s", 'Owner' if shared_access is None else 'Shared', file_id)
+            version = requested_version(telemetry_file, data.get('version'))
+            decrypted_content = decrypt_file_content(telemetry_file, user, shared_access, version)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        
+        logger.info("File %s decrypted successfully for %s", file_id, username)
+        
+                               
+        if version == telemetry_file.version:
+            log_audit_event(username, f'Decrypted content of {telemetry_file.filename}')
+        else:
+            log_audit_event(username, f'Decrypted version {version} of {telemetry_file.filename}')
+        
+        return jsonify({
+            'success': True,
+            'content': decrypted_content,
+            'version': version
+        }), 200
+        
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        logger.error("Error in decrypt_telemetry: %s", e)
+        return jsonify({
+            'error': 'Failed to decrypt file',
+            'details': str(e)
+        }), 500
+
+
+@app.route('/api/telemetry/<int:file_id>/ciphertext', methods=['GET'])
+def get_ciphertext(file_id):
+    """
+    Raw ciphertext + tag of a listed file, streamed from wherever it is stored
+    
+    Listings omit ciphertext for files kept in the blob store; this serves
+    it to the same teams that can list the file. ``?format=base64`` returns
+    the Base64 text that inline listings carry. For versioned files
+    ``?version=`` (default: the head) selects the stored payload, which is
+    a full or delta payload as named by the X-Version-Kind header.
+    """
+    try:
+        user_team = request.headers.get('X-User-Team', '').lower()
+        user_name = request.headers.get('X-User-Name', '')
+        if not user_team:
+            return jsonify({'error': 'Missing user team header'}), 400
+        
+        current_user = User.query.filter_by(username=user_name, team=user_team).first()
+        telemetry_file = visible_telemetry_query(user_team, current_user).filter(TelemetryData.id == file_id).first()
+        if not telemetry_file or telemetry_file.live_state:
+            return jsonify({'error': 'File not found'}), 404
+        try:
+            version = requested_version(telemetry_file, request.args.get('version'))
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        
+        stored, kind = telemetry_file, 'full'
+        if telemetry_file.version > 1:
+            stored = TelemetryVersion.query.filter_by(file_id=telemetry_file.id, version=version).first()
+            if not stored:
+                return jsonify({'error': f'Version {version} not found'}), 404
+            kind = stored.kind
+        if stored.blob_ref:
+            data = blob_store.read(stored.blob_ref)
+        else:
+            data = base64.b64decode(stored.content or '')
+        
+        headers = {'X-Version': str(version), 'X-Version-Kind': kind}
+        if request.args.get('format') == 'base64':
+            return Response(base64.b64encode(data), mimetype='text/plain', headers=headers)
+        return Response(data, mimetype='application/octet-stream', headers=headers)
+    
+    except BlobNotFound:
+        return jsonify({'error': 'Encrypted content is missing from the blob store'}), 500
+    except Exception as e:
+        logger.error("Error in get_ciphertext: %s", e)
+        return jsonify({'error': 'Failed to read ciphertext', 'details': str(e)}), 500
+
+
+@app.route('/api/telemetry/<int:file_id>/versions', methods=['GET'])
+def list_file_versions(file_id):
+    """
+    Version history of a listed file, newest first
+    
+    Metadata only: each entry gives the version's plaintext size, how it is
+    stored (full or delta) and the bytes that were encrypted for it.
+    """
+    try:
+        user_team = request.headers.get('X-User-Team', '').lower()
+        user_name = request.headers.get('X-User-Name', '')
+        if not user_team:
+            return jsonify({'error': 'Missing user team header'}), 400
+        
+        current_user = User.query.filter_by(username=user_name, team=user_team).first()
+        telemetry_file = visible_telemetry_query(user_team, current_user).options(
+            db.defer(TelemetryData.content)
+        ).filter(TelemetryData.id == file_id).first()
         if not telemetry_file:
             return jsonify({'error': 'File not found'}), 404
         
-                                    
-        user = User.query.filter_by(username=username).first()
-        if not user:
+        if telemetry_file.version > 1:
+            versions = [v.to_metadata() for v in TelemetryVersion.query.filter_by(
+                file_id=telemetry_file.id
+            ).order_by(TelemetryVersion.version.desc())]
+        else:
+            # Never updated: the file row is the only version
+            versions = [{
+                'version': 1,
+                'kind': 'full',
+                'size': None,
+                'stored_size': None,
+                'created_at': telemetry_file.created_at.isoformat() if telemetry_file.created_at else None
+            }]
+        
+        return jsonify({
+            'file_id': telemetry_file.id,
+            'filename': telemetry_file.filename,
+            'version': telemetry_file.version,
+            'versions': versions
+        }), 200
+    
+    except Exception as e:
+        logger.error("Error in list_file_versions: %s", e)
+        return jsonify({'error': 'Failed to list versions', 'details': str(e)}), 500
+
+
+@app.route('/api/vault/export', methods=['GET'])
+def export_team_vault():
+    """
+    Stream the requesting team's files, shares and signatures as a tar
+    
+    Content stays encrypted end to end: the stream carries the stored
+    ciphertext, wrapped keys and signatures, plus a manifest signed with
+    the team's key.
+    """
+    try:
+        user_team = request.headers.get('X-User-Team', '').lower()
+        user_name = request.headers.get('X-User-Name', '')
+        if not user_team or not user_name:
+            return jsonify({'error': 'Missing user identity'}), 400
+        
+        owner = User.query.filter_by(username=user_name, team=user_team).first()
+        if not owner:
             return jsonify({'error': 'User not found'}), 404
         
-                                                                       
-        is_owner = telemetry_file.owner_team == user.team
-        shared_access = None
+        filename = f"{owner.team}-vault-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.tar"
+        return Response(stream_with_context(export_vault(owner)), mimetype='application/x-tar', headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        })
+    
+    except Exception as e:
+        logger.error("Error in export_team_vault: %s", e)
+        return jsonify({'error': 'Failed to export vault', 'details': str(e)}), 500
+
+
+@app.route('/api/vault/import', methods=['POST'])
+def import_team_vault():
+    """Load a vault export (the raw tar as the request body) into the requesting team"""
+    try:
+        user_team = request.headers.get('X-User-Team', '').lower()
+        user_name = request.headers.get('X-User-Name', '')
+        if not user_team or not user_name:
+            return jsonify({'error': 'Missing user identity'}), 400
         
-        if not is_owner:
-            shared_access = SharedAccess.query.filter_by(
-                file_id=file_id,
-                shared_with_user_id=user.id
-            ).first()
-            
-            if not shared_access:
-                return jsonify({'error': 'Unauthorized: You do not have access to this file'}), 403
+        user = User.query.filter_by(username=user_name, team=user_team).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
-                                      
-        if is_owner:
-            encrypted_aes_key_b64 = telemetry_file.encrypted_aes_key
-            print(f"Owner access - using file's encrypted key")
-        else:
-            encrypted_aes_key_b64 = shared_access.encrypted_key
-            print(f"Shared access - using shared encrypted key")
+        try:
+            stats = import_vault(request.stream, user)
+        except VaultImportError as e:
+            logger.warning("Vault import rejected for %s: %s", user_team, e.message)
+            return jsonify({'error': e.message}), e.status
+        
+        log_audit_event(user_name, f"Imported vault ({stats['files']} files, {stats['shares']} shares)",
+                        delta={'files': stats['files']})
+        return jsonify(dict(stats, success=True)), 201
+    
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        logger.error("Error in import_team_vault: %s", e)
+        return jsonify({'error': 'Failed to import vault', 'details': str(e)}), 500
+
+
+@app.route('/api/telemetry/verify', methods=['POST'])
+def verify_telemetry():
+    """Verify a telemetry file's digital signature"""
+    try:
+        data = request.get_json()
         
-        if not encrypted_aes_key_b64:
-            return jsonify({'error': 'Encrypted key not found'}), 500
+        file_id = data.get('file_id')
+        username = data.get('username', '').lower()
         
-                                                             
-        encrypted_aes_key = base64.b64decode(encrypted_aes_key_b64)
+        if not all([file_id, username]):
+            return jsonify({'error': 'Missing required fields'}), 400
         
-                                 
-        private_key = serialization.load_pem_private_key(
-            user.private_key.encode('utf-8'),
-            password=None,
-            backend=default_backend()
-        )
+        logger.debug("Verify request - File: %s, User: %s", file_id, username)
         
-                         
         try:
-            aes_key = private_key.decrypt(
-                encrypted_aes_key,
-                padding.PKCS1v15()
-            )
-        except Exception as e:
-            print(f"RSA decryption failed: {str(e)}")
-            return jsonify({'error': 'Failed to decrypt AES key: Invalid RSA key'}), 500
-        
-                                              
-        ciphertext_with_tag = base64.b64decode(telemetry_file.content)
-        nonce = base64.b64decode(telemetry_file.nonce)
+            telemetry_file, user, shared_access = resolve_file_access(file_id, username)
+            if telemetry_file.live_state:
+                segments = live_segments(telemetry_file.id)
+                try:
+                    plaintexts = decrypt_segments(live_file_key(telemetry_file, user, shared_access), segments)
+                except ContentDecryptError as e:
+                    logger.warning("AES-GCM decryption failed: %s", e)
+                    raise TelemetryAccessError('Failed to decrypt content: Invalid key or corrupted data')
+            else:
+                version = requested_version(telemetry_file, data.get('version'))
+                decrypted_content = decrypt_file_content(telemetry_file, user, shared_access, version)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
         
                                                               
-        ciphertext = ciphertext_with_tag[:-16]
-        tag = ciphertext_with_tag[-16:]
-        
-                                   
-        cipher = Cipher(
-            algorithms.AES(aes_key),
-            modes.GCM(nonce, tag),
-            backend=default_backend()
-        )
-        decryptor = cipher.decryptor()
+        owner_user = User.query.filter_by(team=telemetry_file.owner_team).first()
+        if not owner_user:
+            return jsonify({'error': 'Owner user not found'}), 500
         
-        try:
-            plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-            decrypted_content = plaintext.decode('utf-8')
-        except Exception as e:
-            print(f"AES-GCM decryption failed: {str(e)}")
-            return jsonify({'error': 'Failed to decrypt content: Invalid key or corrupted data'}), 500
+        if telemetry_file.live_state:
+            # Every sealed segment carries its own owner signature
+            if not segments:
+                return jsonify({'error': 'No sealed segments yet'}), 409
+            results = crypto.run(
+                'rsa_verify', verify_many,
+                owner_user.public_key,
+                [(plaintext, seg.digital_signature) for plaintext, seg in zip(plaintexts, segments)]
+            )
+            is_valid = all(results)
+        else:
+            # Each version is signed over its own full content
+            signature = telemetry_file.digital_signature
+            if version != telemetry_file.version:
+                signature = db.session.scalar(
+                    db.select(TelemetryVersion.digital_signature)
+                    .where(TelemetryVersion.file_id == telemetry_file.id, TelemetryVersion.version == version)
+                )
+                                             
+            if not signature:
+                return jsonify({'error': 'No digital signature found'}), 500
+            
+            is_valid = crypto.run(
+                'rsa_verify', verify_signature,
+                owner_user.public_key,
+                decrypted_content,
+                signature
+            )
         
-        print(f"✓ File {file_id} decrypted successfully for {username}")
+        logger.info("Signature verification for file %s: %s", file_id, 'VALID' if is_valid else 'INVALID')
         
-                               
-        log_audit_event(username, f'Decrypted content of {telemetry_file.filename}')
+                                 
+        if is_valid:
+            log_audit_event(username, f'Verified integrity of {telemetry_file.filename}')
         
-        return jsonify({
-            'success': True,
-            'content': decrypted_content
-        }), 200
+        response = {
+            'valid': is_valid,
+            'owner': telemetry_file.owner_team
+        }
+        if telemetry_file.live_state:
+            response['segments'] = len(segments)
+            response['invalid_segments'] = [seg.seq for seg, ok in zip(segments, results) if not ok]
+        else:
+            response['version'] = version
+        return jsonify(response), 200
         
+    except CryptoBusy:
+        raise
     except Exception as e:
-        print(f"Error in decrypt_telemetry: {str(e)}")
+        logger.error("Error in verify_telemetry: %s", e)
         return jsonify({
-            'error': 'Failed to decrypt file',
+            'error': 'Failed to verify file',
             'details': str(e)
         }), 500
 
 
-@app.route('/api/telemetry/verify', methods=['POST'])
-def verify_telemetry():
-    """Verify a telemetry file's digital signature"""
+@app.route('/api/telemetry/aggregate', methods=['POST'])
+def aggregate_telemetry():
+    """Compute per-channel statistics server-side over a decrypted telemetry file"""
     try:
         data = request.get_json()
         
         file_id = data.get('file_id')
         username = data.get('username', '').lower()
+        channels = data.get('channels')
+        percentiles = data.get('percentiles', [5, 50, 95])
+        bins = data.get('bins', 20)
+        group_by = data.get('group_by')
         
         if not all([file_id, username]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        print(f"Verify request - File: {file_id}, User: {username}")
+        if group_by is not None and group_by not in GROUP_CHANNELS:
+            return jsonify({'error': f'group_by must be one of: {", ".join(GROUP_CHANNELS)}'}), 400
         
-                                   
-        telemetry_file = TelemetryData.query.get(file_id)
-        if not telemetry_file:
-            return jsonify({'error': 'File not found'}), 404
+        logger.debug("Aggregate request - File: %s, User: %s, Group: %s", file_id, username, group_by)
         
-                                    
-        user = User.query.filter_by(username=username).first()
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        try:
+            telemetry_file, user, shared_access = resolve_file_access(file_id, username)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        
+        cache_key = (telemetry_file.id, telemetry_file.nonce, query_key({
+            'channels': channels,
+            'percentiles': percentiles,
+            'bins': bins,
+            'group_by': group_by
+        }))
+        result = analytics_cache.get(cache_key)
+        
+        if result is None:
+            try:
+                file_channels = get_file_channels(telemetry_file, user, shared_access)
+                result = aggregate_channels(
+                    file_channels,
+                    names=channels,
+                    percentiles=percentiles,
+                    bins=bins,
+                    group_by=group_by
+                )
+            except TelemetryAccessError as e:
+                return jsonify({'error': e.message}), e.status
+            except (ValueError, TypeError) as e:
+                return jsonify({'error': 'Invalid aggregation request', 'details': str(e)}), 400
+            analytics_cache.set(cache_key, result)
         
-                                                                       
-        is_owner = telemetry_file.owner_team == user.team
-        shared_access = None
+        log_audit_event(username, f'Aggregated telemetry of {telemetry_file.filename}')
         
-        if not is_owner:
-            shared_access = SharedAccess.query.filter_by(
-                file_id=file_id,
-                shared_with_user_id=user.id
-            ).first()
-            
-            if not shared_access:
-                return jsonify({'error': 'Unauthorized: You do not have access to this file'}), 403
+        return jsonify({
+            'success': True,
+            'file_id': telemetry_file.id,
+            **result
+        }), 200
         
-                                      
-        if is_owner:
-            encrypted_aes_key_b64 = telemetry_file.encrypted_aes_key
-        else:
-            encrypted_aes_key_b64 = shared_access.encrypted_key
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        logger.error("Error in aggregate_telemetry: %s", e)
+        return jsonify({
+            'error': 'Failed to aggregate telemetry',
+            'details': str(e)
+        }), 500
+
+
+@app.route('/api/telemetry/downsample', methods=['POST'])
+def downsample_telemetry():
+    """Return one channel decimated to a target point count for charting"""
+    try:
+        data = request.get_json()
         
-        if not encrypted_aes_key_b64:
-            return jsonify({'error': 'Encrypted key not found'}), 500
+        file_id = data.get('file_id')
+        username = data.get('username', '').lower()
+        channel = data.get('channel')
+        x_channel = data.get('x')
+        points = data.get('points', 1000)
+        method = data.get('method', 'lttb')
+        start = data.get('start')
+        end = data.get('end')
+        
+        if not all([file_id, username, channel]):
+            return jsonify({'error': 'Missing required fields'}), 400
         
-                                                             
-        encrypted_aes_key = base64.b64decode(encrypted_aes_key_b64)
+        if method not in DOWNSAMPLE_METHODS:
+            return jsonify({'error': f'method must be one of: {", ".join(DOWNSAMPLE_METHODS)}'}), 400
         
-        private_key = serialization.load_pem_private_key(
-            user.private_key.encode('utf-8'),
-            password=None,
-            backend=default_backend()
-        )
+        try:
+            points = min(int(points), app.config['DOWNSAMPLE_MAX_POINTS'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'points must be an integer'}), 400
+        
+        logger.debug("Downsample request - File: %s, User: %s, Channel: %s, Points: %s", file_id, username, channel, points)
         
         try:
-            aes_key = private_key.decrypt(
-                encrypted_aes_key,
-                padding.PKCS1v15()
-            )
-        except Exception as e:
-            print(f"RSA decryption failed: {str(e)}")
-            return jsonify({'error': 'Failed to decrypt AES key'}), 500
+            telemetry_file, user, shared_access = resolve_file_access(file_id, username)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
         
-                                              
-        ciphertext_with_tag = base64.b64decode(telemetry_file.content)
-        nonce = base64.b64decode(telemetry_file.nonce)
+        try:
+            # The pyramid is built once per (file, channel, x) and reused for every zoom/pan
+            pyramid_key = (telemetry_file.id, telemetry_file.nonce, channel, x_channel)
+            pyramid = pyramid_cache.get(pyramid_key)
+            if pyramid is None:
+                file_channels = get_file_channels(telemetry_file, user, shared_access)
+                pyramid = build_pyramid(*channel_series(file_channels, channel, x_channel))
+                pyramid_cache.set(pyramid_key, pyramid)
+            
+            series = downsample_series(pyramid, points, method, start, end)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': 'Invalid downsample request', 'details': str(e)}), 400
         
-        ciphertext = ciphertext_with_tag[:-16]
-        tag = ciphertext_with_tag[-16:]
+        log_audit_event(username, f'Charted {channel} of {telemetry_file.filename}')
         
-        cipher = Cipher(
-            algorithms.AES(aes_key),
-            modes.GCM(nonce, tag),
-            backend=default_backend()
-        )
-        decryptor = cipher.decryptor()
+        return jsonify({
+            'success': True,
+            'file_id': telemetry_file.id,
+            'channel': channel,
+            'x_channel': x_channel,
+            'method': method,
+            'points': len(series['x']),
+            **series
+        }), 200
         
-        try:
-            plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-            decrypted_content = plaintext.decode('utf-8')
-        except Exception as e:
-            print(f"AES-GCM decryption failed: {str(e)}")
-            return jsonify({'error': 'Failed to decrypt content'}), 500
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        logger.error("Error in downsample_telemetry: %s", e)
+        return jsonify({
+            'error': 'Failed to downsample telemetry',
+            'details': str(e)
+        }), 500
+
+
+@app.route('/api/telemetry/compare', methods=['POST'])
+def compare_telemetry():
+    """Align two telemetry files on a common distance/time base and return deltas"""
+    try:
+        data = request.get_json()
         
-                                                              
-        owner_user = User.query.filter_by(team=telemetry_file.owner_team).first()
-        if not owner_user:
-            return jsonify({'error': 'Owner user not found'}), 500
+        file_id = data.get('file_id')
+        compare_file_id = data.get('compare_file_id')
+        username = data.get('username', '').lower()
+        base = data.get('base', 'distance')
+        channels = data.get('channels')
+        points = data.get('points', 1000)
         
-                                         
-        if not telemetry_file.digital_signature:
-            return jsonify({'error': 'No digital signature found'}), 500
+        if not all([file_id, compare_file_id, username]):
+            return jsonify({'error': 'Missing required fields'}), 400
         
-        is_valid = verify_signature(
-            owner_user.public_key,
-            decrypted_content,
-            telemetry_file.digital_signature
-        )
+        if base not in ALIGN_BASES:
+            return jsonify({'error': f'base must be one of: {", ".join(ALIGN_BASES)}'}), 400
         
-        print(f"✓ Signature verification for file {file_id}: {'VALID' if is_valid else 'INVALID'}")
+        try:
+            points = min(int(points), app.config['DOWNSAMPLE_MAX_POINTS'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'points must be an integer'}), 400
         
-                                 
-        if is_valid:
-            log_audit_event(username, f'Verified integrity of {telemetry_file.filename}')
+        logger.debug("Compare request - Files: %s vs %s, User: %s, Base: %s", file_id, compare_file_id, username, base)
+        
+        # Same ACL as decrypt_telemetry, applied to both files
+        try:
+            file_a, user, shared_a = resolve_file_access(file_id, username)
+            file_b, _, shared_b = resolve_file_access(compare_file_id, username)
+        except TelemetryAccessError as e:
+            return jsonify({'error': e.message}), e.status
+        
+        cache_key = ('compare', file_a.id, file_a.nonce, file_b.id, file_b.nonce, query_key({
+            'base': base,
+            'channels': channels,
+            'points': points
+        }))
+        result = analytics_cache.get(cache_key)
+        
+        if result is None:
+            try:
+                result = compare_laps(
+                    get_file_channels(file_a, user, shared_a),
+                    get_file_channels(file_b, user, shared_b),
+                    base=base,
+                    names=channels,
+                    points=points
+                )
+            except TelemetryAccessError as e:
+                return jsonify({'error': e.message}), e.status
+            except (ValueError, TypeError) as e:
+                return jsonify({'error': 'Invalid comparison request', 'details': str(e)}), 400
+            analytics_cache.set(cache_key, result)
+        
+        log_audit_event(username, f'Compared {file_a.filename} with {file_b.filename}')
         
         return jsonify({
-            'valid': is_valid,
-            'owner': telemetry_file.owner_team
+            'success': True,
+            'file_id': file_a.id,
+            'compare_file_id': file_b.id,
+            **result
         }), 200
         
+    except CryptoBusy:
+        raise
     except Exception as e:
-        print(f"Error in verify_telemetry: {str(e)}")
+        logger.error("Error in compare_telemetry: %s", e)
         return jsonify({
-            'error': 'Failed to verify file',
+            'error': 'Failed to compare telemetry',
             'details': str(e)
         }), 500
 
 
+@app.route('/api/telemetry/coalescing', methods=['GET'])
+def get_coalescing_stats():
+    """Request coalescing counters for decrypts and channel loads"""
+    return jsonify({
+        'decrypt': decrypt_flight.stats(),
+        'channels': channel_flight.stats()
+    }), 200
+
+
 @app.route('/api/dashboard', methods=['GET'])
 def get_dashboard_stats():
     """Get dashboard statistics and recent audit logs"""
     try:
+        # Users and audit rows are append-only and files never reuse ids,
+        # so these markers move whenever anything on the dashboard does
+        version = db.session.execute(db.select(
+            db.select(db.func.max(User.id)).scalar_subquery(),
+            db.select(db.func.count(TelemetryData.id)).scalar_subquery(),
+            db.select(db.func.max(TelemetryData.id)).scalar_subquery(),
+            db.select(db.func.max(AuditLog.id)).scalar_subquery()
+        )).one()
+        etag = version_etag('dashboard', *version)
+        if is_not_modified(etag):
+            return tag_response(Response(), etag, 304)
+        
                                     
         node_count = User.query.count()
         
@@ -1052,14 +3323,14 @@ def get_dashboard_stats():
                                 
         recent_logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(10).all()
         
-        return jsonify({
+        return tag_response(jsonify({
             'nodes': node_count,
             'files': encrypted_count,
             'logs': [log.to_dict() for log in recent_logs]
-        }), 200
+        }), etag)
         
     except Exception as e:
-        print(f"Error in get_dashboard_stats: {str(e)}")
+        logger.error("Error in get_dashboard_stats: %s", e)
         return jsonify({
             'error': 'Failed to retrieve dashboard stats',
             'details': str(e)
@@ -1068,19 +3339,286 @@ def get_dashboard_stats():
 
 @app.route('/api/audit-logs', methods=['GET'])
 def get_audit_logs():
-    """Get recent audit logs for the logs page"""
+    """
+    Get audit logs for the logs page
+    
+    Returns the newest 100 entries, or up to ``limit`` (max 1000) entries
+    between optional ``start``/``end`` ISO timestamps. Ranges that reach past
+    the hot table are served from the archive segments.
+    """
     try:
+        try:
+            start = parse_iso_arg('start')
+            end = parse_iso_arg('end')
+        except ValueError:
+            return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+        limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+        
+        # Ids are never reused, so (count, max(id)) of each tier also changes
+        # when retention or archival deletes rows
+        count, max_id, archives, max_archive = db.session.execute(db.select(
+            db.select(db.func.count(AuditLog.id)).scalar_subquery(),
+            db.select(db.func.max(AuditLog.id)).scalar_subquery(),
+            db.select(db.func.count(AuditArchive.id)).scalar_subquery(),
+            db.select(db.func.max(AuditArchive.id)).scalar_subquery()
+        )).one()
+        etag = version_etag('audit-logs', count, max_id, archives, max_archive, start, end, limit)
+        if is_not_modified(etag):
+            return tag_response(Response(), etag, 304)
+        
                                  
-        logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(100).all()
-        return jsonify([log.to_dict() for log in logs]), 200
+        logs = query_audit_logs(start, end, limit)
+        return tag_response(jsonify(logs), etag)
     except Exception as e:
-        print(f"Error in get_audit_logs: {str(e)}")
+        logger.error("Error in get_audit_logs: %s", e)
         return jsonify({'error': 'Failed to retrieve audit logs'}), 500
 
 
+@app.route('/api/audit-logs/<int:entry_id>/proof', methods=['GET'])
+def get_audit_proof(entry_id):
+    """
+    Inclusion proof for one audit entry
+    
+    The proof has two O(log n) audit paths: entry -> batch Merkle root, and
+    batch chain hash -> tree root of a signed checkpoint. A verifier
+    recomputes the entry's leaf, folds both paths and checks the checkpoint
+    signature with the returned system public key.
+    """
+    try:
+        entry = find_audit_entry(entry_id)
+        if not entry:
+            return jsonify({'error': 'Audit entry not found'}), 404
+        
+        def find_batch():
+            return AuditBatch.query.filter(
+                AuditBatch.first_entry_id <= entry_id,
+                AuditBatch.last_entry_id >= entry_id
+            ).first()
+        
+        batch = find_batch()
+        if batch is None:
+            commit_audit_batches()
+            batch = find_batch()
+        if batch is None:
+            response = jsonify({'error': 'Entry is not committed to a batch yet'})
+            response.status_code = 409
+            response.headers['Retry-After'] = str(max(1, int(app.config['AUDIT_BATCH_GRACE_SECONDS'] + 0.999)))
+            return response
+        
+        checkpoint = AuditCheckpoint.query.filter(
+            AuditCheckpoint.batch_seq >= batch.seq
+        ).order_by(AuditCheckpoint.batch_seq).first()
+        if checkpoint is None:
+            checkpoint = sign_audit_checkpoint()
+        
+        rows = audit_entry_rows(batch.first_entry_id, batch.last_entry_id)
+        if len(rows) < batch.entry_count and batch.min_timestamp < (audit_retention_cutoff() or datetime.min):
+            return jsonify({'error': 'Part of this entry\'s batch is past the retention period'}), 410
+        leaves = [entry_leaf(*row) for row in rows]
+        index = next(i for i, row in enumerate(rows) if row[0] == entry_id)
+        entry_path = inclusion_proof(leaves, index)
+        batch_leaves = batch_chain_hashes(checkpoint.batch_seq)
+        batch_path = inclusion_proof(batch_leaves, batch.seq - 1)
+        
+        # The same checks a client would run, so callers can see a mismatch
+        # without reimplementing the hashing
+        root = root_from_proof(leaves[index], entry_path).hex()
+        verified = (
+            root == batch.merkle_root
+            and chain_hash(batch.prev_hash, root, batch.first_entry_id, batch.last_entry_id) == batch.chain_hash
+            and root_from_proof(hash_leaf(batch.chain_hash), batch_path).hex() == checkpoint.tree_root
+        )
+        
+        return jsonify({
+            'entry': entry,
+            'leaf_hash': leaves[index].hex(),
+            'entry_proof': entry_path,
+            'batch': batch.to_dict(),
+            'batch_proof': batch_path,
+            'checkpoint': checkpoint.to_dict(),
+            'public_key': SystemKey.query.filter_by(name='audit').first().public_key,
+            'verified': verified
+        }), 200
+    
+    except CryptoBusy:
+        raise
     except Exception as e:
-        print(f"Error in get_audit_logs: {str(e)}")
-        return jsonify({'error': 'Failed to retrieve audit logs'}), 500
+        db.session.rollback()
+        logger.error("Error in get_audit_proof: %s", e)
+        return jsonify({'error': 'Failed to build audit proof', 'details': str(e)}), 500
+
+
+@app.route('/api/audit-logs/verify', methods=['GET'])
+def verify_audit_range():
+    """
+    Verify the audit entries of a time range against their committed roots
+    
+    Only the batches overlapping ``start``..``end`` (ISO timestamps) are
+    rehashed from their rows. The chain is then followed from the last of
+    them to the next signed checkpoint using stored batch records only, and
+    the checkpoint signature is checked.
+    """
+    try:
+        try:
+            start = parse_iso_arg('start') or datetime.min
+            end = parse_iso_arg('end') or datetime.max
+        except ValueError:
+            return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+        
+        maintain_audit_chain()
+        
+        batches = AuditBatch.query.filter(
+            AuditBatch.max_timestamp >= start,
+            AuditBatch.min_timestamp <= end
+        ).order_by(AuditBatch.seq).all()
+        
+        problems = []
+        entries_checked = 0
+        expired = 0
+        retention_cutoff = audit_retention_cutoff()
+        if batches:
+            previous = AuditBatch.query.filter_by(seq=batches[0].seq - 1).first()
+            prev_hash = previous.chain_hash if previous else GENESIS_HASH
+        for batch in batches:
+            if batch.prev_hash != prev_hash:
+                problems.append({'batch': batch.seq, 'problem': 'chain link does not match previous batch'})
+            prev_hash = batch.chain_hash
+            if retention_cutoff and batch.min_timestamp < retention_cutoff:
+                # Entries past retention are gone; only the chain link is checked
+                expired += 1
+                continue
+            rows = audit_entry_rows(batch.first_entry_id, batch.last_entry_id)
+            entries_checked += len(rows)
+            if len(rows) != batch.entry_count:
+                problems.append({'batch': batch.seq, 'problem': f'expected {batch.entry_count} entries, found {len(rows)}'})
+            if merkle_root([entry_leaf(*row) for row in rows]).hex() != batch.merkle_root:
+                problems.append({'batch': batch.seq, 'problem': 'entries do not match the committed Merkle root'})
+            if chain_hash(batch.prev_hash, batch.merkle_root, batch.first_entry_id, batch.last_entry_id) != batch.chain_hash:
+                problems.append({'batch': batch.seq, 'problem': 'batch record was modified'})
+        
+        checkpoint = None
+        if batches:
+            checkpoint = AuditCheckpoint.query.filter(
+                AuditCheckpoint.batch_seq >= batches[-1].seq
+            ).order_by(AuditCheckpoint.batch_seq).first() or sign_audit_checkpoint()
+            # Follow the chain forward to the signed head
+            head_hash = batches[-1].chain_hash
+            for batch in AuditBatch.query.filter(
+                AuditBatch.seq > batches[-1].seq, AuditBatch.seq <= checkpoint.batch_seq
+            ).order_by(AuditBatch.seq):
+                if batch.prev_hash != head_hash:
+                    problems.append({'batch': batch.seq, 'problem': 'chain link does not match previous batch'})
+                head_hash = chain_hash(batch.prev_hash, batch.merkle_root, batch.first_entry_id, batch.last_entry_id)
+            if head_hash != checkpoint.head_hash:
+                problems.append({'checkpoint': checkpoint.batch_seq, 'problem': 'chain does not reach the signed head'})
+            public_key = SystemKey.query.filter_by(name='audit').first().public_key
+            signature_valid = crypto.run(
+                'rsa_verify', verify_signature, public_key,
+                checkpoint_message(checkpoint.batch_seq, checkpoint.tree_root, checkpoint.head_hash),
+                checkpoint.signature
+            )
+            if not signature_valid:
+                problems.append({'checkpoint': checkpoint.batch_seq, 'problem': 'invalid checkpoint signature'})
+        
+        # Entries in the range newer than the last batch are not covered yet
+        head = AuditBatch.query.order_by(AuditBatch.seq.desc()).first()
+        unbatched = AuditLog.query.filter(
+            AuditLog.id > (head.last_entry_id if head else 0),
+            AuditLog.timestamp >= start,
+            AuditLog.timestamp <= end
+        ).count()
+        
+        return jsonify({
+            'valid': not problems,
+            'batches_checked': len(batches),
+            'expired_batches': expired,
+            'entries_checked': entries_checked,
+            'unbatched_entries': unbatched,
+            'checkpoint': checkpoint.to_dict() if checkpoint else None,
+            'problems': problems[:100]
+        }), 200
+    
+    except CryptoBusy:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error in verify_audit_range: %s", e)
+        return jsonify({'error': 'Failed to verify audit logs', 'details': str(e)}), 500
+
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Server-sent events: new audit entries and dashboard counter deltas
+    
+    The stream opens with a ``snapshot`` of the dashboard counters, then
+    carries ``audit`` events (id = audit log id, with a ``delta`` of counter
+    changes) and id-less ``counters`` events. Reconnecting with Last-Event-ID
+    replays the audit entries written in between; a ``resync`` event tells
+    the client to refetch instead (backlog too large or client too slow).
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    limit = app.config['SSE_REPLAY_LIMIT']
+    
+    try:
+        subscription = events.subscribe()
+    except BrokerFull as e:
+        logger.warning("Event stream rejected: %s", e)
+        response = jsonify({'error': 'Too many event subscribers', 'details': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(app.config['CRYPTO_RETRY_AFTER'])
+        return response
+    
+    try:
+        # Subscribed first, so anything committed after the snapshot arrives
+        # live; live events at or below the snapshot's id are skipped so no
+        # delta is applied twice
+        snapshot = {
+            'nodes': User.query.count(),
+            'files': TelemetryData.query.count(),
+            'last_audit_id': db.session.query(db.func.max(AuditLog.id)).scalar() or 0
+        }
+        initial = ['retry: 3000\n\n', format_event('snapshot', snapshot)]
+        
+        if last_event_id and last_event_id.isdigit():
+            backlog = AuditLog.query.filter(
+                AuditLog.id > int(last_event_id),
+                AuditLog.id <= snapshot['last_audit_id']
+            ).order_by(AuditLog.id).limit(limit + 1).all()
+            if len(backlog) > limit:
+                initial.append(format_event('resync', {'reason': 'backlog'}))
+            else:
+                initial.extend(
+                    format_event('audit', dict(entry.to_dict(), delta={}, replayed=True), entry.id)
+                    for entry in backlog
+                )
+    except Exception as e:
+        events.unsubscribe(subscription)
+        logger.error("Error in stream_events: %s", e)
+        return jsonify({'error': 'Failed to open event stream', 'details': str(e)}), 500
+    
+    high_water = snapshot['last_audit_id']
+    heartbeat = app.config['SSE_HEARTBEAT_SECONDS']
+    
+    def stream():
+        try:
+            yield from initial
+            while True:
+                pending, lagged = subscription.get(heartbeat)
+                if lagged:
+                    yield format_event('resync', {'reason': 'slow consumer'})
+                elif not pending:
+                    yield ': keepalive\n\n'
+                for event_id, payload in pending:
+                    if event_id is None or event_id > high_water:
+                        yield payload
+        finally:
+            events.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 @app.route('/api/user/keys', methods=['GET'])
@@ -1104,7 +3642,7 @@ def get_user_keys():
         }), 200
         
     except Exception as e:
-        print(f"Error in get_user_keys: {str(e)}")
+        logger.error("Error in get_user_keys: %s", e)
         return jsonify({'error': 'Failed to retrieve user keys'}), 500
 
 
@@ -1123,10 +3661,181 @@ def calculate_hash():
         return jsonify({'hash': hex_dig}), 200
         
     except Exception as e:
-        print(f"Error in calculate_hash: {str(e)}")
+        logger.error("Error in calculate_hash: %s", e)
         return jsonify({'error': 'Failed to calculate hash'}), 500
 
 
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_LATENCY.observe(request.method, route, str(response.status_code), value=time.perf_counter() - started)
+    REQUEST_SIZE.observe(route, value=request.content_length or 0)
+    if response.content_length is not None:
+        RESPONSE_SIZE.observe(route, value=response.content_length)
+    DB_QUERIES.observe(route, value=g.db_queries)
+    DB_TIME.observe(route, value=g.db_time)
+    return response
+
+
+def is_profile_admin():
+    """True if the request carries the configured profiling admin token"""
+    token = app.config['PROFILE_TOKEN']
+    supplied = request.headers.get('X-Profile-Token', '')
+    return bool(token) and hmac.compare_digest(token, supplied)
+
+
+@app.before_request
+def start_profiling():
+    if not profiling_enabled:
+        return
+    reason = None
+    if 'X-Profile' in request.headers and is_profile_admin():
+        reason = 'header'
+    elif random.random() < app.config['PROFILE_SAMPLE_RATE']:
+        reason = 'sampled'
+    if reason:
+        g.profiler = StackSampler(threading.get_ident(), app.config['PROFILE_INTERVAL_MS'] / 1000.0).start()
+        g.profile_reason = reason
+
+
+@app.after_request
+def finish_profiling(response):
+    sampler = g.pop('profiler', None)
+    if sampler is None:
+        return response
+    sampler.stop()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    profile = profile_store.add(sampler, request.method, route, response.status_code, g.profile_reason)
+    response.headers['X-Profile-Id'] = profile['id']
+    logger.info("Captured profile %s for %s %s (%.1f ms, %d samples)",
+                profile['id'], request.method, route, profile['duration_ms'], profile['samples'])
+    return response
+
+
+@app.teardown_request
+def abort_profiling(exc):
+    # after_request is skipped on unhandled exceptions; don't leak the sampler thread
+    sampler = g.pop('profiler', None)
+    if sampler is not None:
+        sampler.stop()
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List recently captured request profiles (admin token required)"""
+    if not is_profile_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(profile_store.list()), 200
+
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Return one profile as collapsed stacks (flamegraph input) or JSON"""
+    if not is_profile_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    profile = profile_store.get(profile_id)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(profile), 200
+    return Response(profile['folded'], content_type='text/plain; charset=utf-8')
+
+
+@app.route('/api/admin/integrity', methods=['GET'])
+def get_integrity_status():
+    """Scrubber progress, throughput and the files currently failing their checks (FIA only)"""
+    try:
+        if request.headers.get('X-User-Team', '').lower() != 'fia':
+            return jsonify({'error': 'Integrity status is restricted to the FIA'}), 403
+        
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        checkpoint = db.session.get(ScrubCheckpoint, 1)
+        total = db.session.scalar(db.select(db.func.count()).select_from(TelemetryData))
+        remaining = db.session.scalar(
+            db.select(db.func.count()).select_from(TelemetryData).where(TelemetryData.id > checkpoint.last_file_id)
+        ) if checkpoint.pass_started_at else 0
+        by_status = dict(db.session.execute(
+            db.select(IntegrityResult.status, db.func.count())
+            .join(TelemetryData, TelemetryData.id == IntegrityResult.file_id)
+            .group_by(IntegrityResult.status)
+        ).all())
+        failing = db.session.execute(
+            db.select(IntegrityResult, TelemetryData.filename, TelemetryData.owner_team)
+            .join(TelemetryData, TelemetryData.id == IntegrityResult.file_id)
+            .where(IntegrityResult.status != SCRUB_OK)
+            .order_by(IntegrityResult.checked_at.desc())
+            .limit(limit)
+        ).all()
+        
+        stats = scrubber.stats()
+        return jsonify({
+            'pass': checkpoint.scrub_pass,
+            'in_progress': checkpoint.pass_started_at is not None,
+            'pass_started_at': checkpoint.pass_started_at.isoformat() if checkpoint.pass_started_at else None,
+            'last_completed_at': checkpoint.last_completed_at.isoformat() if checkpoint.last_completed_at else None,
+            'files_checked': checkpoint.files_checked,
+            'files_remaining': remaining,
+            'total_files': total,
+            'progress': round(1 - remaining / total, 4) if total else 1.0,
+            'pass_failures': checkpoint.failures,
+            'files_per_sec': stats['files_per_sec'],
+            'batch_files_per_sec': stats['batch_files_per_sec'],
+            'lease_owner': checkpoint.lease_owner,
+            'scrubber': stats,
+            'status_counts': by_status,
+            'failing': [
+                {
+                    'file_id': result.file_id,
+                    'filename': filename,
+                    'owner_team': owner_team,
+                    'status': result.status,
+                    'detail': result.detail,
+                    'checked_at': result.checked_at.isoformat()
+                }
+                for result, filename, owner_team in failing
+            ]
+        }), 200
+    
+    except Exception as e:
+        logger.error("Error in get_integrity_status: %s", e)
+        return jsonify({'error': 'Failed to read integrity status', 'details': str(e)}), 500
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of request, DB, audit and crypto metrics"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.errorhandler(CryptoBusy)
+def handle_crypto_busy(e):
+    """Shed load with 503 + Retry-After when the crypto executor is saturated"""
+    logger.warning("Crypto backpressure: %s", e)
+    response = jsonify({
+        'error': 'Server busy, please retry',
+        'details': str(e)
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+@app.route('/api/crypto/stats', methods=['GET'])
+def get_crypto_stats():
+    """Crypto executor queue depth, rejections and timeouts per operation"""
+    return jsonify(crypto.stats()), 200
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+# File layout: MAGIC | u32 header length | JSON header | column blobs.
+# Every column is compressed on its own, so a scan filters on the id and
+# timestamp columns and only decodes user/action for the rows it returns.
+MAGIC = b'PVAUDIT1'
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(timestamp):
+    return (timestamp - EPOCH) // MICROSECOND
+
+
+def _from_micros(micros):
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+def _dictionary_encode(values):
+    """Repeated strings (users, recurring actions) are stored once"""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype='<u4', count=len(values))
+    return list(index), codes
+
+
+def month_bounds(timestamp):
+    """(first instant of the month, first instant of the next month)"""
+    start = datetime(timestamp.year, timestamp.month, 1)
+    if start.month == 12:
+        return start, datetime(start.year + 1, 1, 1)
+    return start, datetime(start.year, start.month + 1, 1)
+
+
+def write_segment(path, ids, timestamps, users, actions, level=6):
+    """
+    Write one sealed archive segment
+
+    The file is written under a temporary name, fsynced, made read-only and
+    then renamed into place, so readers never see a partial segment.
+
+    Args:
+        path (str): Destination file
+        ids, timestamps, users, actions (list): Columns, in id order
+        level (int): zlib compression level
+
+    Returns:
+        dict: rows, min/max id and timestamp, size_bytes and sha256 of the file
+    """
+    ids = np.asarray(ids, dtype='<i8')
+    micros = np.fromiter((_to_micros(t) for t in timestamps), dtype='<i8', count=len(timestamps))
+    # Ids and timestamps are near-sequential, so their deltas compress well
+    raw = {
+        'id': np.diff(ids, prepend=0).astype('<i8').tobytes(),
+        'timestamp': np.diff(micros, prepend=0).astype('<i8').tobytes()
+    }
+    for name, values in (('user', users), ('action', actions)):
+        dictionary, codes = _dictionary_encode(values)
+        raw[f'{name}.dict'] = json.dumps(dictionary, ensure_ascii=False).encode('utf-8')
+        raw[f'{name}.codes'] = codes.tobytes()
+
+    columns, blobs, offset = {}, [], 0
+    for name, data in raw.items():
+        blob = zlib.compress(data, level)
+        columns[name] = {'offset': offset, 'length': len(blob)}
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps({
+        'version': 1,
+        'rows': len(ids),
+        'min_id': int(ids.min()),
+        'max_id': int(ids.max()),
+        'min_timestamp': _from_micros(micros.min()).isoformat(),
+        'max_timestamp': _from_micros(micros.max()).isoformat(),
+        'columns': columns
+    }).encode('utf-8')
+
+    digest = hashlib.sha256()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        for part in (MAGIC, struct.pack('>I', len(header)), header, *blobs):
+            f.write(part)
+            digest.update(part)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(tmp_path, 0o444)
+    os.replace(tmp_path, path)
+
+    return {
+        'rows': len(ids),
+        'min_id': int(ids.min()),
+        'max_id': int(ids.max()),
+        'min_timestamp': _from_micros(micros.min()),
+        'max_timestamp': _from_micros(micros.max()),
+        'size_bytes': os.path.getsize(path),
+        'sha256': digest.hexdigest()
+    }
+
+
+class ArchiveSegment:
+    """
+    Read-only view of one archive segment
+
+    Decoded columns are kept on the instance; segments are immutable, so
+    instances are shared through ``open_segment``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not an audit archive segment')
+            (length,) = struct.unpack('>I', f.read(4))
+            self.header = json.loads(f.read(length))
+            self._data_offset = len(MAGIC) + 4 + length
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def _blob(self, name):
+        spec = self.header['columns'][name]
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_offset + spec['offset'])
+            return zlib.decompress(f.read(spec['length']))
+
+    def column(self, name):
+        with self._lock:
+            if name not in self._columns:
+                if name in ('id', 'timestamp'):
+                    value = np.cumsum(np.frombuffer(self._blob(name), dtype='<i8'))
+                else:
+                    value = (
+                        json.loads(self._blob(f'{name}.dict')),
+                        np.frombuffer(self._blob(f'{name}.codes'), dtype='<u4')
+                    )
+                self._columns[name] = value
+            return self._columns[name]
+
+    def read(self, start=None, end=None, first_id=None, last_id=None):
+        """
+        Rows matching a timestamp range and/or id range
+
+        Returns:
+            list: (id, timestamp, user, action) tuples in id order
+        """
+        ids = self.column('id')
+        mask = np.ones(len(ids), dtype=bool)
+        if first_id is not None:
+            mask &= ids >= first_id
+        if last_id is not None:
+            mask &= ids <= last_id
+        if start is not None or end is not None:
+            micros = self.column('timestamp')
+            if start is not None:
+                mask &= micros >= _to_micros(start)
+            if end is not None:
+                mask &= micros <= _to_micros(end)
+        selected = np.flatnonzero(mask)
+        if not len(selected):
+            return []
+
+        micros = self.column('timestamp')
+        user_dict, user_codes = self.column('user')
+        action_dict, action_codes = self.column('action')
+        return [
+            (int(ids[i]), _from_micros(micros[i]), user_dict[user_codes[i]], action_dict[action_codes[i]])
+            for i in selected
+        ]
+
+
+@lru_cache(maxsize=4)
+def open_segment(path):
+    """Shared reader for a segment; safe to cache because segments never change"""
+    return ArchiveSegment(path)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+
+# RFC 6962 domain separation: a leaf can never be passed off as an interior node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+GENESIS_HASH = '0' * 64
+
+
+def _sha256(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+    return digest.digest()
+
+
+def entry_leaf(entry_id, timestamp, user, action):
+    """
+    Leaf hash of one audit entry
+
+    The entry is hashed as canonical JSON of its id, ISO timestamp, user and
+    action, so any edit to a stored row changes its leaf.
+
+    Returns:
+        bytes: 32-byte SHA-256 leaf hash
+    """
+    canonical = json.dumps(
+        [entry_id, timestamp.isoformat() if timestamp else None, user, action],
+        separators=(',', ':'), ensure_ascii=False
+    )
+    return _sha256(LEAF_PREFIX, canonical.encode('utf-8'))
+
+
+def hash_leaf(value):
+    """Leaf hash of an already-hex-encoded digest (used for the tree of batches)"""
+    return _sha256(LEAF_PREFIX, bytes.fromhex(value))
+
+
+def _node(left, right):
+    return _sha256(NODE_PREFIX, left, right)
+
+
+def merkle_root(leaves):
+    """
+    Merkle tree hash of a list of leaf hashes (RFC 6962 shape)
+
+    Returns:
+        bytes: Root hash; the hash of the empty string for no leaves
+    """
+    if not leaves:
+        return _sha256(b'')
+    level = list(leaves)
+    # Bottom-up pairing gives the same root as the RFC's recursive split:
+    # an odd node at the end of a level is promoted unchanged
+    while len(level) > 1:
+        paired = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def inclusion_proof(leaves, index):
+    """
+    Audit path for ``leaves[index]``
+
+    Returns:
+        list: [{'side': 'left'|'right', 'hash': hex}, ...] from the leaf up;
+        ``side`` is where the sibling sits
+    """
+    path = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append({
+                'side': 'left' if sibling < index else 'right',
+                'hash': level[sibling].hex()
+            })
+        paired = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+        index //= 2
+    return path
+
+
+def root_from_proof(leaf, path):
+    """Fold an audit path onto a leaf hash and return the implied root"""
+    current = leaf
+    for step in path:
+        sibling = bytes.fromhex(step['hash'])
+        current = _node(sibling, current) if step['side'] == 'left' else _node(current, sibling)
+    return current
+
+
+def chain_hash(prev_hash, root, first_id, last_id):
+    """
+    Link a batch to its predecessor
+
+    Each batch's chain hash covers the previous batch's chain hash, so
+    signing the newest one commits to every batch before it.
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(
+        f'{prev_hash}:{root}:{first_id}:{last_id}'.encode('ascii')
+    ).hexdigest()
+
+
+def checkpoint_message(batch_count, tree_root, head_hash):
+    """The exact string a checkpoint signature covers"""
+    return f'paddockvault-audit-checkpoint:{batch_count}:{tree_root}:{head_hash}'
@@ -0,0 +1,128 @@
+"""
+Serialization CPU time and bytes on the wire for large API payloads
+
+Builds two representative payloads without touching the database:
+
+  listing  GET /api/telemetry for FIA: N file dicts carrying base64 ciphertext
+  decrypt  POST /api/telemetry/decrypt: one large decrypted telemetry document
+
+and measures, for each JSON encoder (Flask's stdlib provider, orjson when
+installed) and each content coding (identity, gzip, brotli when installed),
+the CPU time spent and the bytes that would be sent.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_encoding
+    python -m benchmarks.bench_encoding --files 5000 --file-size 50000 --output encoding.json
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from benchmarks.vault_builder import synthetic_telemetry  # noqa: E402
+from http_encoding import FastJSONProvider, CompressionMiddleware, orjson, brotli  # noqa: E402
+
+
+def build_payloads(files, file_size, seed):
+    rng = np.random.default_rng(seed)
+    created = datetime(2024, 3, 1).isoformat()
+    # Ciphertext is random bytes, so listings compress only as far as base64 allows
+    listing = [
+        {
+            'id': i + 1,
+            'filename': f'team{i % 10:03d}_session_{i:06d}.json',
+            'owner_team': f'team{i % 10:03d}',
+            'classification': 'Public' if i % 10 == 0 else 'Confidential',
+            'content': base64.b64encode(os.urandom(file_size + 16)).decode('ascii'),
+            'created_at': created
+        }
+        for i in range(files)
+    ]
+    decrypt = {'success': True, 'content': synthetic_telemetry(rng, file_size * 50)}
+    return {'listing': listing, 'decrypt': decrypt}
+
+
+def cpu_time(fn, repeat):
+    """Best-of-``repeat`` process CPU seconds for one call"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = fn()
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def encode_stream(body, encoding, level):
+    """Run the body through the middleware's streaming compressor"""
+    middleware = CompressionMiddleware(None, gzip_level=level, brotli_quality=level)
+    return b''.join(middleware._compress([body], encoding))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000, help='Rows in the listing payload')
+    parser.add_argument('--file-size', type=int, default=20000, help='Ciphertext bytes per listed file')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app)
+    codings = [('identity', None), ('gzip', 1), ('gzip', 6)]
+    if brotli is not None:
+        codings += [('br', 4), ('br', 11)]
+
+    payloads = build_payloads(args.files, args.file_size, args.seed)
+    results = []
+    with app.app_context():
+        for payload_name, payload in payloads.items():
+            for provider_name, provider in providers.items():
+                # response() is what jsonify calls: serialize + build the body bytes
+                seconds, response = cpu_time(lambda: provider.response(payload), args.repeat)
+                body = response.get_data()
+                results.append({
+                    'payload': payload_name, 'stage': 'serialize', 'encoder': provider_name,
+                    'cpu_ms': round(seconds * 1000, 2), 'bytes': len(body)
+                })
+
+            body = providers['stdlib'].response(payload).get_data()
+            for coding, level in codings:
+                if coding == 'identity':
+                    seconds, wire = 0.0, body
+                else:
+                    seconds, wire = cpu_time(lambda: encode_stream(body, coding, level), args.repeat)
+                results.append({
+                    'payload': payload_name, 'stage': 'compress', 'encoder': f'{coding}' + (f'-{level}' if level else ''),
+                    'cpu_ms': round(seconds * 1000, 2), 'bytes': len(wire),
+                    'ratio': round(len(wire) / len(body), 3)
+                })
+
+    print(f"{'payload':<9} {'stage':<10} {'encoder':<10} {'cpu ms':>9} {'bytes':>13} {'ratio':>7}")
+    print('-' * 64)
+    for r in results:
+        print(f"{r['payload']:<9} {r['stage']:<10} {r['encoder']:<10} {r['cpu_ms']:>9} {r['bytes']:>13,} {r.get('ratio', ''):>7}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'files': args.files, 'file_size': args.file_size, 'results': results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Latency of GET /api/telemetry/search at vault scale
+
+Fills a temporary SQLite database with N metadata-only file rows (the
+search index never reads ciphertext, so content is left empty), then times
+substring, prefix, filtered and deep-page searches for a team user and for
+FIA through the Flask test client.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --files 1000000 --output search.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.bench_db import percentile  # noqa: E402
+
+TEAMS = ['ferrari', 'mclaren', 'redbull', 'mercedes', 'fia']
+EVENTS = ['bahrain', 'jeddah', 'melbourne', 'suzuka', 'shanghai', 'miami', 'imola', 'monaco',
+          'montreal', 'barcelona', 'spielberg', 'silverstone', 'budapest', 'spa', 'zandvoort', 'monza']
+SESSIONS = ['fp1', 'fp2', 'fp3', 'quali', 'sprint', 'race']
+
+QUERIES = [
+    ('substring', {'q': 'silverst'}),
+    ('substring_rare', {'q': '_0004217'}),
+    ('prefix', {'q': 'ferrari_monaco', 'mode': 'prefix'}),
+    ('filtered', {'q': 'race', 'classification': 'Public', 'owner_team': 'ferrari'}),
+    ('date_range', {'created_after': '2024-03-10T00:00:00', 'created_before': '2024-03-11T00:00:00'}),
+    ('short_substring', {'q': 'sp'}),
+    ('no_match', {'q': 'zandvoort_quali_0000000'}),
+]
+
+
+def fill(app_module, files, seed, batch_size=50000):
+    rng = random.Random(seed)
+    db, TelemetryData = app_module.db, app_module.TelemetryData
+    started = datetime(2024, 3, 1)
+    with app_module.app.app_context():
+        for offset in range(0, files, batch_size):
+            rows = []
+            for i in range(offset, min(files, offset + batch_size)):
+                team = TEAMS[i % len(TEAMS)]
+                rows.append({
+                    'filename': f'{team}_{rng.choice(EVENTS)}_{rng.choice(SESSIONS)}_{i:07d}.json',
+                    'owner_team': team,
+                    'classification': 'Public' if i % 10 == 0 else 'Confidential',
+                    'created_at': started + timedelta(seconds=i * 20)
+                })
+            db.session.execute(db.insert(TelemetryData), rows)
+            db.session.commit()
+            print(f"  inserted {min(files, offset + batch_size):,} files", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='vault_search_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'search.db')}"
+    os.environ['RESET_DB_ON_START'] = '1'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['AUDIT_ARCHIVE_INTERVAL_SECONDS'] = '0'
+    os.environ.setdefault('SCRUB_CPU_BUDGET', '0')
+    import app as app_module
+
+    print(f"Building {args.files:,} files in {tmpdir} (index: {app_module.search_backend})")
+    fill(app_module, args.files, args.seed)
+    client = app_module.app.test_client()
+
+    results = []
+    for user in ('ferrari', 'fia'):
+        headers = {'X-User-Name': user, 'X-User-Team': user}
+        for name, params in QUERIES:
+            samples, hits = [], 0
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get('/api/telemetry/search', query_string=params, headers=headers)
+                samples.append((time.perf_counter() - started) * 1000)
+                hits = len(response.get_json()['results'])
+            # Walk ten pages deep with the cursor to show pages stay flat
+            cursor, deep = None, []
+            for _ in range(10):
+                started = time.perf_counter()
+                page = client.get('/api/telemetry/search', headers=headers,
+                                  query_string=dict(params, cursor=cursor) if cursor else params).get_json()
+                deep.append((time.perf_counter() - started) * 1000)
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+            results.append({
+                'user': user, 'query': name, 'hits': hits,
+                'p50_ms': round(percentile(samples, 50), 2), 'p95_ms': round(percentile(samples, 95), 2),
+                'page10_ms': round(deep[-1], 2)
+            })
+
+    print(f"\n{'user':<8} {'query':<16} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'last page':>10}")
+    print('-' * 60)
+    for r in results:
+        print(f"{r['user']:<8} {r['query']:<16} {r['hits']:>5} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['page10_ms']:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'files': args.files, 'index': app_module.search_backend, 'results': results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
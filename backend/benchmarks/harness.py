@@ -0,0 +1,457 @@
+"""
+Reproducible end-to-end benchmark of the vault's hot paths
+
+Builds a synthetic vault at a configurable scale (teams, files, file size,
+shares, audit rows), then measures latency percentiles and throughput for
+register, login, verify-2fa, list, upload, share, decrypt, verify and
+dashboard requests:
+
+  test_client  in-process through Flask's test client (no network, no WSGI server)
+  server       over HTTP against a real multi-worker server (benchmarks.serve)
+  micro        the raw crypto primitives at the configured file size
+
+Results are written as JSON. Pass --compare with an earlier report to flag
+regressions; the process exits non-zero if any scenario regressed.
+
+Usage (from the backend directory):
+    python -m benchmarks.harness --output bench.json
+    python -m benchmarks.harness --files 2000 --file-size 200000 --audit-rows 200000
+    python -m benchmarks.harness --output new.json --compare bench.json --threshold 0.15
+    python -m benchmarks.harness --against new.json --compare bench.json
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.bench_db import percentile
+
+SCENARIOS = ('register', 'login', 'verify_2fa', 'list', 'upload', 'share', 'decrypt', 'verify', 'dashboard')
+MICRO = ('encrypt_aes_gcm', 'decrypt_aes_gcm', 'sign_data', 'verify_signature')
+MODES = ('test_client', 'server', 'micro')
+
+# Statuses each scenario is expected to return; anything else is an error
+# except 503, which is counted separately as load shedding
+EXPECTED_STATUS = {
+    'register': 201, 'login': 200, 'verify_2fa': 200, 'list': 200, 'upload': 201,
+    'share': 201, 'decrypt': 200, 'verify': 200, 'dashboard': 200,
+}
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RequestFactory:
+    """Builds (method, path, json, headers) tuples for each scenario"""
+
+    def __init__(self, ctx, payloads, run_tag):
+        self.ctx = ctx
+        self.payloads = payloads
+        self.run_tag = run_tag
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def build(self, scenario, rng):
+        ctx = self.ctx
+        team = rng.choice(ctx.teams)
+        headers = {'X-User-Name': team, 'X-User-Team': team}
+
+        if scenario == 'register':
+            name = f'{self.run_tag}{next(self._counter)}'
+            return 'POST', '/api/register', {'team': name, 'password': f'{name}-pw'}, {}
+        if scenario == 'login':
+            return 'POST', '/api/login', {'username': team, 'password': ctx.users[team]['password']}, {}
+        if scenario == 'verify_2fa':
+            import pyotp
+            user = ctx.users[team]
+            code = pyotp.TOTP(user['totp_secret']).now()
+            return 'POST', '/api/verify-2fa', {'user_id': user['id'], 'code': code}, {}
+        if scenario == 'list':
+            return 'GET', '/api/telemetry', None, headers
+        if scenario == 'upload':
+            body = {
+                'filename': f'{self.run_tag}_{next(self._counter)}.json',
+                'content': rng.choice(self.payloads),
+                'classification': 'Confidential'
+            }
+            return 'POST', '/api/telemetry/upload', body, headers
+        if scenario == 'share':
+            owner, file_id, recipient = self._unshared_pair(rng)
+            return 'POST', '/api/telemetry/share', {
+                'file_id': file_id, 'recipient_team': recipient, 'sender_username': owner
+            }, {}
+        if scenario in ('decrypt', 'verify'):
+            file_id = ctx.random_owned_file(rng, team)
+            return 'POST', f'/api/telemetry/{scenario}', {'file_id': file_id, 'username': team}, {}
+        if scenario == 'dashboard':
+            return 'GET', '/api/dashboard', None, {}
+        raise ValueError(f'Unknown scenario: {scenario}')
+
+    def _unshared_pair(self, rng):
+        ctx = self.ctx
+        with self._lock:
+            for _ in range(1000):
+                owner = rng.choice(ctx.teams)
+                file_id = ctx.random_owned_file(rng, owner)
+                recipient = rng.choice(ctx.teams)
+                if file_id and recipient != owner and (file_id, recipient) not in ctx.shares:
+                    ctx.shares.add((file_id, recipient))
+                    return owner, file_id, recipient
+        raise RuntimeError('No unshared (file, team) pairs left; increase --files or --teams')
+
+
+def summarize(latencies, statuses, expected, elapsed):
+    """Latency percentiles (ms) and throughput for one scenario"""
+    ok = [lat for lat, status in zip(latencies, statuses) if status == expected]
+    shed = sum(1 for status in statuses if status == 503)
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        'count': len(latencies),
+        'ok': len(ok),
+        'errors': len(latencies) - len(ok) - shed,
+        'shed': shed,
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed > 0 else None,
+        'mean_ms': ms(sum(ok) / len(ok)) if ok else None,
+        'p50_ms': ms(percentile(ok, 50)),
+        'p95_ms': ms(percentile(ok, 95)),
+        'p99_ms': ms(percentile(ok, 99)),
+        'max_ms': ms(max(ok)) if ok else None,
+    }
+
+
+def run_scenario(scenario, send, factory, iterations, concurrency, warmup, seed):
+    """
+    Issue ``iterations`` requests for one scenario from ``concurrency`` threads
+
+    Args:
+        send (callable): (method, path, body, headers) -> status code; one
+            instance per thread is obtained by calling ``send()`` first
+    """
+    per_thread = [iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency)]
+    warm = max(0, warmup // concurrency)
+
+    def client(idx):
+        rng = random.Random(f'{seed}:{scenario}:{idx}')
+        do = send()
+        latencies, statuses = [], []
+        for i in range(warm + per_thread[idx]):
+            method, path, body, headers = factory.build(scenario, rng)
+            started = time.perf_counter()
+            status = do(method, path, body, headers)
+            elapsed = time.perf_counter() - started
+            if i >= warm:
+                latencies.append(elapsed)
+                statuses.append(status)
+        return latencies, statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for lats, _ in results for lat in lats]
+    statuses = [status for _, sts in results for status in sts]
+    return summarize(latencies, statuses, EXPECTED_STATUS[scenario], elapsed)
+
+
+def test_client_sender(app):
+    def make():
+        client = app.test_client()
+
+        def do(method, path, body, headers):
+            return client.open(path, method=method, json=body, headers=headers).status_code
+        return do
+    return make
+
+
+def http_sender(host, port):
+    def make():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+
+        def do(method, path, body, headers):
+            payload = None
+            headers = dict(headers)
+            if body is not None:
+                payload = json.dumps(body).encode('utf-8')
+                headers['Content-Type'] = 'application/json'
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (ConnectionError, http.client.HTTPException, socket.timeout):
+                conn.close()
+                return 0
+        return do
+    return make
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers, env):
+    """Start benchmarks.serve in its own process group and wait for /api/health"""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.serve', '--port', str(port), '--workers', str(workers)],
+        cwd=BACKEND_DIR, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'Server exited during startup:\n{proc.stderr.read()}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.25)
+    stop_server(proc)
+    raise RuntimeError('Server did not become healthy within 120s')
+
+
+def stop_server(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def run_micro(payload, iterations, seed):
+    """Time the crypto primitives directly, without the executor or HTTP"""
+    from crypto_utils import (
+        generate_rsa_keypair, encrypt_aes_gcm, decrypt_aes_gcm, unwrap_key, sign_data, verify_signature
+    )
+    private_pem, public_pem = generate_rsa_keypair()
+    encrypted = encrypt_aes_gcm(payload, public_pem)
+    aes_key = unwrap_key(private_pem, encrypted['encrypted_key'])
+    signature = sign_data(private_pem, payload)
+
+    calls = {
+        'encrypt_aes_gcm': lambda: encrypt_aes_gcm(payload, public_pem),
+        'decrypt_aes_gcm': lambda: decrypt_aes_gcm(aes_key, encrypted['nonce'], encrypted['ciphertext']),
+        'sign_data': lambda: sign_data(private_pem, payload),
+        'verify_signature': lambda: verify_signature(public_pem, payload, signature),
+    }
+    results = {}
+    for name in MICRO:
+        fn = calls[name]
+        fn()
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - t0)
+        results[name] = summarize(latencies, [0] * len(latencies), 0, time.perf_counter() - started)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(baseline, current, threshold, min_delta_ms):
+    """
+    Compare two reports scenario by scenario
+
+    A scenario regresses when its p50 or p95 grows, or its throughput drops,
+    by more than ``threshold`` (a fraction) and by more than ``min_delta_ms``
+    in absolute terms, so sub-millisecond jitter is not flagged.
+
+    Returns:
+        list: Rows of (mode, scenario, metric, baseline, current, change, regressed)
+    """
+    rows = []
+    for mode, scenarios in current.get('results', {}).items():
+        base_mode = baseline.get('results', {}).get(mode, {})
+        for scenario, stats in scenarios.items():
+            base = base_mode.get(scenario)
+            if not base:
+                continue
+            for metric, higher_is_worse in (('p50_ms', True), ('p95_ms', True), ('throughput_rps', False)):
+                old, new = base.get(metric), stats.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if higher_is_worse:
+                    regressed = change > threshold and (new - old) > min_delta_ms
+                else:
+                    regressed = -change > threshold
+                rows.append((mode, scenario, metric, old, new, change, regressed))
+    return rows
+
+
+def print_results(report):
+    print(f"{'mode':<12} {'scenario':<18} {'n':>6} {'err':>5} {'shed':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print('-' * 90)
+    for mode, scenarios in report['results'].items():
+        for scenario, s in scenarios.items():
+            print(f"{mode:<12} {scenario:<18} {s['count']:>6} {s['errors']:>5} {s['shed']:>5} "
+                  f"{s['throughput_rps'] or '-':>9} {s['p50_ms'] or '-':>9} {s['p95_ms'] or '-':>9} {s['p99_ms'] or '-':>9}")
+
+
+def print_comparison(rows):
+    print(f"{'mode':<12} {'scenario':<18} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}")
+    print('-' * 80)
+    for mode, scenario, metric, old, new, change, regressed in rows:
+        flag = '  REGRESSED' if regressed else ''
+        print(f"{mode:<12} {scenario:<18} {metric:<15} {old:>10} {new:>10} {change:>+7.1%}{flag}")
+
+
+def run(args):
+    """Build the vault and run the requested modes; returns the report dict"""
+    tmpdir = tempfile.mkdtemp(prefix='vault_harness_')
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'vault.db')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RESET_DB_ON_START'] = '1'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # Measure foreground latency without the background scrubber
+    os.environ.setdefault('SCRUB_CPU_BUDGET', '0')
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    import numpy as np
+    import app as app_module
+    from benchmarks.vault_builder import build_vault, synthetic_telemetry
+
+    print(f"Building vault: {args.teams} teams, {args.files} files x ~{args.file_size}B, "
+          f"{args.shares} shares, {args.audit_rows} audit rows...")
+    started = time.perf_counter()
+    ctx = build_vault(
+        app_module, teams=args.teams, files=args.files, file_size=args.file_size,
+        shares=args.shares, audit_rows=args.audit_rows, seed=args.seed
+    )
+    build_seconds = time.perf_counter() - started
+
+    np_rng = np.random.default_rng(args.seed + 1)
+    payloads = [synthetic_telemetry(np_rng, args.file_size) for _ in range(8)]
+    modes = [m for m in args.modes.split(',') if m]
+    scenarios = [s for s in args.scenarios.split(',') if s]
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'database': database_url.split(':', 1)[0],
+            'seed': args.seed,
+            'scale': {
+                'teams': args.teams, 'files': args.files, 'file_size': args.file_size,
+                'shares': args.shares, 'audit_rows': args.audit_rows,
+            },
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'build_seconds': round(build_seconds, 2),
+        },
+        'results': {}
+    }
+
+    for mode in modes:
+        if mode == 'micro':
+            print(f"Running micro ({args.iterations} iterations per primitive)...")
+            report['results']['micro'] = run_micro(payloads[0], args.iterations, args.seed)
+            continue
+
+        if mode == 'test_client':
+            sender = test_client_sender(app_module.app)
+            server = None
+        elif mode == 'server':
+            env = dict(os.environ, RESET_DB_ON_START='0')
+            server, port = start_server(args.workers, env)
+            sender = http_sender('127.0.0.1', port)
+        else:
+            raise ValueError(f'Unknown mode: {mode}')
+
+        try:
+            factory = RequestFactory(ctx, payloads, run_tag=f'bench{mode[0]}')
+            report['results'][mode] = {}
+            for scenario in scenarios:
+                print(f"Running {mode}/{scenario} ({args.iterations} requests, {args.concurrency} threads)...")
+                report['results'][mode][scenario] = run_scenario(
+                    scenario, sender, factory, args.iterations, args.concurrency, args.warmup, args.seed
+                )
+        finally:
+            if server is not None:
+                stop_server(server)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=10)
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--file-size', type=int, default=20000, help='Approximate plaintext bytes per file')
+    parser.add_argument('--shares', type=int, default=200)
+    parser.add_argument('--audit-rows', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated subset of: ' + ', '.join(MODES))
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--iterations', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=16, help='Unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--workers', type=int, default=4, help='Server worker processes')
+    parser.add_argument('--database-url', help='Benchmark against this database (it is reset!)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier report to compare against')
+    parser.add_argument('--against', metavar='REPORT', help='Compare this existing report instead of running')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative slowdown (0.2 = 20%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='Ignore latency changes smaller than this')
+    args = parser.parse_args()
+
+    if args.against:
+        with open(args.against) as f:
+            report = json.load(f)
+    else:
+        report = run(args)
+        print()
+        print_results(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('scale') != report.get('meta', {}).get('scale'):
+            print("\nWarning: baseline was run at a different vault scale", file=sys.stderr)
+        rows = compare(baseline, report, args.threshold, args.min_delta_ms)
+        print()
+        print_comparison(rows)
+        regressions = [row for row in rows if row[-1]]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == '__main__':
+    main()
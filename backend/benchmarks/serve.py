@@ -0,0 +1,93 @@
+"""
+Run the vault API under a real multi-worker HTTP server
+
+Uses gunicorn when it is installed; otherwise falls back to a small pre-fork
+server that shares one listening socket between N werkzeug worker processes.
+Each worker imports the app after forking, so every worker gets its own
+database pool and crypto executor exactly as under gunicorn.
+
+The database is never reset here: point DATABASE_URL at an existing vault.
+
+Usage (from the backend directory):
+    python -m benchmarks.serve --port 5050 --workers 4
+"""
+import argparse
+import os
+import shutil
+import signal
+import socket
+import sys
+
+
+def serve_gunicorn(host, port, workers, threads):
+    os.execvp('gunicorn', [
+        'gunicorn', 'app:app',
+        '--bind', f'{host}:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--log-level', 'warning'
+    ])
+
+
+def serve_prefork(host, port, workers):
+    """Fork ``workers`` threaded werkzeug servers accepting on one socket"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(256)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            from werkzeug.serving import make_server
+            from app import app
+            server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+            server.serve_forever()
+            os._exit(0)
+        children.append(pid)
+
+    def shutdown(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+    parser.add_argument('--server', choices=('auto', 'gunicorn', 'prefork'), default='auto')
+    args = parser.parse_args()
+
+    os.environ['RESET_DB_ON_START'] = '0'
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+
+    server = args.server
+    if server == 'auto':
+        server = 'gunicorn' if shutil.which('gunicorn') else 'prefork'
+    if server == 'gunicorn':
+        os.chdir(backend_dir)
+        serve_gunicorn(args.host, args.port, args.workers, args.threads)
+    else:
+        serve_prefork(args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
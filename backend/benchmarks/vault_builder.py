@@ -0,0 +1,185 @@
+"""
+Synthetic vault generation shared by the benchmark harness and loaders
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+CLASSIFICATIONS = ('Confidential', 'Confidential', 'Confidential', 'Public')
+# Rough JSON bytes per 100 Hz frame across all channels below
+BYTES_PER_FRAME = 95
+
+
+def synthetic_telemetry(rng, size_bytes=20000, hz=100):
+    """
+    Generate a plausible lap-telemetry JSON document of roughly ``size_bytes``
+
+    Channels: t, distance, speed, throttle, brake, rpm, gear, lap, sector,
+    laid out as a JSON object of equal-length arrays (the layout the
+    analytics endpoints read).
+
+    Args:
+        rng (np.random.Generator): Random source
+        size_bytes (int): Approximate document size
+        hz (int): Sample rate
+
+    Returns:
+        str: JSON document
+    """
+    frames = max(16, int(size_bytes) // BYTES_PER_FRAME)
+    t = np.arange(frames) / hz
+    lap_length = 90.0
+    phase = 2 * np.pi * t / lap_length * 6
+    speed = 180 + 120 * np.sin(phase + rng.uniform(0, np.pi)) ** 2 + rng.normal(0, 2, frames)
+    throttle = np.clip(np.diff(speed, prepend=speed[0]) * 40 + 60, 0, 100)
+    brake = np.clip(-np.diff(speed, prepend=speed[0]) * 30, 0, 100)
+    distance = np.cumsum(speed / 3.6 / hz)
+    lap = (t // lap_length + 1).astype(int)
+    sector = ((t % lap_length) // (lap_length / 3) + 1).astype(int)
+    gear = np.clip((speed // 45).astype(int) + 1, 1, 8)
+    rpm = 6000 + (speed % 45) * 150
+
+    return json.dumps({
+        't': np.round(t, 2).tolist(),
+        'distance': np.round(distance, 1).tolist(),
+        'speed': np.round(speed, 1).tolist(),
+        'throttle': np.round(throttle, 1).tolist(),
+        'brake': np.round(brake, 1).tolist(),
+        'rpm': np.round(rpm).astype(int).tolist(),
+        'gear': gear.tolist(),
+        'lap': lap.tolist(),
+        'sector': sector.tolist()
+    }, separators=(',', ':'))
+
+
+def team_names(count):
+    """Team names for synthetic users (the five default teams come first)"""
+    defaults = ['fia', 'ferrari', 'mclaren', 'redbull', 'mercedes']
+    extra = [f'team{i:03d}' for i in range(max(0, count - len(defaults)))]
+    return (defaults + extra)[:max(count, 1)]
+
+
+class VaultContext:
+    """Handles into a built vault that benchmark scenarios draw from"""
+
+    def __init__(self):
+        self.teams = []             # team names
+        self.users = {}             # team -> {'id', 'password', 'totp_secret'}
+        self.files = {}             # team -> [file ids owned]
+        self.shares = set()         # (file_id, recipient team)
+
+    def random_owned_file(self, rng, team):
+        owned = self.files.get(team)
+        return rng.choice(owned) if owned else None
+
+
+def build_vault(app_module, teams=5, files=200, file_size=20000, shares=100, audit_rows=10000, seed=1):
+    """
+    Populate the configured database with a synthetic vault
+
+    Users are created through the normal ``User`` model (so they get real key
+    pairs and TOTP secrets); files are signed and encrypted through the app's
+    crypto executor and bulk-inserted; audit rows are bulk-inserted directly.
+
+    Args:
+        app_module: The imported ``app`` module
+        teams, files, file_size, shares, audit_rows (int): Vault scale
+        seed (int): RNG seed for reproducible vaults
+
+    Returns:
+        VaultContext
+    """
+    from werkzeug.security import generate_password_hash
+    from crypto_utils import sign_data, encrypt_aes_gcm, rewrap_key
+
+    app, db = app_module.app, app_module.db
+    User, TelemetryData = app_module.User, app_module.TelemetryData
+    SharedAccess, AuditLog = app_module.SharedAccess, app_module.AuditLog
+    crypto = app_module.crypto
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    ctx = VaultContext()
+
+    with app.app_context():
+        for team in team_names(teams):
+            password = f'{team}123'
+            user = User.query.filter_by(username=team, team=team).first()
+            if user is None:
+                user = User(username=team, password=generate_password_hash(password), team=team)
+                db.session.add(user)
+                db.session.commit()
+            ctx.teams.append(team)
+            ctx.users[team] = {'id': user.id, 'password': password, 'totp_secret': user.totp_secret}
+            ctx.files[team] = []
+
+        keys = {u.team: (u.private_key, u.public_key, u.id) for u in User.query.all()}
+
+        rows = []
+        for i in range(files):
+            team = ctx.teams[i % len(ctx.teams)]
+            private_key, public_key, _ = keys[team]
+            plaintext = synthetic_telemetry(np_rng, file_size)
+            encrypted = crypto.run('gcm_encrypt', encrypt_aes_gcm, plaintext, public_key)
+            rows.append({
+                'filename': f'{team}_session_{i:06d}.json',
+                'owner_team': team,
+                'classification': rng.choice(CLASSIFICATIONS),
+                'content': encrypted['ciphertext'],
+                'nonce': encrypted['nonce'],
+                'encrypted_aes_key': encrypted['encrypted_key'],
+                'digital_signature': crypto.run('rsa_sign', sign_data, private_key, plaintext)
+            })
+            if len(rows) >= 500:
+                db.session.execute(db.insert(TelemetryData), rows)
+                db.session.commit()
+                rows = []
+        if rows:
+            db.session.execute(db.insert(TelemetryData), rows)
+            db.session.commit()
+
+        for file_id, owner in db.session.query(TelemetryData.id, TelemetryData.owner_team).all():
+            if owner in ctx.files:
+                ctx.files[owner].append(file_id)
+
+        share_rows = []
+        attempts = 0
+        all_files = [(fid, team) for team, fids in ctx.files.items() for fid in fids]
+        while all_files and len(share_rows) < shares and attempts < shares * 10 and len(ctx.teams) > 1:
+            attempts += 1
+            file_id, owner = rng.choice(all_files)
+            recipient = rng.choice(ctx.teams)
+            if recipient == owner or (file_id, recipient) in ctx.shares:
+                continue
+            encrypted_key = db.session.get(TelemetryData, file_id).encrypted_aes_key
+            share_rows.append({
+                'file_id': file_id,
+                'shared_with_user_id': keys[recipient][2],
+                'encrypted_key': crypto.run('rsa_rewrap', rewrap_key, keys[owner][0], encrypted_key, keys[recipient][1])
+            })
+            ctx.shares.add((file_id, recipient))
+        if share_rows:
+            db.session.execute(db.insert(SharedAccess), share_rows)
+            db.session.commit()
+
+        actions = ('User Logged In', 'Accessed Telemetry Repository', 'Decrypted content of {}', 'Verified integrity of {}')
+        start = datetime.utcnow() - timedelta(days=60)
+        batch = []
+        for i in range(audit_rows):
+            team = rng.choice(ctx.teams)
+            batch.append({
+                'timestamp': start + timedelta(seconds=i * (60 * 86400 / max(audit_rows, 1))),
+                'user': team,
+                'action': rng.choice(actions).format(f'{team}_session.json')
+            })
+            if len(batch) >= 5000:
+                db.session.execute(db.insert(AuditLog), batch)
+                db.session.commit()
+                batch = []
+        if batch:
+            db.session.execute(db.insert(AuditLog), batch)
+            db.session.commit()
+
+    return ctx
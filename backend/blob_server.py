@@ -0,0 +1,171 @@
+"""
+Local stand-in for an S3-compatible object store
+
+Serves the subset of the S3 REST API the blob store uses, with path-style
+addressing: PUT/HEAD/DELETE on ``/<bucket>`` and PUT/GET/HEAD/DELETE on
+``/<bucket>/<key>``, plus ListObjectsV2 for garbage collection. Request
+signatures are accepted but not checked, so any credentials work. Objects
+are plain files under ``--root``.
+
+Usage (from the backend directory):
+    python blob_server.py --root ./s3data --port 9000
+    BLOB_STORE=s3 BLOB_S3_BUCKET=vault BLOB_S3_ENDPOINT=http://localhost:9000 \\
+        AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x python app.py
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from werkzeug.serving import run_simple
+from werkzeug.wrappers import Request, Response
+from werkzeug.http import http_date
+from werkzeug.wsgi import wrap_file
+
+
+def _error(status, code, message):
+    body = f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code><Message>{escape(message)}</Message></Error>'
+    return Response(body, status=status, mimetype='application/xml')
+
+
+def _decode_aws_chunked(stream):
+    """
+    Strip aws-chunked framing (used by newer SDKs for streaming checksums)
+
+    Each chunk is ``<hex size>[;chunk-signature=...]\\r\\n<data>\\r\\n``; a
+    zero-size chunk is followed by optional trailer headers.
+    """
+    while True:
+        header = stream.readline()
+        if not header:
+            return
+        size = int(header.split(b';', 1)[0].strip(), 16)
+        if size == 0:
+            return
+        remaining = size
+        while remaining:
+            data = stream.read(min(remaining, 1024 * 1024))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+        stream.read(2)
+
+
+class ObjectServer:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, bucket, key=''):
+        path = os.path.abspath(os.path.join(self.root, bucket, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError('path escapes the root')
+        return path
+
+    def __call__(self, environ, start_response):
+        request = Request(environ)
+        parts = request.path.lstrip('/').split('/', 1)
+        bucket = parts[0]
+        key = parts[1] if len(parts) > 1 else ''
+        try:
+            if not bucket:
+                response = _error(400, 'InvalidBucketName', 'Bucket name required')
+            elif not key:
+                response = self.bucket_request(request, bucket)
+            else:
+                response = self.object_request(request, bucket, key)
+        except ValueError as e:
+            response = _error(400, 'InvalidArgument', str(e))
+        return response(environ, start_response)
+
+    def bucket_request(self, request, bucket):
+        path = self._path(bucket)
+        if request.method == 'PUT':
+            os.makedirs(path, exist_ok=True)
+            return Response(status=200)
+        if not os.path.isdir(path):
+            return _error(404, 'NoSuchBucket', bucket)
+        if request.method == 'HEAD':
+            return Response(status=200)
+        if request.method == 'DELETE':
+            os.rmdir(path)
+            return Response(status=204)
+        if request.method == 'GET':
+            return self.list_objects(request, bucket, path)
+        return _error(405, 'MethodNotAllowed', request.method)
+
+    def list_objects(self, request, bucket, path):
+        prefix = request.args.get('prefix', '')
+        keys = sorted(
+            key for key in (
+                os.path.relpath(os.path.join(dirpath, name), path).replace(os.sep, '/')
+                for dirpath, _, names in os.walk(path) for name in names if not name.endswith('.tmp')
+            ) if key.startswith(prefix)
+        )
+        contents = ''.join(
+            f'<Contents><Key>{escape(key)}</Key><Size>{os.path.getsize(os.path.join(path, key))}</Size></Contents>'
+            for key in keys
+        )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f'<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>'
+            f'<KeyCount>{len(keys)}</KeyCount><IsTruncated>false</IsTruncated>{contents}</ListBucketResult>'
+        )
+        return Response(body, mimetype='application/xml')
+
+    def object_request(self, request, bucket, key):
+        if not os.path.isdir(self._path(bucket)):
+            return _error(404, 'NoSuchBucket', bucket)
+        path = self._path(bucket, key)
+
+        if request.method == 'PUT':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            chunked = 'aws-chunked' in request.headers.get('Content-Encoding', '')
+            source = _decode_aws_chunked(request.stream) if chunked else iter(lambda: request.stream.read(1024 * 1024), b'')
+            digest = hashlib.md5()
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                for data in source:
+                    digest.update(data)
+                    f.write(data)
+            os.replace(tmp_path, path)
+            return Response(status=200, headers={'ETag': f'"{digest.hexdigest()}"'})
+
+        if not os.path.isfile(path):
+            if request.method == 'HEAD':
+                return Response(status=404)
+            return _error(404, 'NoSuchKey', key)
+
+        if request.method == 'DELETE':
+            os.remove(path)
+            return Response(status=204)
+        if request.method in ('GET', 'HEAD'):
+            size = os.path.getsize(path)
+            mtime = os.path.getmtime(path)
+            headers = {
+                'Content-Length': str(size),
+                'ETag': f'"{int(mtime)}-{size}"',
+                'Last-Modified': http_date(mtime)
+            }
+            if request.method == 'HEAD':
+                return Response(status=200, headers=headers, content_type='application/octet-stream')
+            body = wrap_file(request.environ, open(path, 'rb'))
+            return Response(body, headers=headers, content_type='application/octet-stream', direct_passthrough=True)
+        return _error(405, 'MethodNotAllowed', request.method)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default='s3data', help='Directory holding buckets')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    args = parser.parse_args()
+    os.makedirs(args.root, exist_ok=True)
+    print(f"Serving S3 stand-in from {os.path.abspath(args.root)} on http://{args.host}:{args.port}")
+    run_simple(args.host, args.port, ObjectServer(args.root), threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from crypto_utils import decrypt_aes_gcm_buffer
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # optional: only needed for BLOB_STORE=s3
+    boto3 = None
+
+REF_PREFIX = 'sha256:'
+# Garbage collection leaves blobs written within this window alone, since a
+# blob is stored before the row that references it commits. put() refreshes
+# the modification time of content it finds already stored.
+GC_GRACE_SECONDS = 24 * 3600
+# S3 objects cannot be touched; re-put existing content older than this
+S3_REFRESH_SECONDS = 3600
+
+
+class BlobNotFound(Exception):
+    """Raised when a blob reference has no stored object"""
+
+
+def _digest(ref):
+    if not ref.startswith(REF_PREFIX):
+        raise ValueError(f'Not a blob reference: {ref}')
+    return ref[len(REF_PREFIX):]
+
+
+class LocalBlobStore:
+    """
+    Content-addressed blobs in a local directory
+
+    A blob lives at ``<root>/ab/cd/<sha256>``. Identical ciphertext is stored
+    once, writes are atomic (temp file + rename) and reads are memory-mapped,
+    so a decrypt never copies the ciphertext into a Python string.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, ref):
+        digest = _digest(ref)
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data):
+        """
+        Store bytes and return their reference
+
+        Returns:
+            tuple: (ref, size)
+        """
+        ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+        path = self.path(ref)
+        try:
+            # Already stored: mark it as in use again for the GC grace window
+            os.utime(path)
+        except FileNotFoundError:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # A temp file per call, so concurrent puts of the same content never share one
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    os.fchmod(f.fileno(), 0o644)  # mkstemp creates 0600
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+        return ref, len(data)
+
+    @contextmanager
+    def open(self, ref):
+        """Yield a read-only memoryview over the blob, backed by mmap"""
+        try:
+            f = open(self.path(ref), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(ref)
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+    def read(self, ref):
+        with self.open(ref) as view:
+            return bytes(view)
+
+    def exists(self, ref):
+        return os.path.exists(self.path(ref))
+
+    def modified(self, ref):
+        """Epoch seconds of the blob's last put, or None if it is not stored"""
+        try:
+            return os.path.getmtime(self.path(ref))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, ref):
+        try:
+            os.remove(self.path(ref))
+        except FileNotFoundError:
+            pass
+
+    def iter_refs(self):
+        """Every stored reference (used by garbage collection)"""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith('.tmp'):
+                    yield REF_PREFIX + name
+
+
+class S3BlobStore:
+    """
+    Content-addressed blobs in an S3-compatible bucket
+
+    Works against AWS S3, MinIO, or the ``blob_server.py`` stand-in (path-style
+    addressing is used whenever an endpoint URL is given). Objects are keyed
+    by ``<prefix>ab/<sha256>``. Reads arrive over HTTP, so ``open`` yields a
+    memoryview over the downloaded body rather than an mmap.
+    """
+
+    def __init__(self, bucket, endpoint_url=None, prefix='', region=None):
+        if boto3 is None:
+            raise RuntimeError('BLOB_STORE=s3 requires the boto3 package')
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.prefix = prefix
+        self.region = region
+        self._client = None
+
+    def __getstate__(self):
+        # Clients are not picklable; crypto workers build their own
+        state = dict(self.__dict__)
+        state['_client'] = None
+        return state
+
+    @property
+    def client(self):
+        if self._client is None:
+            config = BotoConfig(s3={'addressing_style': 'path'}) if self.endpoint_url else None
+            self._client = boto3.client('s3', endpoint_url=self.endpoint_url, region_name=self.region, config=config)
+        return self._client
+
+    def key(self, ref):
+        digest = _digest(ref)
+        return f'{self.prefix}{digest[:2]}/{digest}'
+
+    def put(self, data):
+        ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+        modified = self.modified(ref)
+        if modified is None or time.time() - modified > S3_REFRESH_SECONDS:
+            self.client.put_object(Bucket=self.bucket, Key=self.key(ref), Body=bytes(data))
+        return ref, len(data)
+
+    @contextmanager
+    def open(self, ref):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.key(ref))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                raise BlobNotFound(ref)
+            raise
+        view = memoryview(response['Body'].read())
+        try:
+            yield view
+        finally:
+            view.release()
+
+    def read(self, ref):
+        with self.open(ref) as view:
+            return bytes(view)
+
+    def exists(self, ref):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(ref))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+                return False
+            raise
+
+    def modified(self, ref):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.key(ref))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+                return None
+            raise
+        return response['LastModified'].timestamp()
+
+    def delete(self, ref):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(ref))
+
+    def iter_refs(self):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                yield REF_PREFIX + obj['Key'].rsplit('/', 1)[-1]
+
+
+def make_blob_store(kind, directory, bucket=None, endpoint_url=None, prefix='', region=None):
+    """
+    Build the configured store
+
+    Args:
+        kind (str): 'local' or 's3' ('inline' also reads through the local store)
+    """
+    if kind == 's3':
+        if not bucket:
+            raise RuntimeError('BLOB_STORE=s3 requires BLOB_S3_BUCKET')
+        return S3BlobStore(bucket, endpoint_url, prefix, region)
+    return LocalBlobStore(directory)
+
+
+def decrypt_blob(store, ref, aes_key, nonce_b64):
+    """
+    Decrypt a stored ciphertext+tag blob
+
+    Runs on the crypto executor: the worker maps the blob itself, so only
+    the reference crosses the process boundary, and GCM reads straight
+    from the mapping.
+
+    Returns:
+        str: Decrypted UTF-8 plaintext
+    """
+    with store.open(ref) as view:
+        return decrypt_aes_gcm_buffer(aes_key, nonce_b64, view)
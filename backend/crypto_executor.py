@@ -0,0 +1,211 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from crypto_utils import run_instrumented
+
+# Admission limit (running + queued) and timeout in seconds per operation
+DEFAULT_OPERATIONS = {
+    'rsa_keygen': {'queue': 8, 'timeout': 15.0},
+    'rsa_sign': {'queue': 32, 'timeout': 5.0},
+    'rsa_verify': {'queue': 32, 'timeout': 5.0},
+    'rsa_unwrap': {'queue': 32, 'timeout': 5.0},
+    'rsa_rewrap': {'queue': 16, 'timeout': 5.0},
+    'gcm_encrypt': {'queue': 16, 'timeout': 30.0},
+    'gcm_decrypt': {'queue': 16, 'timeout': 30.0},
+}
+
+
+class CryptoBusy(Exception):
+    """The crypto executor is saturated; the client should retry later"""
+
+    def __init__(self, op, retry_after, message=None):
+        super().__init__(message or f'Crypto queue full for {op}')
+        self.op = op
+        self.retry_after = retry_after
+
+
+class CryptoTimeout(CryptoBusy):
+    """A crypto operation did not finish within its timeout"""
+
+    def __init__(self, op, retry_after):
+        super().__init__(op, retry_after, f'Crypto operation {op} timed out')
+
+
+class _InlineExecutor:
+    """Executor that runs work on the calling thread (debugging / tests)"""
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def operations_from_env(environ=None):
+    """
+    Per-operation limits with ``CRYPTO_QUEUE_<OP>`` / ``CRYPTO_TIMEOUT_<OP>`` overrides
+
+    e.g. ``CRYPTO_QUEUE_GCM_DECRYPT=4`` or ``CRYPTO_TIMEOUT_RSA_SIGN=2.5``
+    """
+    environ = os.environ if environ is None else environ
+    operations = {}
+    for op, cfg in DEFAULT_OPERATIONS.items():
+        operations[op] = {
+            'queue': int(environ.get(f'CRYPTO_QUEUE_{op.upper()}', cfg['queue'])),
+            'timeout': float(environ.get(f'CRYPTO_TIMEOUT_{op.upper()}', cfg['timeout']))
+        }
+    return operations
+
+
+def _noop():
+    return os.getpid()
+
+
+class CryptoExecutor:
+    """
+    Bounded executor for RSA and AES-GCM work
+
+    Each operation has its own admission limit: once that many calls of the
+    operation are running or queued, new calls fail fast with ``CryptoBusy``
+    instead of piling up behind the pool. Callers wait at most the operation's
+    timeout for a result. Because a saturated operation stops admitting work,
+    cheap endpoints that never touch crypto keep their latency under load.
+
+    Modes:
+        process - ``ProcessPoolExecutor`` (fork), keeps RSA/GCM off the GIL
+        thread  - ``ThreadPoolExecutor`` (platforms without fork)
+        inline  - run on the request thread, admission limits still apply
+
+    If ``observer`` is given it is called as ``observer(op, seconds, timings)``
+    after each successful call, where ``seconds`` includes queueing and
+    ``timings`` are the per-primitive timings measured inside the worker.
+    """
+
+    def __init__(self, mode=None, workers=None, operations=None, retry_after=1, observer=None):
+        if mode is None:
+            mode = 'process' if 'fork' in multiprocessing.get_all_start_methods() else 'thread'
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 2
+        self.retry_after = retry_after
+        self.operations = {op: dict(cfg) for op, cfg in (operations or DEFAULT_OPERATIONS).items()}
+        self._semaphores = {op: threading.BoundedSemaphore(cfg['queue']) for op, cfg in self.operations.items()}
+        self._lock = threading.Lock()
+        self._stats = {op: {'submitted': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0, 'in_flight': 0} for op in self.operations}
+        self._pool = None
+        self.observer = observer
+
+    def _make_pool(self):
+        if self.mode == 'process':
+            # Fork spawns every worker up front (see warm_up), before the
+            # server starts its request threads
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('fork')
+            )
+        if self.mode == 'thread':
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='crypto')
+        return _InlineExecutor()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._make_pool()
+            return self._pool
+
+    def warm_up(self):
+        """Start the worker processes now rather than on the first request"""
+        self._get_pool().submit(_noop).result()
+
+    def run(self, op, fn, *args):
+        """
+        Run ``fn(*args)`` on the executor under ``op``'s limits
+
+        Raises:
+            CryptoBusy: If ``op`` already has its maximum calls in flight
+            CryptoTimeout: If the result is not ready within ``op``'s timeout
+        """
+        semaphore = self._semaphores[op]
+        stats = self._stats[op]
+        if not semaphore.acquire(blocking=False):
+            with self._lock:
+                stats['rejected'] += 1
+            raise CryptoBusy(op, self.retry_after)
+
+        with self._lock:
+            stats['submitted'] += 1
+            stats['in_flight'] += 1
+
+        def release(_future):
+            with self._lock:
+                stats['in_flight'] -= 1
+            semaphore.release()
+
+        started = time.perf_counter()
+        try:
+            if self.observer is not None:
+                future = self._submit(run_instrumented, (fn,) + args)
+            else:
+                future = self._submit(fn, args)
+        except Exception:
+            release(None)
+            raise
+        # The slot is freed when the work really finishes, not when the caller
+        # gives up, so timed-out work still counts against the limit
+        future.add_done_callback(release)
+
+        try:
+            result = future.result(timeout=self.operations[op]['timeout'])
+        except FuturesTimeout:
+            future.cancel()
+            with self._lock:
+                stats['timeouts'] += 1
+            raise CryptoTimeout(op, self.retry_after)
+        except BrokenProcessPool:
+            with self._lock:
+                stats['errors'] += 1
+                self._pool = None
+            raise
+
+        if self.observer is None:
+            return result
+        result, timings = result
+        self.observer(op, time.perf_counter() - started, timings)
+        return result
+
+    def _submit(self, fn, args):
+        pool = self._get_pool()
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool once
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            return self._get_pool().submit(fn, *args)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'workers': self.workers,
+                'operations': {
+                    op: dict(self._stats[op], limit=self.operations[op]['queue'], timeout=self.operations[op]['timeout'])
+                    for op in self.operations
+                }
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,367 @@
+import base64
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+
+# Every function in this module is a pure, picklable top-level function so it
+# can run inside the crypto process pool. Nothing here touches Flask or the DB.
+
+logger = logging.getLogger('paddockvault.crypto')
+
+# Per-primitive timings are only collected inside run_instrumented; otherwise
+# _timed is a no-op apart from one attribute lookup.
+_local = threading.local()
+
+
+class KeyUnwrapError(Exception):
+    """The RSA-wrapped AES key could not be decrypted"""
+
+
+class ContentDecryptError(Exception):
+    """AES-GCM decryption or tag verification failed"""
+
+
+@contextmanager
+def _timed(primitive):
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((primitive, time.perf_counter() - started))
+
+
+def run_instrumented(fn, *args):
+    """
+    Run a crypto function and collect its per-primitive timings
+
+    Returns:
+        tuple: (result, [(primitive, seconds), ...])
+    """
+    _local.timings = []
+    try:
+        result = fn(*args)
+        return result, _local.timings
+    finally:
+        _local.timings = None
+
+
+def generate_rsa_keypair():
+    """
+    Generate a 2048-bit RSA key pair
+
+    Returns:
+        tuple: (private_key_pem, public_key_pem) as str
+    """
+    with _timed('rsa_keygen'):
+        private_key = rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048,
+            backend=default_backend()
+        )
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode('utf-8')
+
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+
+    return private_pem, public_pem
+
+
+# Parsing a PEM private key re-runs RSA key validation (tens of ms), which
+# dwarfs the signing or unwrapping itself. Each process keeps the parsed keys
+# for the teams it has recently served.
+@lru_cache(maxsize=128)
+def _load_private_key(private_key_pem):
+    with _timed('pem_load'):
+        return serialization.load_pem_private_key(
+            private_key_pem.encode('utf-8'),
+            password=None,
+            backend=default_backend()
+        )
+
+
+@lru_cache(maxsize=128)
+def _load_public_key(public_key_pem):
+    with _timed('pem_load'):
+        return serialization.load_pem_public_key(
+            public_key_pem.encode('utf-8'),
+            backend=default_backend()
+        )
+
+
+def encrypt_aes_gcm(plaintext, rsa_public_key_pem):
+    """
+    Encrypt plaintext using AES-GCM and wrap the AES key with RSA public key
+
+    Args:
+        plaintext (str): The content to encrypt
+        rsa_public_key_pem (str): RSA public key in PEM format
+
+    Returns:
+        dict: {
+            'ciphertext': Base64-encoded encrypted content,
+            'encrypted_key': Base64-encoded RSA-encrypted AES key,
+            'nonce': Base64-encoded GCM nonce
+        }
+    """
+    aes_key, encrypted_key = generate_wrapped_key(rsa_public_key_pem)
+    sealed = encrypt_with_key(aes_key, plaintext)
+    sealed['encrypted_key'] = encrypted_key
+    return sealed
+
+
+def generate_wrapped_key(rsa_public_key_pem):
+    """
+    Generate a fresh AES-256 key and wrap it with an RSA public key
+
+    Returns:
+        tuple: (raw AES key bytes, Base64-encoded RSA-wrapped key)
+    """
+    aes_key = os.urandom(32)
+    public_key = _load_public_key(rsa_public_key_pem)
+    with _timed('rsa_wrap'):
+        encrypted_aes_key = public_key.encrypt(
+            aes_key,
+            padding.PKCS1v15()
+        )
+    return aes_key, base64.b64encode(encrypted_aes_key).decode('utf-8')
+
+
+def encrypt_with_key(aes_key, plaintext):
+    """
+    AES-GCM encrypt plaintext under an existing key with a fresh nonce
+
+    Args:
+        aes_key (bytes): Raw AES key
+        plaintext (str | bytes): The content to encrypt (str is UTF-8 encoded)
+
+    Returns:
+        dict: {'ciphertext': Base64 ciphertext + tag, 'nonce': Base64 nonce}
+    """
+    nonce = os.urandom(12)
+    if isinstance(plaintext, str):
+        plaintext = plaintext.encode('utf-8')
+
+    with _timed('gcm_encrypt'):
+        cipher = Cipher(
+            algorithms.AES(aes_key),
+            modes.GCM(nonce),
+            backend=default_backend()
+        )
+        encryptor = cipher.encryptor()
+        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+
+    # Tag is appended to the ciphertext
+    ciphertext_with_tag = ciphertext + encryptor.tag
+
+    return {
+        'ciphertext': base64.b64encode(ciphertext_with_tag).decode('utf-8'),
+        'nonce': base64.b64encode(nonce).decode('utf-8')
+    }
+
+
+def decrypt_aes_gcm(aes_key, nonce_b64, ciphertext_b64):
+    """
+    Decrypt Base64 AES-GCM content (ciphertext with the 16-byte tag appended)
+
+    Args:
+        aes_key (bytes): Raw AES key
+        nonce_b64 (str): Base64-encoded GCM nonce
+        ciphertext_b64 (str): Base64-encoded ciphertext + tag
+
+    Returns:
+        str: Decrypted UTF-8 plaintext
+
+    Raises:
+        ContentDecryptError: If the tag does not verify or the content is corrupt
+    """
+    try:
+        ciphertext_with_tag = base64.b64decode(ciphertext_b64)
+    except Exception as e:
+        raise ContentDecryptError(str(e) or type(e).__name__)
+    return decrypt_aes_gcm_buffer(aes_key, nonce_b64, ciphertext_with_tag)
+
+
+def decrypt_aes_gcm_buffer(aes_key, nonce_b64, ciphertext_with_tag):
+    """
+    Decrypt raw ciphertext + tag from any bytes-like object
+
+    Accepts a memoryview (e.g. over an mmap'd blob); the ciphertext is
+    sliced, not copied, on its way into the cipher.
+
+    Returns:
+        str: Decrypted UTF-8 plaintext
+
+    Raises:
+        ContentDecryptError: If the tag does not verify or the content is corrupt
+    """
+    plaintext = decrypt_gcm_bytes(aes_key, nonce_b64, ciphertext_with_tag)
+    try:
+        return plaintext.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise ContentDecryptError(str(e))
+
+
+def decrypt_gcm_bytes(aes_key, nonce_b64, ciphertext_with_tag):
+    """
+    decrypt_aes_gcm_buffer for binary payloads (e.g. version deltas)
+
+    Returns:
+        bytes: Decrypted plaintext
+    """
+    try:
+        view = memoryview(ciphertext_with_tag)
+        nonce = base64.b64decode(nonce_b64)
+
+        with _timed('gcm_decrypt'):
+            cipher = Cipher(
+                algorithms.AES(aes_key),
+                modes.GCM(nonce, bytes(view[-16:])),
+                backend=default_backend()
+            )
+            decryptor = cipher.decryptor()
+            body = view[:-16]
+            try:
+                return decryptor.update(body) + decryptor.finalize()
+            finally:
+                body.release()
+                view.release()
+    except Exception as e:
+        raise ContentDecryptError(str(e) or type(e).__name__)
+
+
+def decrypt_many(aes_key, items):
+    """
+    Decrypt several (nonce_b64, ciphertext_b64) pairs sealed under one key
+
+    Lets a caller decrypt a run of segments in a single executor call.
+
+    Returns:
+        list: Plaintexts in input order
+    """
+    return [decrypt_aes_gcm(aes_key, nonce_b64, ciphertext_b64) for nonce_b64, ciphertext_b64 in items]
+
+
+def unwrap_key(private_key_pem, encrypted_key_b64):
+    """
+    Decrypt an RSA-wrapped (PKCS#1 v1.5) AES key
+
+    Returns:
+        bytes: Raw AES key
+
+    Raises:
+        KeyUnwrapError: If the key was not wrapped for this private key
+    """
+    try:
+        private_key = _load_private_key(private_key_pem)
+        with _timed('rsa_unwrap'):
+            return private_key.decrypt(
+                base64.b64decode(encrypted_key_b64),
+                padding.PKCS1v15()
+            )
+    except Exception as e:
+        raise KeyUnwrapError(str(e) or type(e).__name__)
+
+
+def rewrap_key(private_key_pem, encrypted_key_b64, recipient_public_key_pem):
+    """
+    Re-wrap an AES key for another user without exposing it to the caller
+
+    Returns:
+        str: Base64-encoded AES key wrapped with the recipient's public key
+    """
+    aes_key = unwrap_key(private_key_pem, encrypted_key_b64)
+    public_key = _load_public_key(recipient_public_key_pem)
+    with _timed('rsa_wrap'):
+        wrapped = public_key.encrypt(
+            aes_key,
+            padding.PKCS1v15()
+        )
+    return base64.b64encode(wrapped).decode('utf-8')
+
+
+def sign_data(private_key_pem, data):
+    """
+    Sign data using RSA-SHA256 digital signature
+
+    Args:
+        private_key_pem (str): RSA private key in PEM format
+        data (str): The plaintext data to sign
+
+    Returns:
+        str: Base64-encoded signature
+    """
+    private_key = _load_private_key(private_key_pem)
+
+    with _timed('rsa_sign'):
+        signature = private_key.sign(
+            data.encode('utf-8'),
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            hashes.SHA256()
+        )
+
+    return base64.b64encode(signature).decode('utf-8')
+
+
+def verify_signature(public_key_pem, data, signature_b64):
+    """
+    Verify RSA-SHA256 digital signature
+
+    Args:
+        public_key_pem (str): RSA public key in PEM format
+        data (str): The plaintext data that was signed
+        signature_b64 (str): Base64-encoded signature
+
+    Returns:
+        bool: True if signature is valid, False otherwise
+    """
+    try:
+        public_key = _load_public_key(public_key_pem)
+        signature = base64.b64decode(signature_b64)
+
+        with _timed('rsa_verify'):
+            public_key.verify(
+                signature,
+                data.encode('utf-8'),
+                padding.PSS(
+                    mgf=padding.MGF1(hashes.SHA256()),
+                    salt_length=padding.PSS.MAX_LENGTH
+                ),
+                hashes.SHA256()
+            )
+
+        return True
+    except Exception as e:
+        logger.debug("Signature verification failed: %s", e)
+        return False
+
+
+def verify_many(public_key_pem, items):
+    """
+    Verify several (data, signature_b64) pairs against one public key
+
+    Returns:
+        list: One bool per item
+    """
+    return [verify_signature(public_key_pem, data, signature_b64) for data, signature_b64 in items]
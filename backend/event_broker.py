@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+
+from flask import json
+
+
+class BrokerFull(Exception):
+    """Raised when the broker already has its maximum number of subscribers"""
+
+
+class Subscription:
+    """One connected client: a bounded buffer of pending events"""
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.lagged = False
+        self._events = deque()
+        self._cond = threading.Condition()
+
+    def put(self, event):
+        with self._cond:
+            if len(self._events) >= self.maxlen:
+                # A consumer this far behind gets a resync instead of an
+                # unbounded backlog; it refetches state and carries on
+                self._events.clear()
+                self.lagged = True
+            else:
+                self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for events
+
+        Returns:
+            tuple: (events, lagged) - lagged is True once after an overflow
+        """
+        with self._cond:
+            if not self._events and not self.lagged:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            lagged, self.lagged = self.lagged, False
+            return events, lagged
+
+
+class EventBroker:
+    """
+    In-process fan-out of events to server-sent-event subscribers
+
+    Publishing appends the event to every subscriber's bounded buffer and
+    returns; it never blocks on a slow client. With no subscribers a publish
+    is a single length check.
+    """
+
+    def __init__(self, buffer_size=256, max_subscribers=500):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise BrokerFull(f'{self.max_subscribers} subscribers already connected')
+            subscription = Subscription(self.buffer_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data, event_id=None):
+        if not self._subscribers:
+            return
+        event = format_event(event_type, data, event_id)
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            if subscription.lagged:
+                continue
+            subscription.put((event_id, event))
+            if subscription.lagged:
+                with self._lock:
+                    self.overflows += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'overflows': self.overflows
+            }
+
+
+def format_event(event_type, data, event_id=None):
+    """Encode one event in the text/event-stream wire format"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,177 @@
+import zlib
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import parse_accept_header
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Content types worth compressing; event streams are excluded because each
+# event must reach the client as soon as it is written
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'image/svg+xml', 'text/plain', 'text/html', 'text/csv', 'text/css'
+)
+CHUNK_SIZE = 64 * 1024
+
+
+def json_backend(name=None):
+    """
+    Resolve the JSON_ENCODER setting to the encoder that will actually run
+
+    Args:
+        name (str): 'orjson', 'stdlib' or None/'auto' (orjson when installed)
+
+    Returns:
+        str: 'orjson' or 'stdlib'
+    """
+    if name == 'stdlib' or orjson is None:
+        return 'stdlib'
+    return 'orjson'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+
+    orjson is several times faster than the stdlib encoder on large lists of
+    dicts and returns bytes, so responses skip the str -> bytes copy. Types
+    orjson does not know (Decimal, UUID, dataclasses, ...) go through Flask's
+    usual ``default`` hook. Keys are not sorted; calls that pass stdlib-only
+    keyword arguments fall back to the stdlib encoder.
+    """
+
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options),
+            mimetype=self.mimetype
+        )
+
+
+def available_encodings():
+    """Content codings this server can produce, in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick a content coding from an Accept-Encoding header
+
+    Returns:
+        str: 'br', 'gzip' or None for identity
+    """
+    if not accept_encoding:
+        return None
+    # Highest client quality wins; ties go to the first server preference
+    return parse_accept_header(accept_encoding).best_match(available_encodings())
+
+
+class _Compressor:
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=brotli_quality)
+            self.compress, self.finish = self._obj.process, self._obj.finish
+        else:
+            # wbits=31: gzip container around deflate
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self.compress, self.finish = self._obj.compress, self._obj.flush
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware that gzip/brotli-encodes large responses on the fly
+
+    The body is compressed chunk by chunk as the application yields it, so
+    streamed responses stay streamed and a large buffered body is never held
+    twice (plain and compressed) in memory. Responses with a known length
+    below ``min_size`` and non-compressible or already-encoded responses pass
+    through untouched.
+    """
+
+    def __init__(self, app, min_size=1024, gzip_level=1, brotli_quality=4, path_prefix='/api/'):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.path_prefix = path_prefix
+
+    def __call__(self, environ, start_response):
+        encoding = None
+        if environ.get('PATH_INFO', '').startswith(self.path_prefix) and environ.get('REQUEST_METHOD') != 'HEAD':
+            encoding = negotiate_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        chosen = []
+
+        def _start_response(status, headers, exc_info=None):
+            if self._should_compress(status, headers):
+                headers = [(k, v) for k, v in headers if k.lower() != 'content-length']
+                headers.append(('Content-Encoding', encoding))
+                chosen.append(encoding)
+            if self._is_compressible(headers):
+                headers = self._add_vary(headers)
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.app(environ, _start_response)
+        if not chosen:
+            return app_iter
+        return self._compress(app_iter, chosen[0])
+
+    def _is_compressible(self, headers):
+        content_type = next((v for k, v in headers if k.lower() == 'content-type'), '')
+        return content_type.split(';', 1)[0].strip().lower() in COMPRESSIBLE_TYPES
+
+    def _should_compress(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        names = {k.lower(): v for k, v in headers}
+        if 'content-encoding' in names or not self._is_compressible(headers):
+            return False
+        length = names.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+    @staticmethod
+    def _add_vary(headers):
+        for i, (key, value) in enumerate(headers):
+            if key.lower() == 'vary':
+                if 'accept-encoding' not in value.lower():
+                    headers[i] = (key, f'{value}, Accept-Encoding')
+                return headers
+        return headers + [('Vary', 'Accept-Encoding')]
+
+    def _compress(self, app_iter, encoding):
+        compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+        try:
+            for chunk in app_iter:
+                for start in range(0, len(chunk), CHUNK_SIZE):
+                    out = compressor.compress(chunk[start:start + CHUNK_SIZE])
+                    if out:
+                        yield out
+            yield compressor.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
@@ -0,0 +1,212 @@
+import logging
+import os
+import threading
+import time
+
+from crypto_utils import (
+    unwrap_key, decrypt_aes_gcm, verify_signature, KeyUnwrapError, ContentDecryptError
+)
+from blob_store import decrypt_blob, BlobNotFound
+from version_delta import replay_versions, DeltaError
+
+logger = logging.getLogger('paddockvault.scrub')
+
+OK = 'ok'
+# Verdicts other than OK, roughly in the order a check fails
+FAILURES = ('no_owner', 'key_error', 'missing_blob', 'decrypt_failed', 'unsigned', 'bad_signature', 'error')
+
+_lowered = False
+
+
+def _lower_priority(niceness):
+    """Renice a pool worker once, so the OS schedules foreground work first"""
+    global _lowered
+    if not _lowered and niceness and hasattr(os, 'nice'):
+        try:
+            os.nice(niceness)
+        except OSError:
+            pass
+    _lowered = True
+
+
+def _check_file(store, keys, item):
+    owner = keys.get(item['owner_team'])
+    if owner is None:
+        return 'no_owner', f"No user holds the key of team {item['owner_team']}"
+    private_key, public_key = owner
+    try:
+        aes_key = unwrap_key(private_key, item['encrypted_aes_key'])
+    except KeyUnwrapError as e:
+        return 'key_error', str(e)
+
+    if item['versions'] is not None:
+        return _check_versions(store, aes_key, public_key, item['versions'])
+
+    # A live session is one (nonce, content, signature) per sealed segment
+    if item['segments'] is not None:
+        parts = item['segments']
+    elif item['blob_ref']:
+        parts = [(item['nonce'], None, item['digital_signature'])]
+    else:
+        parts = [(item['nonce'], item['content'], item['digital_signature'])]
+
+    for index, (nonce, content, signature) in enumerate(parts):
+        where = f'segment {index}: ' if item['segments'] is not None else ''
+        try:
+            if content is None:
+                plaintext = decrypt_blob(store, item['blob_ref'], aes_key, nonce)
+            else:
+                plaintext = decrypt_aes_gcm(aes_key, nonce, content)
+        except BlobNotFound:
+            return 'missing_blob', f"{item['blob_ref']} is not in the blob store"
+        except ContentDecryptError as e:
+            return 'decrypt_failed', f'{where}{e}'
+        if not signature:
+            return 'unsigned', f'{where}no owner signature'
+        if not verify_signature(public_key, plaintext, signature):
+            return 'bad_signature', f'{where}owner signature does not match the content'
+    return OK, None
+
+
+def _check_versions(store, aes_key, public_key, versions):
+    """Replay a versioned file from version 1 and check every version's signature"""
+    if not versions:
+        return 'decrypt_failed', 'no stored versions'
+    replay = replay_versions(store, aes_key, [part[:4] for part in versions])
+    number = 0
+    try:
+        for number, (content, part) in enumerate(zip(replay, versions), start=1):
+            signature = part[4]
+            if not signature:
+                return 'unsigned', f'version {number}: no owner signature'
+            if not verify_signature(public_key, content.decode('utf-8'), signature):
+                return 'bad_signature', f'version {number}: owner signature does not match the content'
+    except BlobNotFound as e:
+        return 'missing_blob', f'version {number + 1}: {e} is not in the blob store'
+    except (ContentDecryptError, DeltaError, UnicodeDecodeError) as e:
+        return 'decrypt_failed', f'version {number + 1}: {e}'
+    return OK, None
+
+
+def check_files(store, keys, items, niceness=0):
+    """
+    Check the GCM tag and owner signature of a batch of files
+
+    Runs on the scrub pool. The owner's private key unwraps each file key,
+    so every check proves the stored ciphertext, nonce, wrapped key and
+    signature still belong together.
+
+    Args:
+        store: Blob store holding the ciphertext of rows with a blob_ref
+        keys (dict): owner_team -> (private_key_pem, public_key_pem)
+        items (list): dicts with id, owner_team, encrypted_aes_key, nonce,
+            content, blob_ref, digital_signature, segments (a list of
+            (nonce, content, signature) for live sessions, else None) and
+            versions ((kind, nonce, content, blob_ref, signature) per
+            version of a versioned file, else None)
+        niceness (int): Added to the worker's nice value on first use
+
+    Returns:
+        list: (file_id, status, detail) in input order
+    """
+    _lower_priority(niceness)
+    results = []
+    for item in items:
+        try:
+            status, detail = _check_file(store, keys, item)
+        except Exception as e:
+            status, detail = 'error', str(e) or type(e).__name__
+        results.append((item['id'], status, detail))
+    return results
+
+
+class IntegrityScrubber:
+    """
+    Background loop that checks the vault a batch at a time
+
+    ``run_batch()`` does one unit of work and returns the number of files it
+    checked; 0 means there is nothing to do right now. After each batch the
+    loop sleeps long enough to keep the pool's share of the host CPU at
+    ``cpu_budget``, and it waits while ``busy()`` reports foreground crypto
+    work in flight.
+
+    Args:
+        run_batch (callable): Checks the next batch, returns files checked
+        cpu_budget (float): Fraction of all host CPUs the scrub pool may use
+        workers (int): Scrub pool processes (each uses up to one CPU)
+        idle_interval (float): Seconds to wait when there is nothing to check
+        busy (callable): Returns True while foreground work should go first
+    """
+
+    def __init__(self, run_batch, cpu_budget=0.1, workers=1, idle_interval=60.0, busy=None, tick=0.05):
+        self.run_batch = run_batch
+        self.cpu_budget = cpu_budget
+        self.workers = workers
+        self.idle_interval = idle_interval
+        self.busy = busy
+        self.tick = tick
+        self._stop = threading.Event()
+        self._thread = None
+        self.files_checked = 0
+        self.batches = 0
+        self.errors = 0
+        self.work_seconds = 0.0
+        self.throttle_seconds = 0.0
+        self.started_at = None
+        self.last_batch_rate = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self.started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name='integrity-scrubber', daemon=True)
+            self._thread.start()
+
+    def pause_for(self, work_seconds):
+        """Sleep needed after ``work_seconds`` of pool work to stay within the budget"""
+        share = self.workers / max(1, os.cpu_count() or 1)
+        if self.cpu_budget >= share:
+            return 0.0
+        return work_seconds * (share / self.cpu_budget - 1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.busy is not None and self.busy():
+                self._stop.wait(self.tick)
+                continue
+            started = time.perf_counter()
+            try:
+                checked = self.run_batch()
+            except Exception as e:
+                self.errors += 1
+                logger.error("Integrity scrub batch failed: %s", e)
+                self._stop.wait(self.idle_interval)
+                continue
+            elapsed = time.perf_counter() - started
+            if not checked:
+                self._stop.wait(self.idle_interval)
+                continue
+            self.files_checked += checked
+            self.batches += 1
+            self.work_seconds += elapsed
+            self.last_batch_rate = checked / elapsed if elapsed else 0.0
+            pause = self.pause_for(elapsed)
+            self.throttle_seconds += pause
+            self._stop.wait(pause)
+
+    def shutdown(self):
+        self._stop.set()
+
+    def stats(self):
+        running = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'files_checked': self.files_checked,
+            'batches': self.batches,
+            'errors': self.errors,
+            # Throughput while checking, and averaged over the throttled run
+            'batch_files_per_sec': round(self.last_batch_rate, 2),
+            'files_per_sec': round(self.files_checked / running, 2) if running else 0.0,
+            'work_seconds': round(self.work_seconds, 3),
+            'throttle_seconds': round(self.throttle_seconds, 3),
+            'cpu_budget': self.cpu_budget
+        }
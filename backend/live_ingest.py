@@ -0,0 +1,239 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger('paddockvault.live')
+
+
+class IngestBackpressure(Exception):
+    """A session's unsealed buffer is full; the sender should slow down"""
+
+    def __init__(self, file_id, buffered):
+        super().__init__(f'Session {file_id} has {buffered} unsealed frames buffered')
+        self.file_id = file_id
+        self.buffered = buffered
+
+
+class SegmentConflict(Exception):
+    """
+    The seq being sealed is already stored (another worker sealed it)
+
+    ``last_seq`` is the newest stored seq to continue after, or None if the
+    session can no longer be continued here (e.g. it was closed elsewhere).
+    """
+
+    def __init__(self, file_id, seq, last_seq):
+        super().__init__(f'Segment {seq} of session {file_id} already exists')
+        self.file_id = file_id
+        self.seq = seq
+        self.last_seq = last_seq
+
+
+class LiveSession:
+    """
+    In-memory state of one open live session
+
+    Frames accumulate in ``frames`` until the ingestor seals them into the
+    next segment. The session's AES key is held here for the lifetime of the
+    session so sealing needs no RSA work; only the per-segment signature does.
+    """
+
+    def __init__(self, file_id, owner_team, aes_key, private_key, next_seq=0):
+        self.file_id = file_id
+        self.owner_team = owner_team
+        self.aes_key = aes_key
+        self.private_key = private_key
+        self.last_seq = next_seq - 1
+        self.closed = False
+        self.frames = []
+        self.bytes = 0
+        self.oldest = None
+        self.lock = threading.Lock()
+        # Held while a segment is being sealed so seq numbers stay in order
+        self.seal_lock = threading.Lock()
+        self.sealed = threading.Condition()
+
+
+class LiveIngestor:
+    """
+    Buffers live frames per session and seals them into segments
+
+    A background thread seals a session's buffer once it holds
+    ``max_frames`` frames or ``max_bytes`` bytes, or its oldest frame is
+    ``max_age`` seconds old. ``seal(session, seq, frames)`` does the actual
+    encrypt/sign/insert; if it raises, the frames go back to the front of
+    the buffer and are retried on the next tick. If it raises
+    SegmentConflict the session is rebased after the stored segments and
+    the seal retried at once, or dropped when it cannot be continued.
+    """
+
+    def __init__(self, seal, max_frames=1000, max_bytes=256 * 1024, max_age=1.0, max_buffered=20000, tick=0.05):
+        self.seal = seal
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_buffered = max_buffered
+        self.tick = tick
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.frames_received = 0
+        self.segments_sealed = 0
+        self.seal_errors = 0
+
+    def get(self, file_id):
+        return self._sessions.get(file_id)
+
+    def get_or_open(self, file_id, load):
+        """Return the live session, calling ``load()`` to rebuild it if it is not in memory"""
+        session = self._sessions.get(file_id)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(file_id)
+            if session is None:
+                session = load()
+                if session is not None:
+                    self._register(session)
+            return session
+
+    def register(self, session):
+        with self._lock:
+            self._register(session)
+
+    def _register(self, session):
+        self._sessions[session.file_id] = session
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='live-sealer', daemon=True)
+            self._thread.start()
+
+    def append(self, session, frames, nbytes):
+        """
+        Buffer frames for sealing
+
+        Returns:
+            int: Frames now buffered for the session
+
+        Raises:
+            IngestBackpressure: If the session already holds ``max_buffered`` frames
+        """
+        with session.lock:
+            buffered = len(session.frames)
+            if buffered + len(frames) > self.max_buffered:
+                raise IngestBackpressure(session.file_id, buffered)
+            session.frames.extend(frames)
+            session.bytes += nbytes
+            if session.oldest is None:
+                session.oldest = time.monotonic()
+            buffered = len(session.frames)
+            due = buffered >= self.max_frames or session.bytes >= self.max_bytes
+        self.frames_received += len(frames)
+        if due:
+            self._wake.set()
+        return buffered
+
+    def close(self, session):
+        """Seal whatever is buffered and forget the session"""
+        self.flush(session)
+        session.closed = True
+        with self._lock:
+            self._sessions.pop(session.file_id, None)
+        with session.sealed:
+            session.sealed.notify_all()
+
+    def _drop(self, session):
+        """Forget a session's in-memory state; the next request reloads it from the database"""
+        session.closed = True
+        with self._lock:
+            if self._sessions.get(session.file_id) is session:
+                del self._sessions[session.file_id]
+        with session.sealed:
+            session.sealed.notify_all()
+
+    def flush(self, session):
+        """Seal the session's buffer now, on the calling thread"""
+        with session.seal_lock:
+            with session.lock:
+                frames, session.frames = session.frames, []
+                nbytes, session.bytes = session.bytes, 0
+                oldest, session.oldest = session.oldest, None
+            if not frames:
+                return
+            while True:
+                seq = session.last_seq + 1
+                try:
+                    self.seal(session, seq, frames)
+                    break
+                except SegmentConflict as e:
+                    self.seal_errors += 1
+                    if e.last_seq is not None and e.last_seq >= seq:
+                        logger.warning("Segment %s of session %s was sealed elsewhere; continuing after %s",
+                                       seq, session.file_id, e.last_seq)
+                        session.last_seq = e.last_seq
+                        continue
+                    logger.error("Dropping live session %s state (%d unsealed frames): %s",
+                                 session.file_id, len(frames), e)
+                    self._drop(session)
+                    raise
+                except Exception:
+                    with session.lock:
+                        session.frames = frames + session.frames
+                        session.bytes += nbytes
+                        session.oldest = oldest
+                    self.seal_errors += 1
+                    raise
+            session.last_seq = seq
+            self.segments_sealed += 1
+        with session.sealed:
+            session.sealed.notify_all()
+
+    def wait_for(self, session, after_seq, timeout):
+        """Block until a segment newer than ``after_seq`` is sealed or the session closes"""
+        with session.sealed:
+            session.sealed.wait_for(lambda: session.last_seq > after_seq or session.closed, timeout)
+
+    def _due(self, session, now):
+        with session.lock:
+            if not session.frames:
+                return False
+            return (len(session.frames) >= self.max_frames or session.bytes >= self.max_bytes
+                    or now - session.oldest >= self.max_age)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.tick)
+            self._wake.clear()
+            now = time.monotonic()
+            for session in list(self._sessions.values()):
+                if self._due(session, now):
+                    try:
+                        self.flush(session)
+                    except Exception as e:
+                        logger.warning("Sealing segment for session %s failed, will retry: %s", session.file_id, e)
+
+    def shutdown(self):
+        """Seal every open buffer (called at exit so acknowledged frames are kept)"""
+        self._stop.set()
+        for session in list(self._sessions.values()):
+            try:
+                self.flush(session)
+            except Exception as e:
+                logger.error("Could not seal session %s at shutdown: %s", session.file_id, e)
+
+    def stats(self):
+        sessions = list(self._sessions.values())
+        return {
+            'sessions': len(sessions),
+            'buffered_frames': sum(len(s.frames) for s in sessions),
+            'frames_received': self.frames_received,
+            'segments_sealed': self.segments_sealed,
+            'seal_errors': self.seal_errors
+        }
+
+
+def join_frame_arrays(plaintexts):
+    """Concatenate JSON-array segment plaintexts into one JSON array without parsing"""
+    bodies = [p.strip()[1:-1].strip() for p in plaintexts]
+    return '[' + ','.join(b for b in bodies if b) + ']'
@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+# Attributes present on every LogRecord; anything else came in via ``extra``
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra={...}`` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Configure the ``paddockvault`` logger from ``LOG_LEVEL`` / ``LOG_FORMAT``
+
+    Call sites use %-style arguments (``logger.debug("x=%s", x)``), so
+    messages below the configured level are never formatted.
+
+    Args:
+        level (str): DEBUG, INFO, WARNING, ... (default: LOG_LEVEL or INFO)
+        fmt (str): 'json' or 'text' (default: LOG_FORMAT or text)
+
+    Returns:
+        logging.Logger: The application logger
+    """
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.environ.get('LOG_FORMAT', 'text')).lower()
+
+    logger = logging.getLogger('paddockvault')
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        if fmt == 'json':
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
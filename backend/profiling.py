@@ -0,0 +1,199 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+
+
+def _label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})'
+
+
+def _apportion(total, weights):
+    """Split ``total`` samples over ``weights`` (largest remainder), keeping the sum exact"""
+    weight = sum(weights)
+    if not weight:
+        return [0] * len(weights)
+    shares = [total * w / weight for w in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler for a single thread
+
+    A daemon thread wakes every ``interval`` seconds, snapshots the target
+    thread's stack via ``sys._current_frames()`` and counts identical stacks.
+    The profiled code runs untouched (no tracing hooks), so overhead is one
+    stack walk per interval regardless of how many calls the request makes.
+
+    Work handed to another process only shows up as a wait. Calls reported
+    through ``record_crypto`` carry the worker's per-primitive timings, and
+    ``folded()`` splits the samples spent waiting on each call site into
+    synthetic child frames, one per primitive.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.crypto_calls = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[';'.join(stack)] += 1
+            self.samples += 1
+
+    def record_crypto(self, op, seconds, timings, anchor):
+        """
+        Attach one executor call made on the profiled thread
+
+        Must be called on that thread while ``anchor`` (the code object of
+        the executor's dispatch method) is on the stack.
+
+        Args:
+            op (str): Executor operation name
+            seconds (float): Call latency including queueing and transfer
+            timings (list): (primitive, seconds) measured in the worker
+            anchor: Code object whose frame marks the call site
+        """
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_code is not anchor:
+            frame = frame.f_back
+        if frame is None:
+            return
+        callers = []
+        caller = frame.f_back
+        while caller is not None:
+            callers.append(_label(caller))
+            caller = caller.f_back
+        prefix = ';'.join(reversed(callers))
+        anchor_label = f'{anchor.co_name} ({os.path.basename(anchor.co_filename)}:'
+        self.crypto_calls.append((prefix, anchor_label, op, seconds, list(timings)))
+
+    def crypto_summary(self):
+        """Per-call crypto timings in milliseconds, in call order"""
+        return [
+            {
+                'op': op,
+                'ms': round(seconds * 1000, 3),
+                'primitives': [{'primitive': name, 'ms': round(elapsed * 1000, 3)} for name, elapsed in timings]
+            }
+            for _, _, op, seconds, timings in self.crypto_calls
+        ]
+
+    def _attribute_crypto(self):
+        """Stack counts with executor waits replaced by per-primitive child frames"""
+        stacks = Counter(self.stacks)
+        sites = {}
+        for prefix, anchor_label, op, seconds, timings in self.crypto_calls:
+            sites.setdefault((prefix, anchor_label), []).append((op, seconds, timings))
+        for (prefix, anchor_label), calls in sites.items():
+            head = f'{prefix};{anchor_label}' if prefix else anchor_label
+            waiting = [stack for stack in stacks if stack.startswith(head)]
+            total = sum(stacks[stack] for stack in waiting)
+            if not total:
+                continue
+            site = waiting[0].split(';')[prefix.count(';') + 1 if prefix else 0]
+            for stack in waiting:
+                del stacks[stack]
+            segments = []
+            for op, seconds, timings in calls:
+                for name, elapsed in timings:
+                    segments.append((op, name, elapsed))
+                # Queueing, pickling and result transfer
+                overhead = seconds - sum(elapsed for _, elapsed in timings)
+                if overhead > 0:
+                    segments.append((op, 'dispatch', overhead))
+            counts = _apportion(total, [elapsed for _, _, elapsed in segments])
+            base = f'{prefix};{site}' if prefix else site
+            for (op, name, _), count in zip(segments, counts):
+                if count:
+                    stacks[f'{base};{op} [crypto worker];{name}'] += count
+        return stacks
+
+    def folded(self):
+        """Collapsed-stack text, one ``frame;frame;... count`` line per stack
+
+        This is the input format of flamegraph.pl, speedscope and inferno.
+        """
+        stacks = self._attribute_crypto() if self.crypto_calls else self.stacks
+        return '\n'.join(f'{stack} {count}' for stack, count in stacks.most_common()) + '\n'
+
+
+class ProfileStore:
+    """Ring buffer of recent request profiles, optionally mirrored to disk"""
+
+    def __init__(self, maxlen=50, directory=None):
+        self.directory = directory
+        self._profiles = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def add(self, sampler, method, route, status, reason):
+        profile = {
+            'id': uuid.uuid4().hex[:12],
+            'method': method,
+            'route': route,
+            'status': status,
+            'reason': reason,
+            'captured_at': datetime.utcnow().isoformat(),
+            'duration_ms': round(sampler.duration * 1000, 3),
+            'interval_ms': round(sampler.interval * 1000, 3),
+            'samples': sampler.samples,
+            'crypto': sampler.crypto_summary(),
+            'folded': sampler.folded()
+        }
+        if self.directory:
+            profile['path'] = os.path.join(self.directory, f"{profile['id']}.folded")
+            with open(profile['path'], 'w') as f:
+                f.write(profile['folded'])
+
+        with self._lock:
+            if len(self._profiles) == self._profiles.maxlen:
+                evicted = self._profiles[0]
+                if evicted.get('path') and os.path.exists(evicted['path']):
+                    os.remove(evicted['path'])
+            self._profiles.append(profile)
+        return profile
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != 'folded'} for p in reversed(self._profiles)]
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
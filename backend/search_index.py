@@ -0,0 +1,121 @@
+import logging
+
+from sqlalchemy import Integer, column, func, table, text
+
+logger = logging.getLogger('paddockvault.search')
+
+# Shortest substring the trigram indexes can answer; shorter ones scan
+MIN_TRIGRAM_LENGTH = 3
+
+SEARCH_TABLE = table('telemetry_search', column('rowid', Integer))
+
+_SQLITE_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS telemetry_search_ai AFTER INSERT ON telemetry_data BEGIN
+        INSERT INTO telemetry_search(rowid, filename) VALUES (new.id, new.filename);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS telemetry_search_ad AFTER DELETE ON telemetry_data BEGIN
+        INSERT INTO telemetry_search(telemetry_search, rowid, filename) VALUES ('delete', old.id, old.filename);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS telemetry_search_au AFTER UPDATE OF filename ON telemetry_data BEGIN
+        INSERT INTO telemetry_search(telemetry_search, rowid, filename) VALUES ('delete', old.id, old.filename);
+        INSERT INTO telemetry_search(rowid, filename) VALUES (new.id, new.filename);
+    END""",
+)
+
+
+def install_search_index(engine):
+    """
+    Create the filename search index for the engine's backend
+
+    SQLite gets an FTS5 trigram table over telemetry_data.filename, kept in
+    sync by triggers so every insert path (upload, seed, bulk loaders)
+    updates it incrementally. PostgreSQL gets a pg_trgm GIN index, which
+    serves both prefix and substring LIKE patterns.
+
+    Returns:
+        str: 'fts5', 'pg_trgm' or 'like' (no substring index available)
+    """
+    if engine.dialect.name == 'sqlite':
+        return _install_fts5(engine)
+    if engine.dialect.name == 'postgresql':
+        return _install_pg_trgm(engine)
+    return 'like'
+
+
+def _install_fts5(engine):
+    with engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE name LIKE 'telemetry_search%'"
+            ))
+        }
+        try:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS telemetry_search USING fts5("
+                "filename, content='telemetry_data', content_rowid='id', tokenize='trigram')"
+            ))
+        except Exception as e:
+            logger.warning("FTS5 trigram search unavailable, falling back to LIKE: %s", e)
+            return 'like'
+        for statement in _SQLITE_TRIGGERS:
+            conn.execute(text(statement))
+        # Triggers vanish with telemetry_data (e.g. after a reset), so a
+        # table without them may be stale: rebuild it from the content table
+        if 'telemetry_search_ai' not in existing:
+            conn.execute(text("INSERT INTO telemetry_search(telemetry_search) VALUES ('rebuild')"))
+            logger.info("Rebuilt telemetry search index")
+    return 'fts5'
+
+
+def _install_pg_trgm(engine):
+    try:
+        with engine.begin() as conn:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            conn.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_telemetry_filename_trgm '
+                'ON telemetry_data USING gin (lower(filename) gin_trgm_ops)'
+            ))
+    except Exception as e:
+        logger.warning("pg_trgm search index unavailable, falling back to LIKE: %s", e)
+        return 'like'
+    return 'pg_trgm'
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def apply_filename_search(query, backend, model, search_text, mode='substring'):
+    """
+    Restrict a TelemetryData query to filenames matching ``search_text``
+
+    Matching is case-insensitive. On FTS5 the query is joined to the
+    trigram table and must be ordered and paginated on its rowid: SQLite
+    then walks the index newest-first and stops at the page limit, instead
+    of collecting every match and sorting. Text shorter than three
+    characters has no trigrams and falls back to a LIKE scan, which also
+    stops early for common short terms.
+
+    Args:
+        query (Query): Listing query over ``model``
+        backend (str): Value returned by install_search_index
+        model: TelemetryData
+        search_text (str): Text to find
+        mode (str): 'prefix' or 'substring'
+
+    Returns:
+        tuple: (query, key) - key is the id column to order and paginate on
+    """
+    needle = _escape_like(search_text.lower())
+    pattern = f'{needle}%' if mode == 'prefix' else f'%{needle}%'
+    like = func.lower(model.filename).like(pattern, escape='\\')
+
+    if backend == 'fts5' and len(search_text) >= MIN_TRIGRAM_LENGTH:
+        phrase = '"' + search_text.replace('"', '""') + '"'
+        query = query.join(SEARCH_TABLE, SEARCH_TABLE.c.rowid == model.id).filter(
+            text('telemetry_search MATCH :phrase').bindparams(phrase=phrase)
+        )
+        if mode == 'prefix':
+            query = query.filter(like)
+        return query, SEARCH_TABLE.c.rowid
+    return query.filter(like), model.id
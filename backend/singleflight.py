@@ -0,0 +1,85 @@
+import threading
+
+
+class _Call:
+    """One in-flight computation shared by every caller with the same key"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running block until it finishes and receive the same result (or
+    the same exception). Nothing is cached once the call completes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def do(self, key, fn):
+        """
+        Run ``fn`` once for all concurrent callers of ``key``
+
+        Args:
+            key (hashable): Identity of the computation
+            fn (callable): Zero-argument function to execute
+
+        Returns:
+            tuple: (result, shared) - shared is True if another caller ran ``fn``
+        """
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result, False
+
+    def stats(self):
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'in_flight': len(self._calls)
+            }
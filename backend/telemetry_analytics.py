@@ -0,0 +1,583 @@
+import csv
+import io
+import json
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+# Channel names with a special meaning in telemetry payloads
+GROUP_CHANNELS = ('lap', 'sector')
+DEFAULT_PERCENTILES = (5, 50, 95)
+DEFAULT_BINS = 20
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+PYRAMID_FACTOR = 4
+PYRAMID_MIN_POINTS = 2048
+# Accepted channel names for each alignment base, in order of preference
+ALIGN_BASES = {
+    'distance': ('distance', 'dist'),
+    'time': ('t', 'time')
+}
+
+
+class LRUCache:
+    """Small thread-safe LRU cache used for decrypted/derived telemetry"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _to_float_array(values):
+    """Convert a list of values to a float array, or None if not numeric"""
+    try:
+        arr = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    if arr.ndim != 1:
+        return None
+    return arr
+
+
+def load_channels(plaintext):
+    """
+    Parse decrypted telemetry into numeric NumPy channels
+
+    Supported layouts:
+        - JSON object of equal-length arrays: {"speed": [...], "lap": [...]}
+        - The same object nested under a "channels" key
+        - JSON list of frame records: [{"t": 0.0, "speed": 301}, ...]
+        - CSV text with a header row
+
+    Args:
+        plaintext (str): Decrypted file content
+
+    Returns:
+        dict: {channel_name: np.ndarray(float64)}
+
+    Raises:
+        ValueError: If the content holds no numeric channels or lengths differ
+    """
+    try:
+        payload = json.loads(plaintext)
+    except ValueError:
+        payload = None
+
+    columns = {}
+    if isinstance(payload, dict):
+        if isinstance(payload.get('channels'), dict):
+            payload = payload['channels']
+        for name, values in payload.items():
+            if isinstance(values, list) and values:
+                columns[name] = values
+    elif isinstance(payload, list) and payload and isinstance(payload[0], dict):
+        for name in payload[0]:
+            columns[name] = [frame.get(name) if isinstance(frame, dict) else None for frame in payload]
+    elif payload is None:
+        reader = csv.reader(io.StringIO(plaintext))
+        header = next(reader, None)
+        if header:
+            rows = [row for row in reader if row]
+            for idx, name in enumerate(header):
+                columns[name.strip()] = [row[idx] if idx < len(row) and row[idx] != '' else 'nan' for row in rows]
+
+    channels = {}
+    for name, values in columns.items():
+        arr = _to_float_array([np.nan if v is None else v for v in values])
+        if arr is not None:
+            channels[name] = arr
+
+    if not channels:
+        raise ValueError('No numeric telemetry channels found')
+
+    lengths = {arr.shape[0] for arr in channels.values()}
+    if len(lengths) != 1:
+        raise ValueError('Telemetry channels have different lengths')
+
+    return channels
+
+
+def _clean(value):
+    """Convert NumPy scalars to JSON-safe Python values (NaN -> None)"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _histograms(data, lo, hi, bins, groups=None, n_groups=1):
+    """
+    Vectorized histograms for every channel (and group) at once
+
+    Args:
+        data (np.ndarray): (channels, samples) matrix
+        lo, hi (np.ndarray): Per-channel lower/upper bin edges
+        bins (int): Number of bins
+        groups (np.ndarray): Optional per-sample group index
+        n_groups (int): Number of groups
+
+    Returns:
+        np.ndarray: (channels, n_groups, bins) counts
+    """
+    n_channels, n_samples = data.shape
+    span = np.where(hi > lo, hi - lo, 1.0)
+    scaled = (data - lo[:, None]) / span[:, None] * bins
+    valid = ~np.isnan(scaled)
+    idx = np.clip(np.nan_to_num(scaled), 0, bins - 1).astype(np.int64)
+
+    group_idx = np.zeros(n_samples, dtype=np.int64) if groups is None else groups
+    flat = (np.arange(n_channels)[:, None] * n_groups + group_idx[None, :]) * bins + idx
+    counts = np.bincount(flat[valid], minlength=n_channels * n_groups * bins)
+    return counts.reshape(n_channels, n_groups, bins)
+
+
+def _summaries(names, mins, maxs, means, pcts, percentiles, hist, edges, counts=None):
+    """Assemble per-channel summary dicts from the stacked result arrays"""
+    result = {}
+    for c, name in enumerate(names):
+        entry = {
+            'min': _clean(mins[c]),
+            'max': _clean(maxs[c]),
+            'mean': _clean(means[c]),
+            'percentiles': {f'p{q:g}': _clean(pcts[i, c]) for i, q in enumerate(percentiles)},
+            'histogram': {
+                'edges': [_clean(e) for e in edges[c]],
+                'counts': hist[c].tolist()
+            }
+        }
+        if counts is not None:
+            entry['count'] = int(counts[c])
+        result[name] = entry
+    return result
+
+
+def aggregate_channels(channels, names=None, percentiles=DEFAULT_PERCENTILES, bins=DEFAULT_BINS, group_by=None):
+    """
+    Compute min/max/mean/percentiles/histograms for telemetry channels
+
+    All statistics are computed over the full (channels x samples) matrix in
+    single NumPy passes; grouping sorts samples by group once and reduces
+    with ``reduceat`` instead of looping over laps.
+
+    Args:
+        channels (dict): Output of ``load_channels``
+        names (list): Channels to aggregate (default: all except the group key)
+        percentiles (tuple): Percentiles to report (0-100)
+        bins (int): Histogram bin count
+        group_by (str): Optional grouping channel ('lap' or 'sector')
+
+    Returns:
+        dict: JSON-serializable aggregation result
+    """
+    if group_by is not None and group_by not in channels:
+        raise ValueError(f'Group channel not found: {group_by}')
+
+    if names is None:
+        names = [name for name in channels if name != group_by]
+    missing = [name for name in names if name not in channels]
+    if missing:
+        raise ValueError(f'Unknown channels: {", ".join(missing)}')
+    if not names:
+        raise ValueError('No channels selected')
+
+    percentiles = tuple(float(q) for q in percentiles)
+    if any(q < 0 or q > 100 for q in percentiles):
+        raise ValueError('Percentiles must be between 0 and 100')
+    bins = int(bins)
+    if bins < 1:
+        raise ValueError('Bins must be positive')
+
+    data = np.vstack([channels[name] for name in names])
+    n_samples = data.shape[1]
+
+    # All-NaN channels are reported as None rather than warned about
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mins = np.nanmin(data, axis=1)
+        maxs = np.nanmax(data, axis=1)
+        means = np.nanmean(data, axis=1)
+        pcts = np.nanpercentile(data, percentiles, axis=1)
+
+    lo = np.nan_to_num(mins)
+    hi = np.nan_to_num(maxs)
+    edges = np.linspace(lo, hi, bins + 1, axis=1)
+    hist = _histograms(data, lo, hi, bins)[:, 0, :]
+
+    result = {
+        'samples': int(n_samples),
+        'channels': _summaries(names, mins, maxs, means, pcts, percentiles, hist, edges)
+    }
+
+    if group_by is None:
+        return result
+
+    keys = channels[group_by]
+    keep = ~np.isnan(keys)
+    data = data[:, keep]
+    keys = keys[keep]
+
+    group_keys, inverse, group_counts = np.unique(keys, return_inverse=True, return_counts=True)
+    n_groups = group_keys.shape[0]
+    order = np.argsort(inverse, kind='stable')
+    sorted_data = data[:, order]
+    sorted_groups = inverse[order]
+    starts = np.concatenate(([0], np.cumsum(group_counts)[:-1]))
+
+    valid = ~np.isnan(sorted_data)
+    valid_counts = np.add.reduceat(valid, starts, axis=1)
+    g_mins = np.fmin.reduceat(sorted_data, starts, axis=1)
+    g_maxs = np.fmax.reduceat(sorted_data, starts, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        g_means = np.add.reduceat(np.where(valid, sorted_data, 0.0), starts, axis=1) / valid_counts
+
+    # Pad each group into a (channels, groups, max_group_len) cube so all
+    # group percentiles come out of a single nanpercentile call
+    cube = np.full((data.shape[0], n_groups, int(group_counts.max())), np.nan)
+    positions = np.arange(sorted_data.shape[1]) - starts[sorted_groups]
+    cube[:, sorted_groups, positions] = sorted_data
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        g_pcts = np.nanpercentile(cube, percentiles, axis=2)
+
+    g_hist = _histograms(sorted_data, lo, hi, bins, sorted_groups, n_groups)
+
+    result['group_by'] = group_by
+    result['groups'] = [
+        {
+            'key': _clean(group_keys[g]),
+            'samples': int(group_counts[g]),
+            'channels': _summaries(
+                names, g_mins[:, g], g_maxs[:, g], g_means[:, g], g_pcts[:, :, g],
+                percentiles, g_hist[:, g, :], edges, valid_counts[:, g]
+            )
+        }
+        for g in range(n_groups)
+    ]
+    return result
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Min/max decimation: keep the lowest and highest sample of each bucket
+
+    Buckets are laid out as rows of a padded (n_buckets, bucket_size) matrix
+    so every bucket's argmin/argmax comes out of one vectorized call.
+
+    Args:
+        y (np.ndarray): Sample values
+        n_buckets (int): Number of buckets (output has at most 2x points)
+
+    Returns:
+        np.ndarray: Sorted, unique indices into ``y``
+    """
+    n = y.shape[0]
+    n_buckets = max(1, min(int(n_buckets), n))
+    size = -(-n // n_buckets)
+    rows = -(-n // size)
+    padded_lo = np.full(rows * size, np.inf)
+    padded_hi = np.full(rows * size, -np.inf)
+    padded_lo[:n] = y
+    padded_hi[:n] = y
+    offsets = np.arange(rows) * size
+    lo = padded_lo.reshape(rows, size).argmin(axis=1) + offsets
+    hi = padded_hi.reshape(rows, size).argmax(axis=1) + offsets
+    return np.unique(np.concatenate((lo, hi)))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Bucket bounds and next-bucket centroids are computed up front with
+    ``reduceat``; only the choice of each bucket's point depends on the
+    previous pick, and that step is vectorized across the bucket.
+
+    Args:
+        x (np.ndarray): Monotonic x values
+        y (np.ndarray): Sample values
+        n_out (int): Target number of points (>= 3)
+
+    Returns:
+        np.ndarray: Sorted indices into ``x``/``y``
+    """
+    n = x.shape[0]
+    n_out = int(n_out)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Interior buckets span [1, n - 1); first and last points are always kept
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts = edges[:-1]
+    ends = edges[1:]
+    counts = ends - starts
+
+    avg_x = np.add.reduceat(x[:n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # The triangle's third vertex is the next bucket's centroid (or the last point)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        bx = x[starts[i]:ends[i]]
+        by = y[starts[i]:ends[i]]
+        area = np.abs((x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a]))
+        a = starts[i] + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def build_pyramid(x, y, factor=PYRAMID_FACTOR, min_points=PYRAMID_MIN_POINTS):
+    """
+    Precompute a multi-resolution min/max pyramid for one channel
+
+    Level 0 is the full-resolution series; each further level keeps the
+    min/max envelope of the previous one at ``1/factor`` of its size, down to
+    roughly ``min_points`` samples.
+
+    Args:
+        x (np.ndarray): Monotonic x values
+        y (np.ndarray): Sample values
+
+    Returns:
+        list: [(x_level, y_level), ...] from finest to coarsest
+    """
+    levels = [(x, y)]
+    while levels[-1][0].shape[0] > min_points * factor:
+        lx, ly = levels[-1]
+        idx = minmax_indices(ly, lx.shape[0] // (2 * factor))
+        levels.append((lx[idx], ly[idx]))
+    return levels
+
+
+def downsample_series(pyramid, n_points, method='lttb', start=None, end=None):
+    """
+    Decimate a (possibly zoomed) range of a channel to ``n_points``
+
+    The coarsest pyramid level that still holds enough samples in the range
+    is used as the source, so wide views never touch the raw series.
+
+    Args:
+        pyramid (list): Output of ``build_pyramid``
+        n_points (int): Target point count
+        method (str): 'lttb' or 'minmax'
+        start, end (float): Optional x range
+
+    Returns:
+        dict: {'level', 'source_points', 'x', 'y'}
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f'Unknown method: {method}')
+    n_points = int(n_points)
+    if n_points < 3:
+        raise ValueError('Points must be at least 3')
+
+    for level in range(len(pyramid) - 1, -1, -1):
+        lx, ly = pyramid[level]
+        lo = 0 if start is None else int(np.searchsorted(lx, float(start), side='left'))
+        hi = lx.shape[0] if end is None else int(np.searchsorted(lx, float(end), side='right'))
+        if level == 0 or hi - lo >= n_points * PYRAMID_FACTOR:
+            break
+
+    sx = lx[lo:hi]
+    sy = ly[lo:hi]
+    if sx.shape[0] > n_points:
+        if method == 'lttb':
+            idx = lttb_indices(sx, sy, n_points)
+        else:
+            idx = minmax_indices(sy, n_points // 2)
+        sx = sx[idx]
+        sy = sy[idx]
+
+    return {
+        'level': level,
+        'source_points': int(hi - lo),
+        'x': sx.tolist(),
+        'y': sy.tolist()
+    }
+
+
+def channel_series(channels, channel, x_channel=None):
+    """
+    Select a channel and its x axis, dropping NaN samples
+
+    Args:
+        channels (dict): Output of ``load_channels``
+        channel (str): Channel to plot
+        x_channel (str): Channel to use as x (default: sample index)
+
+    Returns:
+        tuple: (x, y) float arrays with x non-decreasing
+    """
+    if channel not in channels:
+        raise ValueError(f'Unknown channel: {channel}')
+    y = channels[channel]
+    if x_channel is None:
+        x = np.arange(y.shape[0], dtype=np.float64)
+    elif x_channel in channels:
+        x = channels[x_channel]
+    else:
+        raise ValueError(f'Unknown x channel: {x_channel}')
+
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x = x[keep]
+    y = y[keep]
+    if x.shape[0] > 1 and np.any(np.diff(x) < 0):
+        raise ValueError(f'X channel is not monotonic: {x_channel}')
+    return x, y
+
+
+def _find_channel(channels, candidates):
+    """Return the first of ``candidates`` present in ``channels``, or None"""
+    for name in candidates:
+        if name in channels:
+            return name
+    return None
+
+
+def _lap_base(channels, base_name):
+    """Zero-based, non-decreasing alignment base plus the mask of kept samples"""
+    base = channels[base_name]
+    keep = ~np.isnan(base)
+    base = base[keep]
+    if base.shape[0] < 2:
+        raise ValueError(f'Not enough samples in {base_name}')
+    if np.any(np.diff(base) < 0):
+        raise ValueError(f'{base_name} is not monotonic')
+    return base - base[0], keep
+
+
+def _resample(grid, x, y):
+    """``np.interp`` of y(x) onto ``grid`` over the finite samples only, so blank cells are bridged"""
+    finite = np.isfinite(y)
+    if not finite.any():
+        return np.full(grid.shape, np.nan)
+    return np.interp(grid, x[finite], y[finite])
+
+
+def _clean_list(values):
+    """Array to a JSON-safe list (NaN/inf -> None)"""
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def _delta_summary(delta):
+    """Summary statistics of an aligned delta series"""
+    return {
+        'mean': _clean(np.nanmean(delta)),
+        'max_abs': _clean(np.nanmax(np.abs(delta))),
+        'rms': _clean(np.sqrt(np.nanmean(delta * delta)))
+    }
+
+
+def compare_laps(channels_a, channels_b, base='distance', names=None, points=1000):
+    """
+    Align two laps on a common distance or time base and diff them
+
+    Both laps are resampled onto one shared grid with ``np.interp`` (one
+    vectorized call per channel). On a distance base, the time channels are
+    also resampled so the cumulative time delta of B versus A falls out as a
+    single subtraction.
+
+    Args:
+        channels_a (dict): Reference lap (output of ``load_channels``)
+        channels_b (dict): Compared lap
+        base (str): 'distance' or 'time'
+        names (list): Channels to compare (default: all shared channels)
+        points (int): Number of grid points
+
+    Returns:
+        dict: JSON-serializable comparison result
+    """
+    if base not in ALIGN_BASES:
+        raise ValueError(f'Unknown base: {base}')
+    base_a = _find_channel(channels_a, ALIGN_BASES[base])
+    base_b = _find_channel(channels_b, ALIGN_BASES[base])
+    if base_a is None or base_b is None:
+        raise ValueError(f'Both files need a {base} channel ({", ".join(ALIGN_BASES[base])})')
+    points = int(points)
+    if points < 2:
+        raise ValueError('Points must be at least 2')
+
+    xa, keep_a = _lap_base(channels_a, base_a)
+    xb, keep_b = _lap_base(channels_b, base_b)
+
+    skip = set(ALIGN_BASES[base])
+    if names is None:
+        names = [name for name in channels_a if name in channels_b and name not in skip]
+    missing = [name for name in names if name not in channels_a or name not in channels_b]
+    if missing:
+        raise ValueError(f'Channels missing from one of the files: {", ".join(missing)}')
+
+    # Only the overlapping part of the two laps can be compared
+    grid = np.linspace(0.0, min(xa[-1], xb[-1]), points)
+
+    result = {
+        'base': base,
+        'points': points,
+        'grid': grid.tolist(),
+        'channels': {}
+    }
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for name in names:
+            a = _resample(grid, xa, channels_a[name][keep_a])
+            b = _resample(grid, xb, channels_b[name][keep_b])
+            delta = b - a
+            result['channels'][name] = {
+                'a': _clean_list(a),
+                'b': _clean_list(b),
+                'delta': _clean_list(delta),
+                'summary': _delta_summary(delta)
+            }
+
+        if base == 'distance':
+            time_a = _find_channel(channels_a, ALIGN_BASES['time'])
+            time_b = _find_channel(channels_b, ALIGN_BASES['time'])
+            if time_a is not None and time_b is not None:
+                # Both grids start at the lap start, so this zeroes each lap's clock
+                ta = _resample(grid, xa, channels_a[time_a][keep_a])
+                tb = _resample(grid, xb, channels_b[time_b][keep_b])
+                time_delta = (tb - tb[0]) - (ta - ta[0])
+                result['time_delta'] = _clean_list(time_delta)
+                result['total_time_delta'] = _clean(time_delta[-1])
+
+    return result
+
+
+def query_key(params):
+    """Build a hashable, order-independent cache key from query parameters"""
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import tarfile
+import time
+
+# Archive layout (an uncompressed POSIX tar, written and read as a stream):
+#   vault.json                 exporting team, owner and owner public key
+#   files/000001.ndjson        one JSON record per file (with its shares)
+#   blobs/<id>                 raw ciphertext + GCM tag of each file in that batch
+#   blobs/<id>.<version>       ... or of each stored version of a versioned file
+#   ...                        further ndjson/blob batches
+#   manifest.json              counts, running digest and owner signature
+# Records precede their blobs, so a reader holds one batch of records at a time.
+FORMAT = 'paddockvault-export'
+VERSION = 2
+# Version 1 exports (no file versions) are still readable
+READABLE_VERSIONS = (1, 2)
+BLOCK = tarfile.BLOCKSIZE
+CHUNK_SIZE = 1024 * 1024
+
+
+class ExportFormatError(Exception):
+    """The stream is not a well-formed vault export"""
+
+
+def _member_header(name, size, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+class ExportDigest:
+    """
+    Running digest over every member written before the manifest
+
+    Each member contributes ``name NUL sha256(content) LF``, so the
+    manifest commits to the names, order and content of the whole archive
+    without the writer or reader keeping a member list.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.members = 0
+
+    def add(self, name, content_sha256):
+        self._hash.update(f'{name}\0{content_sha256}\n'.encode('utf-8'))
+        self.members += 1
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class ExportWriter:
+    """
+    Generates tar bytes member by member
+
+    Nothing is buffered beyond the member being written; blob content is
+    passed through in chunks straight from the blob store.
+    """
+
+    def __init__(self):
+        self.digest = ExportDigest()
+        self.bytes_written = 0
+        self.mtime = time.time()
+
+    def _emit(self, data):
+        self.bytes_written += len(data)
+        return data
+
+    def member(self, name, data):
+        """Yield one in-memory member (headers, records, manifest)"""
+        yield from self.stream_member(name, len(data), (data,))
+
+    def stream_member(self, name, size, chunks):
+        """Yield a member whose ``size`` bytes arrive as ``chunks``"""
+        yield self._emit(_member_header(name, size, self.mtime))
+        digest = hashlib.sha256()
+        written = 0
+        for chunk in chunks:
+            digest.update(chunk)
+            written += len(chunk)
+            yield self._emit(bytes(chunk))
+        if written != size:
+            raise ExportFormatError(f'{name}: expected {size} bytes, got {written}')
+        if size % BLOCK:
+            yield self._emit(b'\0' * (BLOCK - size % BLOCK))
+        if name != 'manifest.json':
+            self.digest.add(name, digest.hexdigest())
+
+    def end(self):
+        yield self._emit(b'\0' * (BLOCK * 2))
+
+
+def view_chunks(view, chunk_size=CHUNK_SIZE):
+    """Slice a memoryview into chunks without copying"""
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size]
+
+
+def ndjson(records):
+    return b''.join(json.dumps(r, separators=(',', ':'), sort_keys=True).encode('utf-8') + b'\n' for r in records)
+
+
+def manifest_message(manifest):
+    """Canonical bytes (as text) that the owner signs: the manifest without its signature"""
+    body = {k: v for k, v in manifest.items() if k != 'signature'}
+    return json.dumps(body, separators=(',', ':'), sort_keys=True)
+
+
+def read_export(fileobj):
+    """
+    Iterate the members of an export stream
+
+    Uses tarfile's stream mode, so the source is read strictly forward and
+    never seeked. The running digest is updated for every member the caller
+    reads, up to (not including) the manifest.
+
+    Yields:
+        tuple: (name, reader, digest) - ``reader(limit)`` returns the member
+        content, or raises ExportFormatError if it exceeds ``limit`` bytes
+    """
+    digest = ExportDigest()
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode='r|')
+    except tarfile.TarError as e:
+        raise ExportFormatError(f'Not a tar stream: {e}')
+    with archive:
+        try:
+            for info in archive:
+                if not info.isfile():
+                    continue
+
+                def reader(limit, info=info):
+                    if info.size > limit:
+                        raise ExportFormatError(f'{info.name} is larger than {limit} bytes')
+                    try:
+                        data = archive.extractfile(info).read()
+                    except tarfile.TarError as e:
+                        raise ExportFormatError(f'{info.name}: {e}')
+                    if info.name != 'manifest.json':
+                        digest.add(info.name, hashlib.sha256(data).hexdigest())
+                    return data
+
+                yield info.name, reader, digest
+        except tarfile.TarError as e:
+            raise ExportFormatError(f'Corrupt tar stream: {e}')
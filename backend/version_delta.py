@@ -0,0 +1,262 @@
+import base64
+
+import numpy as np
+
+from crypto_utils import encrypt_with_key, decrypt_gcm_bytes
+
+# Delta layout: MAGIC | varint target length | ops.
+#   0x00 varint offset varint length   copy bytes from the previous version
+#   0x01 varint length <bytes>         insert literal bytes
+MAGIC = b'PVD1'
+COPY = 0
+INSERT = 1
+# Matches are found on aligned BLOCK-byte blocks of the previous version
+BLOCK = 16
+# A delta is only kept when it is smaller than this share of the full content
+MAX_DELTA_RATIO = 0.5
+
+
+class DeltaError(Exception):
+    """A delta is malformed or does not fit its base"""
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise DeltaError('truncated varint')
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _match_length(a, ai, b, bi):
+    """Length of the common run of a[ai:] and b[bi:], compared in growing numpy chunks"""
+    limit = min(len(a) - ai, len(b) - bi)
+    matched, step = 0, 256
+    while matched < limit:
+        k = min(step, limit - matched)
+        diff = np.flatnonzero(a[ai + matched:ai + matched + k] != b[bi + matched:bi + matched + k])
+        if diff.size:
+            return matched + int(diff[0])
+        matched += k
+        step *= 2
+    return matched
+
+
+def _block_keys(arr, positions):
+    """64-bit key of the BLOCK bytes at each position (two unaligned u64 loads)"""
+    words = np.ndarray(shape=(len(arr) - 7,), dtype='<u8', buffer=arr, strides=(1,))
+    return words[positions] * np.uint64(0x9E3779B97F4A7C15) ^ words[positions + 8]
+
+
+def make_delta(old, new):
+    """
+    Encode ``new`` as copies from ``old`` plus literal inserts
+
+    Common prefix and suffix are trimmed first. In between, every aligned
+    16-byte block of ``old`` is indexed by a 64-bit key, keys are computed
+    for every offset of ``new`` with NumPy, and only offsets whose key
+    matches are visited in Python, so the cost is linear in the content and
+    the Python work is proportional to the number of changed regions.
+
+    Args:
+        old (bytes): Previous version
+        new (bytes): Next version
+
+    Returns:
+        bytes: Delta accepted by apply_delta(old, delta)
+    """
+    a = np.frombuffer(old, dtype=np.uint8)
+    b = np.frombuffer(new, dtype=np.uint8)
+    ops = [MAGIC, _varint(len(new))]
+
+    def copy(offset, length):
+        if length:
+            ops.append(bytes([COPY]) + _varint(offset) + _varint(length))
+
+    def insert(start, end):
+        if end > start:
+            ops.append(bytes([INSERT]) + _varint(end - start) + new[start:end])
+
+    prefix = _match_length(a, 0, b, 0)
+    limit = min(len(a), len(b)) - prefix
+    suffix = 0
+    if limit:
+        suffix = _match_length(a[::-1], 0, b[::-1], 0)
+        suffix = min(suffix, limit)
+    copy(0, prefix)
+
+    a_mid = a[prefix:len(a) - suffix]
+    b_mid = b[prefix:len(b) - suffix]
+    literal = 0
+    if len(a_mid) >= BLOCK and len(b_mid) >= BLOCK:
+        old_positions = np.arange(0, len(a_mid) - BLOCK + 1, BLOCK)
+        old_keys = _block_keys(a_mid, old_positions)
+        order = np.argsort(old_keys, kind='stable')
+        old_keys, old_positions = old_keys[order], old_positions[order]
+
+        new_keys = _block_keys(b_mid, np.arange(len(b_mid) - BLOCK + 1))
+        slots = np.minimum(np.searchsorted(old_keys, new_keys), len(old_keys) - 1)
+        candidates = np.flatnonzero(old_keys[slots] == new_keys)
+
+        index = 0
+        while index < len(candidates):
+            at = int(candidates[index])
+            source = int(old_positions[slots[at]])
+            length = _match_length(a_mid, source, b_mid, at)
+            if length < BLOCK:
+                index += 1
+                continue
+            # Grow the match backwards into the pending literal
+            while at > literal and source > 0 and a_mid[source - 1] == b_mid[at - 1]:
+                at -= 1
+                source -= 1
+                length += 1
+            insert(prefix + literal, prefix + at)
+            copy(prefix + source, length)
+            literal = at + length
+            index = int(np.searchsorted(candidates, literal))
+    insert(prefix + literal, prefix + len(b_mid))
+    copy(len(a) - suffix, suffix)
+    return b''.join(ops)
+
+
+def apply_delta(old, delta):
+    """
+    Rebuild the next version from ``old`` and a make_delta() result
+
+    Raises:
+        DeltaError: If the delta is malformed or refers outside ``old``
+    """
+    if delta[:len(MAGIC)] != MAGIC:
+        raise DeltaError('not a version delta')
+    size, pos = _read_varint(delta, len(MAGIC))
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op == COPY:
+            offset, pos = _read_varint(delta, pos)
+            length, pos = _read_varint(delta, pos)
+            if offset + length > len(old):
+                raise DeltaError('copy outside the base version')
+            out += old[offset:offset + length]
+        elif op == INSERT:
+            length, pos = _read_varint(delta, pos)
+            if pos + length > len(delta):
+                raise DeltaError('truncated insert')
+            out += delta[pos:pos + length]
+            pos += length
+        else:
+            raise DeltaError(f'unknown op {op}')
+    if len(out) != size:
+        raise DeltaError(f'rebuilt {len(out)} bytes, expected {size}')
+    return bytes(out)
+
+
+def seal_version(aes_key, previous, plaintext, snapshot):
+    """
+    Encrypt the next version of a file under the file's key
+
+    Runs on the crypto executor. The version is stored as a delta against
+    ``previous`` unless a snapshot is due or the delta would not be much
+    smaller than the content itself, so only the change is encrypted.
+
+    Args:
+        aes_key (bytes): The file's AES key
+        previous (str): Plaintext of the current head version
+        plaintext (str): Plaintext of the new version
+        snapshot (bool): Store the full content regardless of the delta size
+
+    Returns:
+        dict: kind ('full' or 'delta'), nonce (Base64), ciphertext (raw bytes
+            + tag), stored_size (bytes encrypted)
+    """
+    data = plaintext.encode('utf-8')
+    payload, kind = data, 'full'
+    if not snapshot:
+        delta = make_delta(previous.encode('utf-8'), data)
+        if len(delta) < len(data) * MAX_DELTA_RATIO:
+            payload, kind = delta, 'delta'
+    sealed = encrypt_with_key(aes_key, payload)
+    return {
+        'kind': kind,
+        'nonce': sealed['nonce'],
+        'ciphertext': base64.b64decode(sealed['ciphertext']),
+        'stored_size': len(payload)
+    }
+
+
+def _open_payload(store, aes_key, part):
+    kind, nonce, content, blob_ref = part
+    if blob_ref:
+        with store.open(blob_ref) as view:
+            return decrypt_gcm_bytes(aes_key, nonce, view)
+    return decrypt_gcm_bytes(aes_key, nonce, base64.b64decode(content))
+
+
+def replay_versions(store, aes_key, parts, base=None):
+    """
+    Decrypt stored versions in order and yield each one's content
+
+    ``parts`` starts at a full snapshot, or ``base`` is the plaintext of the
+    version just before ``parts[0]`` (e.g. from the cache), so only the
+    versions since then are decrypted.
+
+    Args:
+        store: Blob store for payloads with a blob_ref
+        aes_key (bytes): The file's AES key
+        parts (list): (kind, nonce, content, blob_ref) per version, in order
+        base (str): Plaintext to apply the first delta to, or None
+
+    Yields:
+        bytes: UTF-8 content of each version in ``parts``
+
+    Raises:
+        ContentDecryptError: A payload failed its GCM tag
+        DeltaError: A delta does not fit the version before it
+    """
+    current = base.encode('utf-8') if base is not None else None
+    for part in parts:
+        payload = _open_payload(store, aes_key, part)
+        if part[0] == 'full':
+            current = payload
+        elif current is None:
+            raise DeltaError('delta without a base version')
+        else:
+            current = apply_delta(current, payload)
+        yield current
+
+
+def reconstruct_version(store, aes_key, base, parts):
+    """
+    Plaintext of the last version in ``parts`` (see replay_versions)
+
+    Runs on the crypto executor, so intermediate versions never leave the
+    worker.
+
+    Returns:
+        str: Decrypted plaintext
+    """
+    current = None
+    for current in replay_versions(store, aes_key, parts, base):
+        pass
+    if current is None:
+        raise DeltaError('no versions to reconstruct')
+    return current.decode('utf-8')